@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark running a CLI tool in a fresh interpreter per call against a persistent CLI worker.
+
+The tool imports a few standard library modules, parses its arguments and prints them.
+The spawn timings don't include the shell and venv activation `_run_cli_tool` adds on top.
+
+Usage:
+    python -m benchmarks.bench_cli_workers --calls 20
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+from server_utils._run_tool._cli_workers import CliWorkers
+
+
+_MAIN_SOURCE = """
+import argparse, json, pathlib, re, typing, dataclasses
+parser = argparse.ArgumentParser()
+parser.add_argument("--query")
+print(json.dumps(vars(parser.parse_args())))
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tool_dir = Path(temp_dir) / "bench_cli_tool"
+        tool_dir.mkdir()
+        (tool_dir / "__main__.py").write_text(_MAIN_SOURCE)
+
+        spawn_times = []
+        for i in range(args.calls):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, str(tool_dir), "--query", str(i)], capture_output=True, check=True)
+            spawn_times.append(time.perf_counter() - start)
+
+        workers = CliWorkers(
+            configs=SimpleNamespace(ROOT_DIR=Path(temp_dir), tool_timeout=60, cli_worker_max_calls=10_000),
+            resources={'logger': MagicMock()},
+        )
+        worker_times = []
+        try:
+            for i in range(args.calls):
+                start = time.perf_counter()
+                workers.run(["python", "-m", str(tool_dir), "--query", str(i)])
+                worker_times.append(time.perf_counter() - start)
+        finally:
+            workers.shutdown()
+
+    print(f"{'mode':>14} {'first ms':>9} {'median ms':>10}")
+    for mode, times in (("spawn per call", spawn_times), ("worker", worker_times)):
+        print(f"{mode:>14} {times[0] * 1e3:>9.1f} {statistics.median(times[1:]) * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark the storage dtypes of the tool search embedding index.
+
+For float32, float16 and int8 (with per-row scales), reports the memory used by the
+embedding matrix, the per-query latency of the exact backend, and how far rankings
+drift from float32: top-k overlap, top-1 agreement and the largest absolute error
+in cosine similarity.
+
+Usage:
+    python -m benchmarks.bench_embedding_quantization --rows 10000 --queries 200 --top-k 5
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.bench_tool_search import _make_corpus, _time_queries
+from tools.functions._embedding_index import _quantize, _EMBEDDING_DTYPES
+from tools.functions._search_backends import _make_search_backend
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'rows':>8} {'dtype':>8} {'MiB':>8} {'query ms':>10} {'top-k overlap':>14} {'top-1 agree':>12} {'max |err|':>10}")
+
+    for n_rows in args.rows:
+        vectors = _make_corpus(n_rows, args.dim, n_topics=max(8, n_rows // 100), rng=rng)
+        queries = vectors[rng.integers(0, n_rows, args.queries)] + 0.3 * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        reference, reference_scores = None, None
+        for dtype in _EMBEDDING_DTYPES:
+            matrix, scales = _quantize(np, vectors, dtype)
+            backend = _make_search_backend(np, "exact")
+            backend.build(matrix, scales)
+            found, latency = _time_queries(backend, queries, args.top_k)
+
+            # Full score vectors, to measure how far the similarities themselves drift.
+            scores = np.asarray(matrix, dtype=np.float32) @ queries.T
+            if scales is not None:
+                scores *= scales[:, None]
+
+            if reference is None:
+                reference, reference_scores = found, scores
+
+            overlap = np.mean([
+                len(set(f.tolist()) & set(r.tolist())) / len(r) for f, r in zip(found, reference)
+            ])
+            top1 = np.mean([f[0] == r[0] for f, r in zip(found, reference)])
+            max_error = float(np.abs(scores - reference_scores).max())
+            size_mib = (matrix.nbytes + (scales.nbytes if scales is not None else 0)) / 2**20
+
+            print(f"{n_rows:>8} {dtype:>8} {size_mib:>8.2f} {latency * 1e3:>10.3f} {overlap:>14.3f} {top1:>12.3f} {max_error:>10.5f}")
+
+
+if __name__ == "__main__":
+    main()
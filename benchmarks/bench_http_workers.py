@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark tool call throughput over streamable HTTP with one server worker against several.
+
+Each call runs a CPU-bound tool for about `--work-ms` milliseconds. `--clients` threads make
+calls concurrently, each on a new connection, for `--seconds`. With one worker the calls
+share one core; with several, the kernel spreads connections between the workers' processes.
+
+Usage:
+    python -m benchmarks.bench_http_workers --workers 1 2 4 --clients 16 --seconds 5
+"""
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+import httpx
+from mcp.server.fastmcp import FastMCP
+
+
+from server_utils.server_.prefork_server import PreforkServer
+
+
+_CALL = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "spin", "arguments": {}}}
+_HEADERS = {"Accept": "application/json, text/event-stream"}
+
+
+def _server(work_ms: float) -> FastMCP:
+    mcp = FastMCP("bench", stateless_http=True, json_response=True, log_level="WARNING")
+
+    @mcp.tool()
+    def spin() -> int:
+        deadline = time.thread_time() + work_ms / 1000
+        count = 0
+        while time.thread_time() < deadline:
+            count += 1
+        return count
+
+    return mcp
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _calls_per_second(url: str, clients: int, seconds: float) -> float:
+    counts = [0] * clients
+    deadline = time.monotonic() + seconds
+
+    def client(index: int) -> None:
+        while time.monotonic() < deadline:
+            with httpx.Client(timeout=60) as http:
+                http.post(url, json=_CALL, headers=_HEADERS).raise_for_status()
+            counts[index] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / seconds
+
+
+def _wait_until_serving(url: str) -> None:
+    for _ in range(300):
+        try:
+            httpx.post(url, json=_CALL, headers=_HEADERS, timeout=10).raise_for_status()
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Server at {url} didn't start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--work-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'calls/s':>9} {'speedup':>8}")
+    baseline = None
+    for workers in args.workers:
+        port = _free_port()
+        server = PreforkServer(
+            configs=SimpleNamespace(host="127.0.0.1", port=port, workers=workers),
+            resources={'logger': MagicMock()},
+        )
+        supervisor = os.fork()
+        if supervisor == 0:
+            try:
+                server.serve(_server(args.work_ms))
+            finally:
+                os._exit(0)
+        try:
+            url = f"http://127.0.0.1:{port}/mcp"
+            _wait_until_serving(url)
+            rate = _calls_per_second(url, args.clients, args.seconds)
+        finally:
+            os.kill(supervisor, signal.SIGTERM)
+            os.waitpid(supervisor, 0)
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>9.1f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark logging a large tool result eagerly with an f-string against deferred formatting.
+
+Each call logs a message containing a result of `--items` key-value pairs, as the tool
+dispatch path does at DEBUG. The McpLogger prints to a no-op, and the standard logger's
+handler formats records and discards them, so the timings are the cost of building the message.
+
+Usage:
+    python -m benchmarks.bench_logging --items 1000 --calls 2000
+"""
+import argparse
+import logging
+import time
+from types import SimpleNamespace
+from typing import Callable
+
+
+from logger import McpLogger, _resolve_callable_message
+
+
+class _FormatOnlyHandler(logging.Handler):
+    def emit(self, record: logging.LogRecord) -> None:
+        self.format(record)
+
+
+def _time_per_call(log: Callable[[], None], calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        log()
+    return (time.perf_counter() - start) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    result = {f"key_{i}": list(range(5)) for i in range(args.items)}
+    std_logger = logging.getLogger("bench_logging")
+    std_logger.propagate = False
+    std_logger.addHandler(_FormatOnlyHandler())
+    std_logger.addFilter(_resolve_callable_message)
+
+    print(f"{'logger':>10} {'level':>9} {'f-string us':>12} {'%-args us':>10} {'callable us':>12}")
+    for level_name, level in (("disabled", logging.INFO), ("enabled", logging.DEBUG)):
+        mcp_logger = McpLogger(
+            configs=SimpleNamespace(log_level=level, log_queue_size=0, log_queue_full_policy="drop"),
+            resources={"print": lambda message: None},
+        )
+        std_logger.setLevel(level)
+        for name, log in (("McpLogger", mcp_logger), ("logging", std_logger)):
+            times = [
+                _time_per_call(lambda: log.debug(f"Tool call result: {result}"), args.calls),
+                _time_per_call(lambda: log.debug("Tool call result: %s", result), args.calls),
+                _time_per_call(lambda: log.debug(lambda: f"Tool call result: {result}"), args.calls),
+            ]
+            print(f"{name:>10} {level_name:>9} " + " ".join(f"{t * 1e6:>{w}.2f}" for t, w in zip(times, (12, 10, 12))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark how long it takes to register the function tools at server startup.
+
+Each run happens in a fresh interpreter, so module imports are not cached between runs.
+Reports the median wall time from interpreter start to all function tools being
+registered with FastMCP, with eager and with lazy tool registration, and from the
+tool manifest. The manifest is written by an untimed run before the manifest runs.
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+_ROOT_DIR = Path(__file__).parent.parent
+
+_SNIPPET = """
+import time
+start = time.perf_counter()
+from configs import configs
+configs.lazy_tool_registration = {lazy}
+configs.use_tool_manifest = {manifest}
+from mcp.server.fastmcp import FastMCP
+from server_utils.server_.get_functions_tools_from_files import get_function_tools_from_files
+mcp = get_function_tools_from_files(FastMCP("bench"))
+print(time.perf_counter() - start, len(mcp._tool_manager.list_tools()))
+"""
+
+
+def _run(lazy: bool, manifest: bool = False) -> tuple[float, int]:
+    result = subprocess.run(
+        [sys.executable, "-c", _SNIPPET.format(lazy=lazy, manifest=manifest)],
+        cwd=_ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    seconds, tool_count = result.stdout.strip().splitlines()[-1].split()
+    return float(seconds), int(tool_count)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':>8} {'tools':>6} {'median ms':>10} {'min ms':>8}")
+    _run(lazy=True, manifest=True)
+    for mode, lazy, manifest in (("eager", False, False), ("lazy", True, False), ("manifest", True, True)):
+        runs = [_run(lazy, manifest) for _ in range(args.repeat)]
+        times = [seconds for seconds, _ in runs]
+        print(f"{mode:>8} {runs[0][1]:>6} {statistics.median(times) * 1e3:>10.1f} {min(times) * 1e3:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
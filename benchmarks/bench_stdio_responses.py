@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark the bytes and time per tool response written to stdout, before and after dropping repr() quoting.
+
+Each response carries a tool's string output that looks like source code, with quotes,
+backslashes and newlines. "repr + sdk write" quotes the output with repr() as
+`return_text_content` used to, and writes the response as the MCP SDK's stdio transport does.
+"plain + chunked" includes the output as it is and writes with `write_messages`.
+Responses are written to the null device, so the timings are encoding and writing only.
+
+Usage:
+    python -m benchmarks.bench_stdio_responses --calls 20
+"""
+import argparse
+from io import TextIOWrapper
+import os
+import statistics
+import time
+
+
+import mcp.types as types
+from mcp.shared.message import SessionMessage
+
+
+from server_utils._run_tool._return_text_content import return_text_content
+from server_utils.server_.stdio_transport import write_messages
+
+
+_LINE = 'def tool(path: str) -> str:\n    return f"\'{path}\' \\\\ done"  # a "quoted" line\n'
+
+
+def _message(text_content: types.TextContent) -> SessionMessage:
+    result = types.CallToolResult(content=[text_content], isError=False)
+    response = types.JSONRPCResponse(jsonrpc="2.0", id=1, result=result.model_dump(by_alias=True, exclude_none=True))
+    return SessionMessage(types.JSONRPCMessage(response))
+
+
+def _repr_sdk_write(stdout: TextIOWrapper, output: str) -> int:
+    message = _message(types.TextContent(type="text", text=f"{repr('Success')}: {repr(output)}"))
+    json = message.message.model_dump_json(by_alias=True, exclude_none=True)
+    stdout.write(json + "\n")
+    stdout.flush()
+    return len(json.encode("utf-8")) + 1
+
+
+def _plain_chunked_write(stdout, output: str) -> int:
+    message = _message(return_text_content(output, "Success"))
+    return write_messages(stdout, [message], chunk_size=64 * 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(os.devnull, "wb") as null:
+        text_null = TextIOWrapper(null, encoding="utf-8", write_through=False)
+        print(f"{'output':>10} {'mode':>16} {'bytes':>11} {'median ms':>10}")
+        for size in (10_000, 1_000_000, 10_000_000):
+            output = (_LINE * (size // len(_LINE) + 1))[:size]
+            for mode, write, stdout in (
+                ("repr + sdk write", _repr_sdk_write, text_null),
+                ("plain + chunked", _plain_chunked_write, null),
+            ):
+                times = []
+                for _ in range(args.calls):
+                    start = time.perf_counter()
+                    written = write(stdout, output)
+                    times.append(time.perf_counter() - start)
+                print(f"{size:>10,} {mode:>16} {written:>11,} {statistics.median(times) * 1e3:>10.2f}")
+        text_null.detach()
+
+
+if __name__ == "__main__":
+    main()
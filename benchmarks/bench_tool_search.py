@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark the tool search backends against each other.
+
+Compares recall@k and per-query latency of the approximate ('ivf') backend against
+the exact backend on synthetic, clustered 384-dimensional embeddings
+(the output size of all-MiniLM-L6-v2).
+
+Usage:
+    python -m benchmarks.bench_tool_search --rows 1000 10000 50000 --queries 200 --top-k 5
+"""
+import argparse
+import time
+
+import numpy as np
+
+from tools.functions._search_backends import _make_search_backend
+
+
+def _make_corpus(n_rows: int, dim: int, n_topics: int, rng: np.random.Generator) -> np.ndarray:
+    """Docstring-like embeddings: noisy points around a set of topic directions."""
+    topics = rng.normal(size=(n_topics, dim)).astype(np.float32)
+    rows = topics[rng.integers(0, n_topics, n_rows)] + 0.6 * rng.normal(size=(n_rows, dim)).astype(np.float32)
+    return rows.astype(np.float32)
+
+
+def _time_queries(backend, queries: np.ndarray, k: int) -> tuple[list[np.ndarray], float]:
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        indices, _ = backend.search(query, k)
+        results.append(indices)
+    elapsed = time.perf_counter() - start
+    return results, elapsed / len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--probes", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'rows':>8} {'backend':>8} {'build ms':>10} {'query ms':>10} {'recall@k':>9}")
+
+    for n_rows in args.rows:
+        matrix = _make_corpus(n_rows, args.dim, n_topics=max(8, n_rows // 100), rng=rng)
+        queries = matrix[rng.integers(0, n_rows, args.queries)] + 0.3 * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+        exact = _make_search_backend(np, "exact")
+        exact.build(matrix)
+        truth, exact_latency = _time_queries(exact, queries, args.top_k)
+        print(f"{n_rows:>8} {'exact':>8} {0.0:>10.1f} {exact_latency * 1e3:>10.3f} {1.0:>9.3f}")
+
+        ivf = _make_search_backend(np, "ivf", probes=args.probes, min_rows=0)
+        start = time.perf_counter()
+        ivf.build(matrix)
+        build_ms = (time.perf_counter() - start) * 1e3
+        found, ivf_latency = _time_queries(ivf, queries, args.top_k)
+
+        recall = np.mean([
+            len(set(f.tolist()) & set(t.tolist())) / len(t) for f, t in zip(found, truth)
+        ])
+        print(f"{n_rows:>8} {'ivf':>8} {build_ms:>10.1f} {ivf_latency * 1e3:>10.3f} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
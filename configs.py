@@ -5,7 +5,9 @@ from __version__ import __version__
 
 
 from dataclasses import dataclass, field
+from fnmatch import fnmatch
 from functools import cached_property
+import json
 import logging
 import os
 from pathlib import Path
@@ -18,6 +20,123 @@ except ImportError:
 
 _ROOT_DIR = Path(__file__).parent
 
+# Directories that never hold tool requirements, and are often huge.
+_PRUNED_DIR_NAMES = frozenset({
+    ".git", ".venv", "venv", "__pycache__", "node_modules", "tests", "logs", ".cache",
+    ".pytest_cache", ".mypy_cache", ".ruff_cache", ".tox", ".nox",
+})
+_REQUIREMENTS_CACHE_VERSION = 1
+
+
+def _read_gitignore(dir_path: str) -> list[str]:
+    """Read the patterns of a directory's .gitignore. Negated patterns are not supported and skipped."""
+    try:
+        with open(os.path.join(dir_path, ".gitignore"), "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f]
+    except OSError:
+        return []
+    return [line for line in lines if line and not line.startswith(("#", "!"))]
+
+
+def _is_ignored(rel_path: str, name: str, is_dir: bool, patterns: list[tuple[str, str]]) -> bool:
+    """Check a path against .gitignore patterns, each paired with the directory of its .gitignore."""
+    for base, pattern in patterns:
+        if pattern.endswith("/"):
+            if not is_dir:
+                continue
+            pattern = pattern.rstrip("/")
+        if base:
+            if not rel_path.startswith(base + "/"):
+                continue
+            path = rel_path[len(base) + 1:]
+        else:
+            path = rel_path
+        if "/" in pattern.lstrip("/"):
+            # Anchored to the .gitignore's directory.
+            if fnmatch(path, pattern.lstrip("/")):
+                return True
+        elif pattern.startswith("/"):
+            if fnmatch(path, pattern[1:]):
+                return True
+        elif fnmatch(name, pattern):
+            return True
+    return False
+
+
+def _walk_for_requirements(root: Path) -> tuple[list[str], dict[str, int]]:
+    """Find requirements.txt files under root, pruning ignored directories.
+
+    Returns:
+        tuple[list[str], dict[str, int]]: The requirements files, and the mtimes of every directory
+            and .gitignore file the result depends on, all relative to root.
+    """
+    files: list[str] = []
+    mtimes: dict[str, int] = {}
+    stack: list[tuple[str, list[tuple[str, str]]]] = [("", [])]
+    while stack:
+        rel_dir, patterns = stack.pop()
+        abs_dir = os.path.join(root, rel_dir)
+        try:
+            mtimes[rel_dir] = os.stat(abs_dir).st_mtime_ns
+            entries = list(os.scandir(abs_dir))
+        except OSError:
+            continue
+
+        gitignore = _read_gitignore(abs_dir)
+        if gitignore:
+            gitignore_path = f"{rel_dir}/.gitignore" if rel_dir else ".gitignore"
+            mtimes[gitignore_path] = os.stat(os.path.join(abs_dir, ".gitignore")).st_mtime_ns
+            patterns = patterns + [(rel_dir, pattern) for pattern in gitignore]
+
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if is_dir:
+                if entry.name in _PRUNED_DIR_NAMES or _is_ignored(rel_path, entry.name, True, patterns):
+                    continue
+                # Virtual environments with other names.
+                if os.path.exists(os.path.join(entry.path, "pyvenv.cfg")):
+                    continue
+                stack.append((rel_path, patterns))
+            elif entry.name == "requirements.txt" and entry.is_file() and not _is_ignored(rel_path, entry.name, False, patterns):
+                files.append(rel_path)
+    return sorted(files), mtimes
+
+
+def _find_requirements_files(root: Path, cache_path: Path) -> list[Path]:
+    """Find requirements.txt files under root, reusing the last result if no relevant directory changed.
+
+    A directory's mtime changes whenever an entry is added to, removed from or renamed in it,
+    so checking the mtimes of the walked directories and .gitignore files is enough to tell
+    whether the set of requirements files could have changed.
+    """
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache["version"] == _REQUIREMENTS_CACHE_VERSION and cache["root"] == str(root):
+            for rel_path, mtime_ns in cache["mtimes"].items():
+                if os.stat(os.path.join(root, rel_path)).st_mtime_ns != mtime_ns:
+                    break
+            else:
+                return [root / rel_path for rel_path in cache["files"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    try:
+        # Before walking, so creating the cache directory doesn't invalidate the result.
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        pass
+    files, mtimes = _walk_for_requirements(root)
+    try:
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": _REQUIREMENTS_CACHE_VERSION, "root": str(root), "files": files, "mtimes": mtimes}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return [root / rel_path for rel_path in files]
+
 
 class InitializationError(Exception):
     """When a fatal error occurs during the initialization of the server."""
@@ -30,9 +149,46 @@ class Configs:
     Attributes:
         verbose: Enable verbose output
         log_level: The log level for the server and logger.
+        log_queue_size: Most log records queued for the background log writer. 0 prints each record on the calling thread.
+        log_queue_full_policy: What to do with a log record when the log queue is full: "drop" it and count it, or "block" until there is room.
+        transport: How clients connect. "stdio" serves one client over stdin and stdout; "streamable-http" or "sse" serve many at host:port.
         host: Host for the server
         port: Port for the server
+        workers: Number of processes serving streamable-http clients from one socket, forked after the tools are loaded. Above 1, HTTP sessions are stateless.
         reload: Enable auto-reload
+        tool_reload_interval: Seconds between checks for changed tool source files when reload is enabled.
+        tool_timeout: Timeout for tool execution in seconds
+        cli_output_limit: Most characters of a CLI tool's output to keep. The rest is discarded as it is read.
+        terminate_cli_tool_at_output_limit: Terminate a CLI tool once its output reaches cli_output_limit.
+        cli_progress_interval: Minimum seconds between progress notifications with a CLI tool's output.
+        result_token_budget: Most tokens of a function tool's result to return. Larger results are truncated and kept in the result store.
+        result_token_encoding: tiktoken encoding used to count result tokens. Tokens are estimated from characters without tiktoken.
+        result_char_limit: Most characters of any one string in a function tool's result to return, whatever its token count.
+        result_store_max_entries: Most truncated tool results kept in full on disk, to be paged through with get_tool_result_page.
+        result_store_max_bytes: Most bytes of truncated tool results kept on disk. The least recently read are removed first.
+        result_store_ttl: Seconds a truncated tool result is kept on disk.
+        metrics_prometheus_path: File to write per-tool metrics to in Prometheus text format, e.g. for node_exporter's textfile collector. Empty disables the export.
+        metrics_export_interval: Seconds between writes of the Prometheus metrics file.
+        trace_path: File to append tool call tracing spans to as JSON lines. Empty disables tracing.
+        stdio_write_chunk_size: Most bytes of a response written to stdout at once.
+        max_concurrent_tool_calls: Most tool calls run at once, across every client. The rest wait their turn. 0 is unlimited.
+        default_tool_concurrency: Most calls to any one tool run at once, unless set in tool_concurrency_limits. 0 is unlimited.
+        tool_concurrency_limits: Most calls to a tool run at once, by tool name.
+        tool_cache_max_entries: Most results of @memoize tools kept in memory. The least recently used are dropped first.
+        tool_cache_max_disk_entries: Most results of @memoize(persist=True) tools kept on disk.
+        coalesce_tool_calls: Let identical tool calls that are in flight at the same time share one execution.
+        cli_workers: Run `python -m` CLI tools in persistent worker processes instead of a new shell and interpreter per call. Their output is limited and spilled as usual, but not streamed as progress.
+        cli_worker_max_calls: Number of calls after which a CLI tool's worker process is replaced.
+        tool_process_pool_workers: Number of worker processes for each tool whose module sets RUN_IN_PROCESS = True.
+        tool_thread_pool_workers: Number of threads synchronous tools run on, off the event loop. 0 runs them on the event loop.
+        dependency_install_workers: Install changed tool requirements in the background with this many workers. 0 installs them before startup.
+        lazy_tool_registration: Register function tools from their source without importing them until first call.
+        use_tool_manifest: Register unchanged function tools from the cached tool manifest instead of their source.
+        warm_up_tool_search: Load the tool search model and embed the tool corpus in the background at startup.
+        tool_search_backend: Nearest-neighbour backend for tool search, either 'exact' or 'ivf'.
+        tool_search_ivf_lists: Number of clusters for the 'ivf' backend. 0 picks one based on the number of tools.
+        tool_search_ivf_probes: Number of clusters the 'ivf' backend scans per query.
+        tool_search_embedding_dtype: Storage dtype of the tool search embeddings: 'float32', 'float16' or 'int8'.
 
     Properties:
         VERSION: The current version of the program.
@@ -44,12 +200,48 @@ class Configs:
     """
     verbose: bool = field(default=True, metadata={"description": "Enable verbose output"})
     log_level: int = field(default=logging.DEBUG, metadata={"description": "The log level for the server and logger."})
+    log_queue_size: int = field(default=0, metadata={"description": "Most log records queued for the background log writer. 0 prints each record on the calling thread"})
+    log_queue_full_policy: str = field(default="drop", metadata={"description": "What to do with a log record when the log queue is full: \"drop\" it and count it, or \"block\" until there is room"})
+    transport: str = field(default="stdio", metadata={"description": "How clients connect. \"stdio\" serves one client over stdin and stdout; \"streamable-http\" or \"sse\" serve many at host:port"})
     host: str = field(default="0.0.0.0", metadata={"description": "Host for the server"})
     port: int = field(default=8000, metadata={"description": "Port for the server"})
+    workers: int = field(default=1, metadata={"description": "Number of processes serving streamable-http clients from one socket, forked after the tools are loaded. Above 1, HTTP sessions are stateless"})
     reload: bool = field(default=True, metadata={"description": "Enable auto-reload"})
+    tool_reload_interval: float = field(default=1.0, metadata={"description": "Seconds between checks for changed tool source files when reload is enabled"})
     tool_timeout: int = field(default=60, metadata={"description": "Timeout for tool execution in seconds"})
+    cli_output_limit: int = field(default=19_000, metadata={"description": "Most characters of a CLI tool's output to keep. The rest is discarded as it is read"})
+    terminate_cli_tool_at_output_limit: bool = field(default=False, metadata={"description": "Terminate a CLI tool once its output reaches cli_output_limit"})
+    cli_progress_interval: float = field(default=0.5, metadata={"description": "Minimum seconds between progress notifications with a CLI tool's output"})
+    result_token_budget: int = field(default=5_000, metadata={"description": "Most tokens of a function tool's result to return. Larger results are truncated and kept in the result store"})
+    result_token_encoding: str = field(default="cl100k_base", metadata={"description": "tiktoken encoding used to count result tokens. Tokens are estimated from characters without tiktoken"})
+    result_char_limit: int = field(default=19_000, metadata={"description": "Most characters of any one string in a function tool's result to return, whatever its token count"})
+    result_store_max_entries: int = field(default=100, metadata={"description": "Most truncated tool results kept in full on disk, to be paged through with get_tool_result_page"})
+    result_store_max_bytes: int = field(default=256 * 1024 * 1024, metadata={"description": "Most bytes of truncated tool results kept on disk. The least recently read are removed first"})
+    result_store_ttl: float = field(default=3600.0, metadata={"description": "Seconds a truncated tool result is kept on disk"})
+    metrics_prometheus_path: str = field(default="", metadata={"description": "File to write per-tool metrics to in Prometheus text format, e.g. for node_exporter's textfile collector. Empty disables the export"})
+    metrics_export_interval: float = field(default=15.0, metadata={"description": "Seconds between writes of the Prometheus metrics file"})
+    trace_path: str = field(default="", metadata={"description": "File to append tool call tracing spans to as JSON lines. Empty disables tracing"})
+    stdio_write_chunk_size: int = field(default=64 * 1024, metadata={"description": "Most bytes of a response written to stdout at once"})
+    max_concurrent_tool_calls: int = field(default=32, metadata={"description": "Most tool calls run at once, across every client. The rest wait their turn. 0 is unlimited"})
+    default_tool_concurrency: int = field(default=0, metadata={"description": "Most calls to any one tool run at once, unless set in tool_concurrency_limits. 0 is unlimited"})
+    tool_concurrency_limits: dict[str, int] = field(default_factory=dict, metadata={"description": "Most calls to a tool run at once, by tool name"})
+    tool_cache_max_entries: int = field(default=256, metadata={"description": "Most results of @memoize tools kept in memory. The least recently used are dropped first"})
+    tool_cache_max_disk_entries: int = field(default=1024, metadata={"description": "Most results of @memoize(persist=True) tools kept on disk"})
+    coalesce_tool_calls: bool = field(default=True, metadata={"description": "Let identical tool calls that are in flight at the same time share one execution"})
+    cli_workers: bool = field(default=False, metadata={"description": "Run `python -m` CLI tools in persistent worker processes instead of a new shell and interpreter per call"})
+    cli_worker_max_calls: int = field(default=100, metadata={"description": "Number of calls after which a CLI tool's worker process is replaced"})
+    tool_process_pool_workers: int = field(default=2, metadata={"description": "Number of worker processes for each tool whose module sets RUN_IN_PROCESS = True"})
+    tool_thread_pool_workers: int = field(default=8, metadata={"description": "Number of threads synchronous tools run on, off the event loop. 0 runs them on the event loop"})
+    dependency_install_workers: int = field(default=0, metadata={"description": "Install changed tool requirements in the background with this many workers. 0 installs them before startup"})
     load_from_paths_csv: bool = field(default=False, metadata={"description": "Load from paths CSV"})
     update_readme_when_settings_are_changed: bool = field(default=False, metadata={"description": "Update examples in README when settings are changed"})
+    lazy_tool_registration: bool = field(default=False, metadata={"description": "Register function tools from their source without importing them until first call"})
+    use_tool_manifest: bool = field(default=False, metadata={"description": "Register unchanged function tools from the cached tool manifest instead of their source"})
+    warm_up_tool_search: bool = field(default=True, metadata={"description": "Load the tool search model and embed the tool corpus in the background at startup"})
+    tool_search_backend: str = field(default="exact", metadata={"description": "Nearest-neighbour backend for tool search, either 'exact' or 'ivf'"})
+    tool_search_ivf_lists: int = field(default=0, metadata={"description": "Number of clusters for the 'ivf' backend. 0 picks one based on the number of tools"})
+    tool_search_ivf_probes: int = field(default=8, metadata={"description": "Number of clusters the 'ivf' backend scans per query"})
+    tool_search_embedding_dtype: str = field(default="float32", metadata={"description": "Storage dtype of the tool search embeddings: 'float32', 'float16' or 'int8'"})
     search_dir: Path = field(default_factory=lambda: Path(__file__).parent, metadata={"description": "Directory to search for tools"})
 
     @property
@@ -85,12 +277,13 @@ class Configs:
 
     @cached_property
     def REQUIREMENTS_FILE_PATHS(self) -> list[Path]:
-        """List of paths for requirements.txt files."""
-        _paths = [
-            path for path in self.ROOT_DIR.glob("**/requirements.txt")
-            if path.is_file() and path.name == "requirements.txt" and path.exists()
-        ]
-        return _paths
+        """List of paths for requirements.txt files.
+
+        Virtual environments, VCS and cache directories, tests, logs and anything matched by a
+        .gitignore are skipped. The result is cached in .cache and reused until one of the
+        searched directories or .gitignore files changes.
+        """
+        return _find_requirements_files(self.ROOT_DIR, self.ROOT_DIR / ".cache" / "requirements_files.json")
 
     def __getitem__(self, key: str) -> str:
         """Get the value of a configuration setting by its key."""
@@ -1,7 +1,11 @@
+import atexit
 from datetime import datetime
 import logging
 from logging.handlers import RotatingFileHandler
 import os
+import queue
+import threading
+import time
 import traceback
 import sys
 from typing import Any, Annotated as Ann, Callable
@@ -29,6 +33,13 @@ def mcp_print(input: Any) -> None:
     """
     print(input, file=sys.stderr)
 
+def _resolve_callable_message(record: logging.LogRecord) -> bool:
+    """Logger filter that builds a callable log message. Filters only run for enabled levels."""
+    if callable(record.msg):
+        record.msg = record.msg()
+    return True
+
+
 @validate_call
 def get_logger(name: str,
                 log_file_name: str = 'app.log',
@@ -38,6 +49,9 @@ def get_logger(name: str,
                 ) -> logging.Logger:
     """Sets up a logger with both file and console handlers.
 
+    Messages can be formatted lazily, so disabled levels cost nothing: pass %-style args,
+    as in `logger.debug("Result: %s", result)`, or a callable that returns the message.
+
     Args:
         name: Name of the logger.
         log_file_name: Name of the log file. Defaults to 'app.log'.
@@ -78,6 +92,8 @@ def get_logger(name: str,
     # Add handlers to the logger
     logger.addHandler(console_handler)
     logger.addHandler(file_handler)
+    if _resolve_callable_message not in logger.filters:
+        logger.addFilter(_resolve_callable_message)
 
     return logger
 
@@ -88,8 +104,20 @@ class McpLogger:
     Since MCP servers log to a specific log file, 
         and since it relies on the print command to log messages, 
         we need to create a custom logger to enforce formatting.
+
+    If `configs.log_queue_size` is above 0, logging calls only put a record on a bounded queue.
+    A background thread formats the queued records in batches and prints each batch at once.
+    When the queue is full, records are dropped and counted in `dropped`, or the caller waits
+    for room if `configs.log_queue_full_policy` is "block". Call `flush` to wait for queued
+    records to be printed. They are also flushed when the interpreter exits.
+
+    Messages are formatted lazily, only for enabled levels and on the writer thread if there is one.
+    Pass %-style args, as in `mcp_logger.debug("Result: %s", result)`, or a callable that returns the message.
+    Don't mutate queued args afterwards, since they may be formatted later.
     """
 
+    _MAX_BATCH = 256
+
     def __init__(self, 
                 configs: Configs = None, 
                 resources: dict[str, Callable] = None
@@ -104,6 +132,15 @@ class McpLogger:
             except KeyError:
                 pass # Default to the built-in print function
 
+        self.queue_size: int = self.configs.log_queue_size
+        self.block_when_full: bool = self.configs.log_queue_full_policy == "block"
+        self.dropped: int = 0
+        self._queue: queue.Queue | None = queue.Queue(maxsize=self.queue_size) if self.queue_size > 0 else None
+        self._writer: threading.Thread | None = None
+        self._writer_lock = threading.Lock()
+        self._last_second: int = -1
+        self._last_timestamp: str = ""
+
     def _print(self, message: str) -> None:
         """Prints a message to the console and log file.
 
@@ -112,43 +149,122 @@ class McpLogger:
         """
         print(message) # , file=sys.stderr
 
-    def _format_message(self, level_name: str, message: str) -> str:
-        """Formats the log message with a timestamp and level name."""
-        time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        return f"{time} [mcp-logger] [{level_name}] {message}"
+    def _timestamp(self, created: float) -> str:
+        """Format a record's time, reusing the last result within the same second."""
+        second = int(created)
+        if second != self._last_second:
+            self._last_timestamp = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+            self._last_second = second
+        return self._last_timestamp
 
-    def info(self, message: str):
+    def _format_message(self, level_name: str, message: str, created: float | None = None) -> str:
+        """Formats the log message with a timestamp and level name."""
+        timestamp = self._timestamp(time.time() if created is None else created)
+        return f"{timestamp} [mcp-logger] [{level_name}] {message}"
+
+    @staticmethod
+    def _render(message: str | Callable[[], str], args: tuple) -> str:
+        """Build a record's message, calling it if it is a callable and applying any %-style args."""
+        try:
+            if callable(message):
+                message = message()
+            return str(message) % args if args else str(message)
+        except Exception as e:
+            return f"{message!r} {args!r} (could not format log message: {e})"
+
+    def _log(self, level_name: str, message: str | Callable[[], str], args: tuple = ()) -> None:
+        if self._queue is None:
+            self._print(self._format_message(level_name, self._render(message, args)))
+            return
+        if self._writer is None:
+            self._start_writer()
+        record = (time.time(), level_name, message, args)
+        if self.block_when_full:
+            self._queue.put(record)
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start_writer(self) -> None:
+        with self._writer_lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._write_records, name="mcp_logger_writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.flush)
+
+    def _write_records(self) -> None:
+        """Print queued records in batches, noting any records dropped since the last batch."""
+        reported_dropped = 0
+        while True:
+            records = [self._queue.get()]
+            while len(records) < self._MAX_BATCH:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [
+                self._format_message(level_name, self._render(message, args), created)
+                for created, level_name, message, args in records
+            ]
+            dropped = self.dropped
+            if dropped > reported_dropped:
+                lines.append(self._format_message("WARNING", f"{dropped - reported_dropped} log records dropped because the log queue was full."))
+                reported_dropped = dropped
+            try:
+                self._print("\n".join(lines))
+            except Exception:
+                pass # Nowhere left to report it.
+            for _ in records:
+                self._queue.task_done()
+
+    def reset_after_fork(self) -> None:
+        """Start with an empty queue in a forked child process, whose writer thread is started on the next record."""
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        if self._queue is not None:
+            self._queue = queue.Queue(maxsize=self.queue_size)
+
+    def flush(self) -> None:
+        """Wait until every queued record has been printed."""
+        if self._queue is not None and self._writer is not None:
+            self._queue.join()
+
+    def info(self, message: str | Callable[[], str], *args: Any):
         """Logs an info message."""
         if self.log_level <= logging.INFO:
-            self._print(self._format_message("INFO", message))
+            self._log("INFO", message, args)
 
-    def warning(self, message: str):
+    def warning(self, message: str | Callable[[], str], *args: Any):
         """Logs a warning message."""
         if self.log_level <= logging.WARNING:
-            self._print(self._format_message("WARNING", message))
+            self._log("WARNING", message, args)
 
-    def error(self, message: str):
+    def error(self, message: str | Callable[[], str], *args: Any):
         """Logs an error message."""
         if self.log_level <= logging.ERROR:
-            self._print(self._format_message("ERROR", message))
+            self._log("ERROR", message, args)
 
-    def debug(self, message: str):
+    def debug(self, message: str | Callable[[], str], *args: Any):
         """Logs a debug message."""
         if self.log_level <= logging.DEBUG:
-            self._print(self._format_message("DEBUG", message))
+            self._log("DEBUG", message, args)
 
-    def critical(self, message: str):
+    def critical(self, message: str | Callable[[], str], *args: Any):
         """Logs a critical message."""
         if self.log_level <= logging.CRITICAL:
-            self._print(self._format_message("CRITICAL", message))
+            self._log("CRITICAL", message, args)
 
-    def exception(self, message: str, exc_info: bool = True):
+    def exception(self, message: str | Callable[[], str], *args: Any, exc_info: bool = True):
         """Logs an exception message."""
         if self.log_level <= logging.ERROR:
-            error_message = message
+            error_message = self._render(message, args)
             if exc_info:
+                # The traceback is only available on the calling thread, so it is formatted here.
                 error_message += f"\n{traceback.format_exc()}"
-            self._print(self._format_message("EXCEPTION", error_message))
+            self._log("EXCEPTION", error_message)
     
     def __call__(self, message: str) -> None:
         """
@@ -4,17 +4,31 @@
 An MCP server for serving CLI programs and utility functions to LLMs.
 """
 from __future__ import annotations
+import functools
+from pathlib import Path
 import sys
 
 try:
+    import anyio
     from mcp.server.fastmcp import FastMCP
 except ImportError:
     raise ImportError("mcp is not installed. Please install it with `pip install mcp`.")
 
 from configs import configs
 from logger import mcp_logger
-from server_utils.install_tool_dependencies_to_shared_venv import install_tool_dependencies_to_shared_venv
+from server_utils._run_tool import result_shaper, result_store
+from server_utils._run_tool._cli_workers import cli_workers
+from server_utils.install_tool_dependencies_to_shared_venv import install_tool_dependencies_to_shared_venv, dependency_installer
 from server_utils.server_.get_functions_tools_from_files import get_function_tools_from_files
+from server_utils.server_.prefork_server import prefork_server
+from server_utils.server_.tool_metrics import tool_metrics
+from server_utils.server_.stdio_transport import run_stdio_async
+from server_utils.server_.tool_process_pool import tool_process_pool
+from server_utils.server_.tool_registry import tool_registry
+from server_utils.server_.tool_scheduler import tool_scheduler
+from server_utils.server_.tool_thread_pool import tool_thread_pool
+from server_utils.server_.tool_tracing import JsonlSink, tool_tracer
+from server_utils.server_.warm_up_tool_search import reset_tool_search_after_fork, warm_up_tool_search
 
 
 class TotalTools:
@@ -33,18 +47,67 @@ class TotalTools:
 total_tools = TotalTools()
 
 
+def _worker_path(path: str, worker: int) -> Path:
+    """A per-worker variant of a file path, e.g. metrics.prom -> metrics.worker1.prom."""
+    path = Path(path)
+    return path.with_name(f"{path.stem}.worker{worker}{path.suffix}")
+
+
+def _start_background_services(worker: int | None = None) -> None:
+    """Start the threads that watch tool sources, warm up tool search and export metrics.
+
+    With several server workers, they are started in each worker after it is forked, since
+    threads don't survive a fork. Each worker then writes its own metrics and trace files.
+    Tool search is warmed up in the parent before forking instead, so the workers share its
+    model and memory-mapped index rather than each loading and writing their own.
+    """
+    if worker is not None:
+        # Forget the parent's threads and worker processes; they are started again when needed.
+        for component in (mcp_logger, tool_registry, tool_thread_pool, tool_process_pool, cli_workers):
+            component.reset_after_fork()
+        reset_tool_search_after_fork()
+        tool_metrics.labels["worker"] = str(worker)
+        if configs.trace_path:
+            tool_tracer.close()
+            tool_tracer.add_sink(JsonlSink(_worker_path(configs.trace_path, worker)))
+
+    # Export per-tool metrics for Prometheus if configured.
+    if configs.metrics_prometheus_path:
+        path = configs.metrics_prometheus_path if worker is None else _worker_path(configs.metrics_prometheus_path, worker)
+        tool_metrics.start_exporting(path, configs.metrics_export_interval)
+
+    # Reload tool modules when their source changes, instead of on every call.
+    if configs.reload:
+        tool_registry.start_watching(configs.tool_reload_interval)
+
+    # Load the tool search model and embed the tool corpus while the server starts serving.
+    if configs.warm_up_tool_search and worker is None:
+        mcp_logger.info("Warming up tool search in the background...")
+        warm_up_tool_search()
+
+
 def main():
     mcp_logger.info("Starting Claude's Toolbox MCP server...")
 
-    # Initialize FastMCP server
-    mcp = FastMCP("claudes_toolbox")
+    # Serve streamable-http clients from several forked processes if more than one worker is configured.
+    prefork = configs.workers > 1
+    if prefork and configs.transport != "streamable-http":
+        raise ValueError(f"Multiple workers need the 'streamable-http' transport, not '{configs.transport}'.")
+
+    # Initialize FastMCP server. A client's requests can reach any worker, so workers can't keep sessions.
+    mcp = FastMCP("claudes_toolbox", host=configs.host, port=configs.port, stateless_http=prefork)
 
     mcp_logger.info("API instantiated. Installing shared venv requirements...")
 
     # Load dependencies
-    install_tool_dependencies_to_shared_venv(configs.REQUIREMENTS_FILE_PATHS)
-
-    mcp_logger.info("Shared venv requirements installed.")
+    # Workers are forked once the tools are loaded, so don't leave installs running on threads a fork would lose.
+    if configs.dependency_install_workers > 0 and not prefork:
+        # Tools wait for their own requirements when they're first imported.
+        dependency_installer.start(configs.REQUIREMENTS_FILE_PATHS, max_workers=configs.dependency_install_workers)
+        mcp_logger.info("Shared venv requirements are installing in the background.")
+    else:
+        install_tool_dependencies_to_shared_venv(configs.REQUIREMENTS_FILE_PATHS)
+        mcp_logger.info("Shared venv requirements installed.")
     mcp_logger.info("Registering MCP tools from tools/functions directory...")
 
     # Register function tools from files with the server
@@ -52,6 +115,23 @@ def main():
 
     mcp_logger.info("Function tools registered.")
 
+    # Let clients read the full results of tool calls whose output was truncated.
+    result_store.register_resource(mcp)
+
+    # Expose per-tool latency, output size and error metrics.
+    tool_metrics.register_resource(mcp)
+
+    # Fit every tool's result to the token budget, keeping oversized results to be paged through.
+    # Applied first, so it runs inside the tracing and scheduling of each call.
+    result_shaper.shape_mcp(mcp)
+
+    # Time each step of a tool call as a span, if tracing is enabled.
+    tool_tracer.trace_mcp(mcp)
+
+    # Cap concurrent tool calls, overall and per tool, and queue the rest fairly between clients.
+    # Applied after tracing, so time spent queued isn't counted as argument validation.
+    tool_scheduler.schedule_mcp(mcp)
+
     # Register standalone CLI tools with the server
     # cli_tools = CliTools(configs, resources={
     #     "run_tool": run_tool,
@@ -63,9 +143,33 @@ def main():
 
     #mcp = register_database_tools(mcp)
 
+    if prefork:
+        # Each worker starts its own background threads and worker processes after it is forked.
+        tool_process_pool.shutdown()
+        # Build the tool search index once, before forking, so the workers only memory-map it.
+        if configs.warm_up_tool_search:
+            mcp_logger.info("Warming up tool search before starting the server workers...")
+            warm_up = warm_up_tool_search()
+            if warm_up is not None:
+                # A failure is logged, and each worker then loads tool search on its first search.
+                warm_up.exception()
+        mcp_logger.info("Claude's Toolbox MCP server started")
+        prefork_server.serve(mcp, on_fork=_start_background_services)
+        return
+
+    _start_background_services()
+
     mcp_logger.info("Claude's Toolbox MCP server started")
 
-    mcp.run(transport="stdio")
+    match configs.transport:
+        case "stdio":
+            # Serve over stdio, serializing and writing large responses off the event loop.
+            anyio.run(functools.partial(run_stdio_async, mcp))
+        case "streamable-http" | "sse":
+            mcp_logger.info(f"Serving {configs.transport} clients at http://{configs.host}:{configs.port}")
+            mcp.run(transport=configs.transport)
+        case _:
+            raise ValueError(f"Unknown transport '{configs.transport}'. Use 'stdio', 'streamable-http' or 'sse'.")
 
 
 if __name__ == "__main__":
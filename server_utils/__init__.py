@@ -1,21 +1,61 @@
 
 # Import core utility functions
-from .install_tool_dependencies_to_shared_venv import install_tool_dependencies_to_shared_venv
+from .install_tool_dependencies_to_shared_venv import install_tool_dependencies_to_shared_venv, dependency_installer, DependencyInstaller
 from .mcp_print import mcp_print
 
 # Import from readme subdirectory
 
 # Import from run_tool subdirectory
-from server_utils._run_tool import run_tool, CallToolResultType, return_results, return_tool_call_results
+from server_utils._run_tool import run_tool, arun_tool, arun_cli_tool, CallToolResultType, return_results, return_tool_call_results
+from server_utils._run_tool import result_store, ResultStore, result_shaper, ResultShaper
 from server_utils.server_.get_functions_tools_from_files import get_function_tools_from_files
+from server_utils.server_.warm_up_tool_search import warm_up_tool_search
+from server_utils.server_.tool_registry import tool_registry, ToolRegistry
+from server_utils.server_.tool_thread_pool import tool_thread_pool, ToolThreadPool
+from server_utils.server_.tool_process_pool import tool_process_pool, ToolProcessPool
+from server_utils.server_.tool_cache import tool_cache, ToolCache, memoize
+from server_utils.server_.tool_single_flight import tool_single_flight, ToolSingleFlight
+from server_utils.server_.tool_metrics import tool_metrics, ToolMetrics
+from server_utils.server_.tool_tracing import tool_tracer, ToolTracer, JsonlSink
+from server_utils.server_.tool_scheduler import tool_scheduler, ToolScheduler
+from server_utils.server_.prefork_server import prefork_server, PreforkServer
 
 __all__ = [
     "install_tool_dependencies_to_shared_venv",
+    "dependency_installer",
+    "DependencyInstaller",
     "get_function_tools_from_files",
+    "warm_up_tool_search",
+    "tool_registry",
+    "ToolRegistry",
+    "tool_thread_pool",
+    "ToolThreadPool",
+    "tool_process_pool",
+    "ToolProcessPool",
+    "tool_cache",
+    "ToolCache",
+    "memoize",
+    "tool_single_flight",
+    "ToolSingleFlight",
+    "tool_metrics",
+    "ToolMetrics",
+    "tool_tracer",
+    "ToolTracer",
+    "JsonlSink",
+    "tool_scheduler",
+    "ToolScheduler",
+    "prefork_server",
+    "PreforkServer",
     "mcp_print",
     # Run tool utilities
     "run_tool",
+    "arun_tool",
+    "arun_cli_tool",
     "return_tool_call_results",
     "CallToolResultType",
-    "return_results"
+    "return_results",
+    "result_store",
+    "ResultStore",
+    "result_shaper",
+    "ResultShaper",
 ]
@@ -1,9 +1,19 @@
-from ._run_tool import run_tool, return_results
+from ._run_tool import run_tool, arun_tool, arun_cli_tool, return_results
+from ._result_store import result_store, ResultStore, ResultPage
+from ._shape_result import result_shaper, ResultShaper, ShapedResult
 from ._return_tool_call_results import return_tool_call_results, CallToolResultType
 
 __all__ = [
     "run_tool", 
+    "arun_tool",
+    "arun_cli_tool",
     "return_tool_call_results", 
     "CallToolResultType", 
-    "return_results"
+    "return_results",
+    "result_store",
+    "ResultStore",
+    "ResultPage",
+    "result_shaper",
+    "ResultShaper",
+    "ShapedResult",
 ]
@@ -0,0 +1,127 @@
+"""
+Long-lived worker that runs one CLI tool's `python -m <target> ...` invocations in-process.
+
+Started by `CliWorkers` with the venv's Python, as a script, so it imports nothing from the server.
+Reads one JSON request per line from stdin:
+{"target": ..., "argv": [...], "cwd": ..., "max_chars": ..., "spill_path": ..., "terminate_at_limit": ...}.
+Writes one JSON response per line:
+{"returncode": ..., "stdout": ..., "stderr": ..., "truncated": ..., "terminated_at_limit": ...}.
+Only the first `max_chars` characters of each stream are kept. If stdout goes past them,
+all of it is written to `spill_path` instead, if one is given, or the tool is stopped
+if `terminate_at_limit` is set. Modules the tool imports stay imported between requests.
+"""
+import contextlib
+import io
+import json
+import os
+from pathlib import Path
+import runpy
+import sys
+import traceback
+
+
+class _OutputLimitReached(BaseException):
+    """Raised in a tool when its output reaches the limit and it should be stopped."""
+
+
+class _CappedOutput(io.TextIOBase):
+    """Keeps the first `max_chars` characters written, and writes everything to a spill file past them."""
+
+    def __init__(self, max_chars: int, spill_path: str | None = None, stop_at_limit: bool = False) -> None:
+        self._max_chars = max_chars
+        self._spill_path = spill_path
+        self._stop_at_limit = stop_at_limit
+        self._parts: list[str] = []
+        self._spill = None
+        self.chars = 0
+        self.truncated = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if self.truncated:
+            if self._spill is not None:
+                self._spill.write(text)
+            return len(text)
+        if self.chars + len(text) <= self._max_chars:
+            self._parts.append(text)
+            self.chars += len(text)
+            return len(text)
+
+        if self._spill_path is not None:
+            self._spill = open(self._spill_path, "w", encoding="utf-8", newline="")
+            self._spill.write("".join(self._parts) + text)
+        self._parts.append(text[:self._max_chars - self.chars])
+        self.chars = self._max_chars
+        self.truncated = True
+        if self._stop_at_limit:
+            raise _OutputLimitReached()
+        return len(text)
+
+    def getvalue(self) -> str:
+        if self._spill is not None:
+            self._spill.close()
+        return "".join(self._parts)
+
+
+def _run(target: str,
+         argv: list[str],
+         cwd: str,
+         max_chars: int,
+         spill_path: str | None = None,
+         terminate_at_limit: bool = False
+         ) -> dict:
+    stdout = _CappedOutput(max_chars, spill_path, stop_at_limit=terminate_at_limit)
+    stderr = _CappedOutput(max_chars)
+    returncode = 0
+    terminated_at_limit = False
+    os.chdir(cwd)
+    sys.argv = [target, *argv]
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            # Like `python -m <target>`, but also accept a path to a package directory or script.
+            if Path(target).exists():
+                runpy.run_path(target, run_name="__main__")
+            else:
+                runpy.run_module(target, run_name="__main__", alter_sys=True)
+        except _OutputLimitReached:
+            terminated_at_limit = True
+        except SystemExit as e:
+            if e.code is None:
+                returncode = 0
+            elif isinstance(e.code, int):
+                returncode = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                returncode = 1
+        except BaseException:
+            traceback.print_exc()
+            returncode = 1
+    return {
+        "returncode": returncode,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "truncated": stdout.truncated,
+        "terminated_at_limit": terminated_at_limit,
+    }
+
+
+def main() -> None:
+    # Keep the real stdout for responses, and send anything written straight to fd 1 to stderr instead.
+    responses = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    sys.stdout = io.TextIOWrapper(os.fdopen(1, "wb", closefd=False), encoding="utf-8", line_buffering=True)
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        response = _run(
+            request["target"], request["argv"], request["cwd"], request["max_chars"],
+            spill_path=request.get("spill_path"), terminate_at_limit=request.get("terminate_at_limit", False),
+        )
+        responses.write(json.dumps(response) + "\n")
+        responses.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+from pathlib import Path
+import queue
+import subprocess as sub
+import sys
+import tempfile
+import threading
+from typing import Callable
+
+
+from configs import configs, Configs
+from logger import mcp_logger
+from server_utils._run_tool._stream_process import StreamedProcessResult, _Spill
+
+
+_WORKER_SCRIPT = Path(__file__).parent / "_cli_worker_main.py"
+_SPILL_CHUNK_CHARS = 1 << 20
+
+
+@dataclass
+class _Worker:
+    """A running worker process for one CLI tool."""
+    process: sub.Popen
+    responses: queue.Queue
+    source_mtime_ns: int
+    calls: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # Set once the worker is stopped, for callers that were waiting on its lock.
+    stopped: bool = False
+
+
+def _read_responses(process: sub.Popen, responses: queue.Queue) -> None:
+    for line in process.stdout:
+        responses.put(line)
+    # The worker exited.
+    responses.put(None)
+
+
+class CliWorkers:
+    """
+    Persistent worker processes for CLI tools, one per tool.
+
+    Instead of spawning a shell, activating the venv and starting a fresh interpreter for
+    every `python -m <tool> ...` call, the tool's argv is sent over a pipe to a worker started
+    with the venv's Python. The worker runs the tool in-process and keeps its modules imported.
+    A worker is recycled after `configs.cli_worker_max_calls` calls and when the tool's source
+    changes, once the call it is running returns, and killed when a call exceeds `configs.tool_timeout`.
+    """
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger: logging.Logger = self.resources['logger']
+        self._workers: dict[str, _Worker] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def python(self) -> str:
+        """The venv's Python interpreter, or the server's own if there is no venv."""
+        venv_dir = self.configs.ROOT_DIR / ".venv"
+        python = venv_dir / "Scripts" / "python.exe" if os.name == "nt" else venv_dir / "bin" / "python"
+        return str(python) if python.exists() else sys.executable
+
+    @staticmethod
+    def can_run(cmd_list: list[str]) -> bool:
+        """Whether a command is a `python -m <target> ...` call a worker can run."""
+        return len(cmd_list) >= 3 and cmd_list[0] in ("python", "python3") and cmd_list[1] == "-m"
+
+    @staticmethod
+    def _source_mtime_ns(target: str) -> int:
+        """Latest mtime of the tool's Python source files, or 0 if they can't be found."""
+        path = Path(target)
+        if not path.exists():
+            # A module name, relative to the working directory.
+            path = Path(*target.split("."))
+            path = path if path.is_dir() else path.with_suffix(".py")
+        try:
+            if path.is_dir():
+                return max((file.stat().st_mtime_ns for file in path.rglob("*.py")), default=0)
+            return path.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    def _start(self, target: str) -> _Worker:
+        process = sub.Popen(
+            [self.python, str(_WORKER_SCRIPT)],
+            stdin=sub.PIPE, stdout=sub.PIPE, stderr=sub.DEVNULL, text=True, encoding="utf-8",
+        )
+        responses: queue.Queue = queue.Queue()
+        threading.Thread(target=_read_responses, args=(process, responses), name=f"cli_worker_{target}", daemon=True).start()
+        self._logger.debug(f"Started CLI worker {process.pid} for '{target}'")
+        return _Worker(process=process, responses=responses, source_mtime_ns=self._source_mtime_ns(target))
+
+    @staticmethod
+    def _kill(worker: _Worker) -> None:
+        worker.stopped = True
+        try:
+            worker.process.stdin.close()
+        except OSError:
+            pass
+        worker.process.kill()
+        worker.process.wait()
+
+    def _stop(self, target: str, worker: _Worker | None = None) -> None:
+        """Kill a target's worker. If a worker is given, only if it is still the target's current one."""
+        if worker is not None and self._workers.get(target) is not worker:
+            return
+        worker = self._workers.pop(target, None)
+        if worker is not None:
+            self._kill(worker)
+
+    def _retire(self, worker: _Worker) -> None:
+        """Kill a worker that was replaced, once the call it is running, if any, returns."""
+        with worker.lock:
+            self._kill(worker)
+
+    def _get_worker(self, target: str) -> _Worker:
+        with self._lock:
+            worker = self._workers.get(target)
+            if worker is not None:
+                if worker.process.poll() is not None:
+                    reason = "it exited"
+                elif worker.calls >= self.configs.cli_worker_max_calls:
+                    reason = f"it served {worker.calls} calls"
+                elif self._source_mtime_ns(target) != worker.source_mtime_ns:
+                    reason = "its source changed"
+                else:
+                    return worker
+                self._logger.debug(f"Recycling CLI worker for '{target}' because {reason}")
+                # Another thread may be waiting on this worker's response, so it is only killed after.
+                del self._workers[target]
+                threading.Thread(target=self._retire, args=(worker,), name=f"cli_worker_retire_{target}", daemon=True).start()
+            worker = self._workers[target] = self._start(target)
+            return worker
+
+    def run(self,
+            cmd_list: list[str],
+            max_chars: int,
+            terminate_at_limit: bool = False,
+            open_spill: Callable[[], _Spill] | None = None
+            ) -> StreamedProcessResult:
+        """Run a `python -m <target> ...` command in the target's worker.
+
+        Output is limited as with `stream_process`, but the worker keeps only the first
+        `max_chars` characters of each stream in memory and writes the rest of stdout to a
+        temporary file, which is copied to the spill once the call returns. Progress
+        isn't reported while the call runs.
+
+        Args:
+            cmd_list: The command, e.g. ['python', '-m', 'my_tool', '--flag', 'value'].
+            max_chars: The most characters of stdout, and of stderr, to keep.
+            terminate_at_limit: Stop the tool once its stdout reaches the limit.
+            open_spill: Called once if stdout exceeds the limit. All of stdout is written to what it returns.
+
+        Returns:
+            StreamedProcessResult: The exit code and the kept output.
+
+        Raises:
+            TimeoutError: If the call ran longer than `configs.tool_timeout`. The worker is killed.
+            RuntimeError: If the worker exited without responding.
+        """
+        spill_path = None
+        if open_spill is not None:
+            fd, spill_path = tempfile.mkstemp(prefix="cli_worker_", suffix=".txt")
+            os.close(fd)
+        try:
+            response = self._request(cmd_list, {
+                "max_chars": max_chars, "spill_path": spill_path, "terminate_at_limit": terminate_at_limit,
+            })
+            spill = None
+            if response["truncated"] and spill_path is not None:
+                spill = open_spill()
+                with open(spill_path, "r", encoding="utf-8", newline="") as f:
+                    for chunk in iter(lambda: f.read(_SPILL_CHUNK_CHARS), ""):
+                        spill.write(chunk)
+        finally:
+            if spill_path is not None:
+                os.remove(spill_path)
+        return StreamedProcessResult(
+            returncode=response["returncode"],
+            stdout=response["stdout"],
+            stderr=response["stderr"],
+            truncated=response["truncated"],
+            terminated_at_limit=response["terminated_at_limit"],
+            spill=spill,
+        )
+
+    def _request(self, cmd_list: list[str], options: dict) -> dict:
+        target, argv = cmd_list[2], cmd_list[3:]
+        while True:
+            worker = self._get_worker(target)
+            worker.lock.acquire()
+            if not worker.stopped:
+                break
+            # Replaced and stopped while this call waited for it.
+            worker.lock.release()
+        try:
+            worker.calls += 1
+            worker.process.stdin.write(json.dumps({"target": target, "argv": argv, "cwd": os.getcwd(), **options}) + "\n")
+            worker.process.stdin.flush()
+            try:
+                line = worker.responses.get(timeout=self.configs.tool_timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._stop(target, worker)
+                raise TimeoutError(f"CLI tool '{target}' timed out after {self.configs.tool_timeout} seconds.")
+        finally:
+            worker.lock.release()
+        if line is None:
+            with self._lock:
+                self._stop(target, worker)
+            raise RuntimeError(f"CLI worker for '{target}' exited without responding.")
+        return json.loads(line)
+
+    def reset_after_fork(self) -> None:
+        """Forget the parent's workers in a forked child process. They are started again when needed."""
+        self._workers = {}
+        self._lock = threading.Lock()
+
+    def shutdown(self) -> None:
+        """Stop every worker."""
+        with self._lock:
+            for target in list(self._workers):
+                self._stop(target)
+
+
+# Create singleton instance of CliWorkers.
+resources = {
+    'logger': mcp_logger
+}
+cli_workers = CliWorkers(configs=configs, resources=resources)
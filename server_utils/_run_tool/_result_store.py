@@ -0,0 +1,278 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import threading
+import time
+import uuid
+from typing import Any, Callable
+
+
+from mcp.server.fastmcp import FastMCP
+
+
+from configs import configs, Configs
+from logger import mcp_logger
+
+
+RESULT_URI_PREFIX = "tool-result://"
+_RESULT_ID_PATTERN = re.compile(r"[0-9a-f]{16}")
+_SKIP_CHUNK_CHARS = 1 << 20
+
+
+def serialize_result(result: Any) -> str:
+    """Serialize a full tool result: strings as is, everything else as JSON, or repr if it isn't JSON-serializable."""
+    if isinstance(result, str):
+        return result
+    try:
+        return json.dumps(result, ensure_ascii=False, default=str)
+    except (TypeError, ValueError):
+        return repr(result)
+
+
+@dataclass
+class _StoredResult:
+    path: Path
+    chars: int
+    size: int
+    ascii: bool
+    stored_at: float
+
+
+@dataclass
+class ResultPage:
+    """A page of a stored tool result."""
+    result_id: str
+    text: str
+    offset: int
+    total_chars: int
+
+    @property
+    def next_offset(self) -> int | None:
+        """The offset of the next page, or None if this is the last one."""
+        end = self.offset + len(self.text)
+        return end if end < self.total_chars else None
+
+
+class ResultWriter:
+    """Writes a result to the store incrementally. Call `close` to keep it, or `discard` to drop it."""
+
+    def __init__(self, store: "ResultStore", result_id: str, path: Path) -> None:
+        self.result_id = result_id
+        self._store = store
+        self._path = path
+        self._tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        self._file = open(self._tmp_path, "w", encoding="utf-8", newline="")
+        self.chars = 0
+        self.ascii = True
+
+    def write(self, text: str) -> None:
+        self._file.write(text)
+        self.chars += len(text)
+        self.ascii = self.ascii and text.isascii()
+
+    def close(self) -> str:
+        """Keep the written result.
+
+        Returns:
+            str: The result's ID.
+        """
+        self._file.close()
+        os.replace(self._tmp_path, self._path)
+        self._store._add(self.result_id, _StoredResult(
+            path=self._path, chars=self.chars, size=self._path.stat().st_size, ascii=self.ascii, stored_at=time.time(),
+        ))
+        return self.result_id
+
+    def discard(self) -> None:
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+class ResultStore:
+    """
+    Keeps the full results of tool calls whose output was truncated, so they can be read back in pages.
+
+    Results are written to `.cache/tool_results` as text, so they don't hold memory and are shared
+    by every server process. Results older than `configs.result_store_ttl` seconds expire, and the
+    least recently read are removed beyond `configs.result_store_max_entries` results or
+    `configs.result_store_max_bytes` bytes.
+    """
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger: logging.Logger = self.resources['logger']
+        self._dir: Path = self.configs.ROOT_DIR / ".cache" / "tool_results"
+        self._results: OrderedDict[str, _StoredResult] = OrderedDict()
+        self._bytes = 0
+        self._swept = False
+        self._lock = threading.Lock()
+
+    def writer(self) -> ResultWriter:
+        """Start writing a result to the store."""
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._sweep()
+        result_id = uuid.uuid4().hex[:16]
+        return ResultWriter(self, result_id, self._dir / f"{result_id}.txt")
+
+    def put(self, result: Any) -> str:
+        """Keep a full result.
+
+        Returns:
+            str: The result's ID.
+        """
+        writer = self.writer()
+        try:
+            writer.write(serialize_result(result))
+        except BaseException:
+            writer.discard()
+            raise
+        return writer.close()
+
+    def _add(self, result_id: str, stored: _StoredResult) -> None:
+        with self._lock:
+            if result_id in self._results:
+                self._bytes -= self._results[result_id].size
+            self._results[result_id] = stored
+            self._bytes += stored.size
+            self._evict()
+
+    def _remove(self, result_id: str) -> None:
+        stored = self._results.pop(result_id)
+        self._bytes -= stored.size
+        stored.path.unlink(missing_ok=True)
+
+    def _expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.configs.result_store_ttl
+
+    def _evict(self) -> None:
+        for result_id, stored in list(self._results.items()):
+            if self._expired(stored.stored_at):
+                self._remove(result_id)
+        while self._results and (
+            len(self._results) > self.configs.result_store_max_entries
+            or self._bytes > self.configs.result_store_max_bytes
+        ):
+            self._remove(next(iter(self._results)))
+
+    def _sweep(self) -> None:
+        """Delete expired results left on disk by earlier runs, once per process."""
+        if self._swept:
+            return
+        self._swept = True
+        for path in self._dir.glob("*.txt"):
+            try:
+                if self._expired(path.stat().st_mtime):
+                    path.unlink()
+            except OSError:
+                pass
+
+    def _lookup(self, result_id: str) -> _StoredResult:
+        """Find a stored result, including ones written by another server process.
+
+        Raises:
+            KeyError: If there is no result with this ID, or it expired or was evicted.
+        """
+        if not _RESULT_ID_PATTERN.fullmatch(result_id):
+            raise KeyError(result_id)
+        with self._lock:
+            stored = self._results.get(result_id)
+            if stored is not None:
+                if self._expired(stored.stored_at):
+                    self._remove(result_id)
+                    raise KeyError(result_id)
+                self._results.move_to_end(result_id)
+                return stored
+
+        path = self._dir / f"{result_id}.txt"
+        try:
+            stored_at = path.stat().st_mtime
+            if self._expired(stored_at):
+                raise KeyError(result_id)
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                text = f.read()
+        except OSError:
+            raise KeyError(result_id)
+        stored = _StoredResult(path=path, chars=len(text), size=path.stat().st_size, ascii=text.isascii(), stored_at=stored_at)
+        self._add(result_id, stored)
+        return stored
+
+    def get_page(self, result_id: str, offset: int = 0, limit: int | None = None) -> ResultPage:
+        """Read part of a stored result, without reading the rest of it into memory.
+
+        Args:
+            result_id: The result's ID.
+            offset: The character to start from.
+            limit: The most characters to read. Defaults to `configs.result_char_limit`.
+
+        Raises:
+            KeyError: If there is no result with this ID, or it expired or was evicted.
+            ValueError: If offset or limit is negative.
+        """
+        limit = self.configs.result_char_limit if limit is None else limit
+        if offset < 0 or limit < 0:
+            raise ValueError("offset and limit must not be negative.")
+        stored = self._lookup(result_id)
+        if offset >= stored.chars:
+            return ResultPage(result_id=result_id, text="", offset=offset, total_chars=stored.chars)
+
+        if stored.ascii:
+            # One byte per character, so seek straight to the offset.
+            with open(stored.path, "rb") as f:
+                f.seek(offset)
+                text = f.read(limit).decode("ascii")
+        else:
+            with open(stored.path, "r", encoding="utf-8", newline="") as f:
+                skipped = 0
+                while skipped < offset:
+                    skipped += len(f.read(min(_SKIP_CHUNK_CHARS, offset - skipped)))
+                text = f.read(limit)
+        return ResultPage(result_id=result_id, text=text, offset=offset, total_chars=stored.chars)
+
+    def get(self, result_id: str) -> str:
+        """Read a whole stored result.
+
+        Raises:
+            KeyError: If there is no result with this ID, or it expired or was evicted.
+        """
+        stored = self._lookup(result_id)
+        with open(stored.path, "r", encoding="utf-8", newline="") as f:
+            return f.read()
+
+    @staticmethod
+    def uri(result_id: str) -> str:
+        return f"{RESULT_URI_PREFIX}{result_id}"
+
+    def note(self, result_id: str, reason: str) -> str:
+        """A note for a truncated response, saying where to read the rest of the result."""
+        return (
+            f'[{reason} Result ID: {result_id}. Read the rest with get_tool_result_page(result_id="{result_id}", offset=..., limit=...)'
+            f" or the {self.uri(result_id)} resource.]"
+        )
+
+    def register_resource(self, mcp: FastMCP) -> None:
+        """Expose stored results as the `tool-result://{result_id}` resource template."""
+        def read_tool_result(result_id: str) -> str:
+            try:
+                return self.get(result_id)
+            except KeyError:
+                raise ValueError(f"No stored tool result with ID '{result_id}'. It may have expired.")
+
+        mcp.resource(
+            f"{RESULT_URI_PREFIX}{{result_id}}",
+            name="tool_result",
+            description="The full output of a tool call whose response was truncated.",
+            mime_type="text/plain",
+        )(read_tool_result)
+
+
+# Create singleton instance of ResultStore.
+resources = {
+    'logger': mcp_logger
+}
+result_store = ResultStore(configs=configs, resources=resources)
@@ -7,6 +7,10 @@ from mcp.types import TextContent, ErrorData
 def return_text_content(input: Any, result_str: str) -> TextContent:
     """Return a TextContent object with formatted string.
 
+    Strings are included as they are. They are already text, and the transport JSON-encodes
+    them, so quoting them with repr() would only escape every quote, backslash and newline twice.
+    Other values, such as exceptions, are included as their repr().
+
     Args:
         string (str): The input string to be included in the content.
         result_str (str): A string identifier or label to prefix the input string.
@@ -14,4 +18,5 @@ def return_text_content(input: Any, result_str: str) -> TextContent:
     Returns:
         TextContent: A TextContent object with 'text' type and formatted text.
     """
-    return TextContent(type="text", text=f"{repr(result_str)}: {repr(input)}") # NOTE we use repr to ensure special characters are handled correctly
+    text = input if isinstance(input, str) else repr(input)
+    return TextContent(type="text", text=f"{result_str}: {text}")
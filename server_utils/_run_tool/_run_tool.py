@@ -1,18 +1,35 @@
 import asyncio
-import importlib
+import functools
+import inspect
 import logging
 import os
 import shlex
 import subprocess as sub
 import sys
+import time
 import traceback
 from typing import Any, Callable
 
 
+from mcp.server.fastmcp import Context
+
+
 from configs import configs, Configs
 from logger import mcp_logger
+from server_utils._run_tool._cli_workers import cli_workers, CliWorkers
 from server_utils._run_tool._return_text_content import return_text_content
+from server_utils._run_tool._result_store import result_store, ResultStore, ResultWriter
 from server_utils._run_tool._return_tool_call_results import return_tool_call_results, CallToolResultType
+from server_utils._run_tool._shape_result import result_shaper, ResultShaper
+from server_utils._run_tool._stream_process import stream_process
+from server_utils.server_.tool_metrics import tool_metrics, ToolMetrics
+from server_utils.server_.tool_registry import tool_registry, ToolRegistry
+from server_utils.server_.tool_single_flight import tool_single_flight, ToolSingleFlight
+from server_utils.server_.tool_tracing import tool_tracer, ToolTracer
+from server_utils.server_.tool_thread_pool import tool_thread_pool, ToolThreadPool
+
+
+_MAX_OUTPUT_LENGTH = 20_000
 
 
 # Add the tools directory to the system path so we can reload tools dynamically.
@@ -29,17 +46,22 @@ class _RunTool:
         self._return_tool_call_results: Callable = self.resources['return_tool_call_results']
         self._return_text_content: Callable = self.resources['return_text_content']
         self._logger: logging.Logger = self.resources['logger']
-
-    def _reload_tool(self, func: Callable) -> None:
+        self._tool_registry: ToolRegistry = self.resources['tool_registry']
+        self._tool_thread_pool: ToolThreadPool = self.resources['tool_thread_pool']
+        self._tool_single_flight: ToolSingleFlight = self.resources['tool_single_flight']
+        self._cli_workers: CliWorkers = self.resources['cli_workers']
+        self._result_shaper: ResultShaper = self.resources['result_shaper']
+        self._result_store: ResultStore = self.resources['result_store']
+        self._tool_metrics: ToolMetrics = self.resources['tool_metrics']
+        self._tool_tracer: ToolTracer = self.resources['tool_tracer']
+
+    def _reload_tool(self, func: Callable) -> Callable:
         """
-        Reload a tool module before running it.
+        Get the latest version of a tool before running it.
+        The tool's module is only reloaded if its source file changed since it was last loaded.
         This allows for dynamic updates to the tool without restarting the application.
         """
-        # Reload the module to ensure we have the latest version
-        module_name = func.__module__
-        if module_name in sys.modules:
-            self._logger.debug(f"Reloading module '{module_name}' for tool '{func.__name__}'")
-            importlib.reload(sys.modules[module_name])
+        return self._tool_registry.refresh(func)
 
     def _run_func_tool(self, func: Callable, *args, **kwargs) -> CallToolResultType:
         """Run a function tool with the given function/coroutine and arguments.
@@ -57,36 +79,78 @@ class _RunTool:
             CallToolResultType (BaseModel): The result of the function execution wrapped in the 
                 expected result type. Contains either the function output
                 or exception information if execution failed.
-                Large outputs (>=20,000 chars) are truncated to 19,000 characters with ellipsis
+                Outputs over `configs.result_token_budget` tokens are truncated, keeping their
+                structure, and the full result is kept as a tool-result:// resource.
         """
         try:
-            # Reload the tool module to ensure we have the latest version
-            self._reload_tool(func)
-            if asyncio.iscoroutinefunction(func):
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    # If the event loop is already running, use asyncio.run_coroutine_threadsafe
-                    future = asyncio.run_coroutine_threadsafe(func(*args, **kwargs), loop)
-                    result = future.result()
+            # Make sure we have the latest version of the tool
+            with self._tool_tracer.span("reload"):
+                func = self._reload_tool(func)
+            instrumented = self._tool_metrics.instrument(func.__name__, func)
+            with self._tool_tracer.span("execute", tool=func.__name__):
+                if asyncio.iscoroutinefunction(func):
+                    try:
+                        asyncio.get_running_loop()
+                    except RuntimeError:
+                        # No event loop is running in this thread.
+                        result = asyncio.run(instrumented(*args, **kwargs))
+                    else:
+                        # Called from a coroutine. Blocking this thread on its own running loop would deadlock,
+                        # so run the coroutine on the tool thread pool's loop. Use `arun_tool` to await it instead.
+                        result = self._tool_thread_pool.run_coroutine(instrumented(*args, **kwargs))
                 else:
-                    # If the event loop is not running, use asyncio.run
-                    result = asyncio.run(func(*args, **kwargs))
-            else:
-                result = func(*args, **kwargs)
+                    result = instrumented(*args, **kwargs)
+            return self._func_tool_result(func, result)
 
-            result_string = f"\n'{func.__qualname__}' output: {repr(result)}"
-            mcp_logger.debug(f"Function tool '{func.__name__}' executed successfully with result: {result_string}")
+        except Exception as e:
+            mcp_logger.exception(f"Exception occurred while running function tool '{func.__name__}': {e}\n{traceback.format_exc()}")
+            return self.result(e)
 
-            # Truncate the output string to 19,000 if it exceeds 20,000 characters
-            if len(result_string) >= 20000:
-                result_string = f"\nTruncated '{func.__qualname__}' output (first 19,000 characters): {result[:19000]}..."
+    async def _arun_func_tool(self, func: Callable, *args, **kwargs) -> CallToolResultType:
+        """Run a function tool from a running event loop without blocking it.
 
-            return self.result(result_string)
+        Coroutine functions are awaited directly. Synchronous functions are run on the
+        tool thread pool, so other requests are served while they run. Identical calls
+        that are already running are joined instead of run again.
+
+        Args:
+            func: The function or coroutine to execute as a tool.
+            *args: Positional arguments to pass to the function.
+            **kwargs: Keyword arguments to pass to the function.
+
+        Returns:
+            CallToolResultType (BaseModel): The result of the function execution, as with `_run_func_tool`.
+        """
+        try:
+            # Make sure we have the latest version of the tool
+            with self._tool_tracer.span("reload"):
+                func = self._reload_tool(func)
+            name = f"{func.__module__}.{func.__qualname__}"
+            instrumented = self._tool_metrics.instrument(func.__name__, func)
+            with self._tool_tracer.span("execute", tool=func.__name__):
+                if asyncio.iscoroutinefunction(func):
+                    result = await self._tool_single_flight.run(name, instrumented, *args, **kwargs)
+                else:
+                    result = await self._tool_single_flight.run(name, functools.partial(self._tool_thread_pool.run, instrumented), *args, **kwargs)
+            return self._func_tool_result(func, result)
 
         except Exception as e:
             mcp_logger.exception(f"Exception occurred while running function tool '{func.__name__}': {e}\n{traceback.format_exc()}")
             return self.result(e)
 
+    def _func_tool_result(self, func: Callable, result: Any) -> CallToolResultType:
+        """Format a function tool's return value, truncating outputs over the token budget."""
+        with self._tool_tracer.span("truncate"):
+            shaped = self._result_shaper.shape(result)
+        if shaped.truncated:
+            self._tool_metrics.record_truncation(func.__name__)
+            result_string = f"\nTruncated '{func.__qualname__}' output: {shaped.text}\n{self._result_shaper.truncation_note(shaped)}"
+        else:
+            result_string = f"\n'{func.__qualname__}' output: {shaped.text}"
+        mcp_logger.debug("Function tool '%s' executed successfully with result: %s", func.__name__, result_string)
+        # Already fit to the token budget, with the full result stored by the shaper, so it isn't cut again.
+        return self._format_result(result_string)
+
 
     def result(self, result: Any) -> CallToolResultType:
         """
@@ -100,7 +164,11 @@ class _RunTool:
             result (Any): The result of the tool call execution. Can be:
                 - A CalledProcessError for failure results from external CLI tools.
                 - An Exception for general errors from function-based tools.
-                - A string for successful results
+                - A string for successful results. Strings of 20,000 characters or more are
+                  truncated to `configs.result_char_limit` characters, and kept in full in the
+                  result store, so the rest can be read with `get_tool_result_page`.
+                  Function tools' results are fit to the token budget instead, and CLI output
+                  already cut to `configs.cli_output_limit` and stored isn't cut again.
                 - Any other types are treated as errors.
 
         Returns:
@@ -109,8 +177,16 @@ class _RunTool:
                 - Error flag indicating success (False) or failure (True)
                 - Appropriate logging based on configured log level
         """
-        if self.configs.log_level == 10:
-            mcp_logger.debug(f"Tool call result: {result}")
+        if isinstance(result, str) and len(result) >= _MAX_OUTPUT_LENGTH:
+            with self._tool_tracer.span("truncate"):
+                result_id = self._result_store.put(result)
+                reason = f"Output truncated to the first {self.configs.result_char_limit:,} of {len(result):,} characters."
+                result = f"{result[:self.configs.result_char_limit]}...\n{self._result_store.note(result_id, reason)}"
+        return self._format_result(result)
+
+    def _format_result(self, result: Any) -> CallToolResultType:
+        """Turn a tool call's result into a CallToolResultType as it is, without truncating it."""
+        mcp_logger.debug("Tool call result: %s", result)
 
         error = True # Assume error by default.
         msg = ""
@@ -127,47 +203,119 @@ class _RunTool:
                 # Defaults to error, since we shouldn't get unexpected types.
                 msg = f"Unexpected Result: {type(result).__name__}"
 
-        content = self._return_text_content(result, msg)
+        with self._tool_tracer.span("serialize"):
+            content = self._return_text_content(result, msg)
         return self._return_tool_call_results(content, error)
 
 
-    def _run_cli_tool(self, cmd_list: list[str], func_name: str) -> CallToolResultType:
+    def _run_cli_tool(self,
+                      cmd_list: list[str],
+                      func_name: str,
+                      progress: Callable[[int, str], None] | None = None
+                      ) -> CallToolResultType:
+        """
+        Run a command line tool, recording its wall time, output size and failure in the tool metrics.
+
+        Args:
+            cmd_list: The command to run.
+            func_name: The name of the command line tool that called this.
+            progress: Called with the number of output characters so far and the newest output, as it arrives.
+
+        Returns:
+            A CallToolResultType object containing the result of the command.
+        """
+        start = time.perf_counter()
+        result = self._execute_cli_tool(cmd_list, func_name, progress)
+        output_bytes = sum(len(content.text.encode("utf-8")) for content in result.content if hasattr(content, "text"))
+        self._tool_metrics.observe(func_name, time.perf_counter() - start, output_bytes=output_bytes, error=result.isError)
+        return result
+
+    def _execute_cli_tool(self,
+                          cmd_list: list[str],
+                          func_name: str,
+                          progress: Callable[[int, str], None] | None = None
+                          ) -> CallToolResultType:
         """
         Run a command line tool with the given command and function name.
 
+        The tool's output is read from the pipe as it is produced. Only the first
+        `configs.cli_output_limit` characters are kept; the rest is discarded as it arrives,
+        or the tool is terminated if `configs.terminate_cli_tool_at_output_limit` is set.
+        Output past the limit is written to the result store as it arrives, so it can be
+        paged through with `get_tool_result_page` instead of running the tool again.
+        Tools run in CLI workers are limited the same way, but report no progress.
+
         Args:
             cmd_list: The command to run.
             func_name: The name of the command line tool that called this.
+            progress: Called with the number of output characters so far and the newest output, as it arrives.
 
         Returns:
             A CallToolResultType object containing the result of the command.
         """
-        mcp_logger.debug(f"Running '{func_name}' with command: {' '.join(cmd_list)}")
-
-        # Activate the virtual environment and run the command
-        match os.name:
-            case "nt":
-                # Windows
-                cmd = ["cmd", "/c", ".venv\\Scripts\\activate.bat && " + shlex.join(cmd_list)]
-            case "posix":
-                # Linux/macOS
-                cmd = ["bash", "-c", "source .venv/bin/activate && " + shlex.join(cmd_list)]
-            case _:
-                return self.result(OSError(f"Unsupported operating system: {os.name}"))
+        mcp_logger.debug(lambda: f"Running '{func_name}' with command: {' '.join(cmd_list)}")
+
+        spills: list[ResultWriter] = []
+
+        def open_spill() -> ResultWriter:
+            spills.append(self._result_store.writer())
+            return spills[-1]
+
         try:
-            result = sub.run(cmd, capture_output=True, text=True, timeout=self.timeout)
+            if self.configs.cli_workers and self._cli_workers.can_run(cmd_list):
+                # The worker limits and spills output the same way, but reports no progress.
+                cmd = cmd_list
+                with self._tool_tracer.span("execute", tool=func_name, worker=True) as span:
+                    result = self._cli_workers.run(
+                        cmd_list,
+                        max_chars=self.configs.cli_output_limit,
+                        terminate_at_limit=self.configs.terminate_cli_tool_at_output_limit,
+                        open_spill=open_spill,
+                    )
+                    span.set(returncode=result.returncode, truncated=result.truncated)
+            else:
+                # Activate the virtual environment and run the command
+                match os.name:
+                    case "nt":
+                        # Windows
+                        cmd = ["cmd", "/c", ".venv\\Scripts\\activate.bat && " + shlex.join(cmd_list)]
+                    case "posix":
+                        # Linux/macOS
+                        cmd = ["bash", "-c", "source .venv/bin/activate && " + shlex.join(cmd_list)]
+                    case _:
+                        return self.result(OSError(f"Unsupported operating system: {os.name}"))
+                with self._tool_tracer.span("execute", tool=func_name) as span:
+                    result = stream_process(
+                        cmd,
+                        max_chars=self.configs.cli_output_limit,
+                        timeout=self.timeout,
+                        on_output=progress,
+                        terminate_at_limit=self.configs.terminate_cli_tool_at_output_limit,
+                        open_spill=open_spill,
+                    )
+                    span.set(returncode=result.returncode, truncated=result.truncated)
+            stdout = result.stdout
+            format_result = self.result
+            if result.truncated:
+                self._tool_metrics.record_truncation(func_name)
+                reason = f"Output truncated after {len(result.stdout):,} of {result.spill.chars:,} characters."
+                stdout += f"...\n{self._result_store.note(result.spill.close(), reason)}"
+                # Already cut to the output limit, with the full output stored, so it isn't cut again.
+                format_result = self._format_result
             # Check if the command was successful and return the output
-            if result.returncode == 0:
-                return self.result(f"\n'{func_name}' output: {result.stdout}")
+            if result.returncode == 0 or result.terminated_at_limit:
+                return format_result(f"\n'{func_name}' output: {stdout}")
             else:
                 return self.result(
                     sub.CalledProcessError(
                         returncode=result.returncode,
                         cmd=cmd,
-                        output=result.stdout,
+                        output=stdout,
                         stderr=result.stderr,
                     ))
         except Exception as e:
+            for spill in spills:
+                spill.discard()
             mcp_logger.exception(traceback.print_exc())
             return self.result(e)
 
@@ -176,9 +324,46 @@ class _RunTool:
         """
         Route to the appropriate tool caller based on the given arguments and keyword arguments.
         """
+        with self._tool_tracer.span("run_tool"):
+            return self._route(self._run_cli_tool, self._run_func_tool, *args, **kwargs)
+
+    async def acall(self, *args, **kwargs) -> CallToolResultType:
+        """
+        Route to the appropriate tool caller, without blocking the running event loop.
+        """
+        with self._tool_tracer.span("run_tool"):
+            result = self._route(self._arun_cli_tool, self._arun_func_tool, *args, **kwargs)
+            return await result if inspect.isawaitable(result) else result
+
+    async def _arun_cli_tool(self, cmd_list: list[str], func_name: str, ctx: Context | None = None) -> CallToolResultType:
+        """Run a command line tool on the tool thread pool, forwarding its output as progress notifications.
+
+        Args:
+            cmd_list: The command to run.
+            func_name: The name of the command line tool that called this.
+            ctx: The FastMCP context of the tool call. Progress is only reported if given.
+        """
+        progress = None
+        if ctx is not None:
+            loop = asyncio.get_running_loop()
+            last_reported = 0.0
+
+            def progress(chars: int, text: str) -> None:
+                nonlocal last_reported
+                now = time.monotonic()
+                if now - last_reported < self.configs.cli_progress_interval:
+                    return
+                last_reported = now
+                lines = text.strip().splitlines()
+                message = lines[-1][:200] if lines else None
+                asyncio.run_coroutine_threadsafe(ctx.report_progress(chars, message=message), loop)
+
+        return await self._tool_thread_pool.run(self._run_cli_tool, cmd_list, func_name, progress)
+
+    def _route(self, run_cli_tool: Callable, run_func_tool: Callable, *args, **kwargs) -> Any:
         # Check if this is a CLI tool call (expected to have cmd and func_name)
         if len(args) == 2 and isinstance(args[0], list) and isinstance(args[1], str) and not kwargs:
-            return self._run_cli_tool(args[0], args[1])
+            return run_cli_tool(args[0], args[1])
         # Otherwise, treat as a function call
         else:
             if not args:
@@ -192,16 +377,23 @@ class _RunTool:
                     return self.result(ValueError(f"First argument '{func}' is not callable, string, or exception."))
             else:
                 func_args = args[1:] if len(args) > 1 else ()
-                if self.configs.log_level == 10:
-                    mcp_logger.debug(f"Running function tool '{func}' with args: {args} and kwargs: {kwargs}")
-                return self._run_func_tool(func, *func_args, **kwargs)
+                mcp_logger.debug("Running function tool '%s' with args: %s and kwargs: %s", func, args, kwargs)
+                return run_func_tool(func, *func_args, **kwargs)
 
 
 # Create singleton instance of _RunTool.
 resources = {
     'return_tool_call_results': return_tool_call_results,
     'return_text_content': return_text_content,
-    'logger': mcp_logger
+    'logger': mcp_logger,
+    'tool_registry': tool_registry,
+    'tool_thread_pool': tool_thread_pool,
+    'tool_single_flight': tool_single_flight,
+    'cli_workers': cli_workers,
+    'result_shaper': result_shaper,
+    'result_store': result_store,
+    'tool_metrics': tool_metrics,
+    'tool_tracer': tool_tracer,
 }
 _run_tool = _RunTool(configs=configs, resources=resources)
 
@@ -221,6 +413,39 @@ def run_tool(*args, **kwargs) -> CallToolResultType:
     """
     return _run_tool(*args, **kwargs)
 
+
+async def arun_cli_tool(cmd_list: list[str], func_name: str, ctx: Context | None = None) -> CallToolResultType:
+    """
+    Run a command line tool from a running event loop, without blocking it.
+
+    Args:
+        cmd_list: The command to run.
+        func_name: The name of the command line tool that called this.
+        ctx: The FastMCP context of the tool call. If given, the tool's output is
+            forwarded to the client as progress notifications while it runs.
+
+    Returns:
+        A CallToolResult object containing the result of the tool call.
+    """
+    return await _run_tool._arun_cli_tool(cmd_list, func_name, ctx)
+
+
+async def arun_tool(*args, **kwargs) -> CallToolResultType:
+    """
+    Run a tool from a running event loop, without blocking it.
+
+    Coroutine function tools are awaited directly. Synchronous function tools and
+    command line tools are run on the tool thread pool.
+
+    Args:
+        *args: Positional arguments to pass to the tool
+        **kwargs: Keyword arguments to pass to the tool
+
+    Returns:
+        A CallToolResult object containing the result of the tool call.
+    """
+    return await _run_tool.acall(*args, **kwargs)
+
 def return_results(input: Any) -> CallToolResultType:
     """
     Return the result of a tool call.
@@ -0,0 +1,250 @@
+import asyncio
+from dataclasses import dataclass, is_dataclass, asdict
+import json
+import logging
+import threading
+from typing import Any, Callable
+
+
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+from mcp.types import CallToolResult, TextContent
+
+
+from configs import configs, Configs
+from logger import mcp_logger
+from server_utils._run_tool._result_store import result_store, ResultStore
+from server_utils.server_.tool_metrics import tool_metrics, ToolMetrics
+from server_utils.server_.tool_tracing import tool_tracer, ToolTracer
+
+
+# Generous upper bound on characters per token, so only a bounded prefix of a string is ever encoded.
+_MAX_CHARS_PER_TOKEN = 8
+_MAX_DEPTH = 20
+
+
+class _CharEstimateCounter:
+    """Estimates tokens as a fixed number of characters each, for when tiktoken is unavailable."""
+    CHARS_PER_TOKEN = 4
+
+    def count(self, text: str) -> int:
+        return -(-len(text) // self.CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, max_tokens: int) -> tuple[str, bool]:
+        max_chars = max_tokens * self.CHARS_PER_TOKEN
+        return (text[:max_chars], True) if len(text) > max_chars else (text, False)
+
+
+class _TiktokenCounter:
+    """Counts tokens with a tiktoken encoding, encoding no more of a string than the budget needs."""
+
+    def __init__(self, encoding) -> None:
+        self._encoding = encoding
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> tuple[str, bool]:
+        # Each token is at least one UTF-8 byte, so short strings fit without encoding them.
+        if len(text) <= max_tokens and len(text.encode("utf-8")) <= max_tokens:
+            return text, False
+        prefix = text[:max_tokens * _MAX_CHARS_PER_TOKEN]
+        tokens = self._encoding.encode(prefix, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return prefix, len(prefix) < len(text)
+        return self._encoding.decode(tokens[:max_tokens]), True
+
+
+def _content_bytes(converted: Any) -> int:
+    """Size in bytes of the text content of a converted tool result."""
+    if isinstance(converted, CallToolResult):
+        content = converted.content
+    elif isinstance(converted, tuple):
+        # Unstructured content, alongside the structured content it was made from.
+        content = converted[0]
+    else:
+        content = converted
+    return sum(len(item.text.encode("utf-8")) for item in content if isinstance(item, TextContent))
+
+
+@dataclass
+class ShapedResult:
+    """A tool result serialized to fit the output budget."""
+    text: str
+    truncated: bool = False
+    result_id: str | None = None
+
+
+class _Budget:
+    def __init__(self, tokens: int) -> None:
+        self.tokens = tokens
+        self.elided = False
+
+
+class ResultShaper:
+    """
+    Serializes tool results to fit a token budget, without stringifying more of them than fits.
+
+    Strings are cut at the budget. Lists, tuples, sets and dicts keep their structure: items are
+    serialized one by one until the budget runs out, and the rest are replaced by an elision
+    marker with a count, e.g. "... 9,950 more items". Results that fit are serialized with repr(),
+    as before. Results that don't are kept whole in the result store, and the shaped result
+    carries their ID, so the rest can be paged through without running the tool again.
+    `shape_mcp` applies the same budget to every tool a FastMCP server serves.
+    """
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger: logging.Logger = self.resources['logger']
+        self._result_store: ResultStore = self.resources['result_store']
+        self._tool_metrics: ToolMetrics = self.resources['tool_metrics']
+        self._tool_tracer: ToolTracer = self.resources['tool_tracer']
+        self._counter = None
+        self._lock = threading.Lock()
+
+    @property
+    def counter(self) -> _TiktokenCounter | _CharEstimateCounter:
+        """The token counter, loaded on first use. Falls back to estimating by characters without tiktoken."""
+        with self._lock:
+            if self._counter is None:
+                try:
+                    import tiktoken
+                    self._counter = _TiktokenCounter(tiktoken.get_encoding(self.configs.result_token_encoding))
+                except Exception as e:
+                    self._logger.warning(f"Could not load tiktoken encoding '{self.configs.result_token_encoding}', estimating tokens from characters instead: {e}")
+                    self._counter = _CharEstimateCounter()
+            return self._counter
+
+    def _truncate_text(self, text: str, budget: _Budget) -> str:
+        # The character limit also bounds how much of the string is looked at.
+        text, truncated = text[:self.configs.result_char_limit], len(text) > self.configs.result_char_limit
+        text, over_budget = self.counter.truncate(text, max(budget.tokens, 0))
+        budget.tokens -= max(budget.tokens, 0) if over_budget else self.counter.count(text)
+        if truncated or over_budget:
+            budget.elided = True
+        return text
+
+    def _prune(self, value: Any, budget: _Budget, depth: int = 0) -> Any:
+        """Copy as much of a value as fits in the budget, with elision markers for the rest."""
+        if isinstance(value, str):
+            text = self._truncate_text(value, budget)
+            return text + "..." if len(text) < len(value) else text
+        if value is None or isinstance(value, (bool, int, float)):
+            budget.tokens -= 1
+            return value
+        if depth >= _MAX_DEPTH:
+            return self._truncate_text(repr(value), budget)
+
+        if isinstance(value, dict):
+            pruned = {}
+            for index, (key, item) in enumerate(value.items()):
+                if budget.tokens <= 0:
+                    budget.elided = True
+                    pruned["..."] = f"{len(value) - index:,} more keys"
+                    break
+                budget.tokens -= 1
+                pruned[str(key)] = self._prune(item, budget, depth + 1)
+            return pruned
+        if isinstance(value, (list, tuple, set, frozenset)):
+            pruned = []
+            for index, item in enumerate(value):
+                if budget.tokens <= 0:
+                    budget.elided = True
+                    pruned.append(f"... {len(value) - index:,} more items")
+                    break
+                budget.tokens -= 1
+                pruned.append(self._prune(item, budget, depth + 1))
+            return pruned
+        if hasattr(value, "model_dump"):
+            return self._prune(value.model_dump(), budget, depth + 1)
+        if is_dataclass(value) and not isinstance(value, type):
+            return self._prune(asdict(value), budget, depth + 1)
+        return self._truncate_text(repr(value), budget)
+
+    def shape(self, result: Any, budget_tokens: int | None = None, spill: bool = True) -> ShapedResult:
+        """Serialize a tool result to fit the output budget.
+
+        Args:
+            result: The tool's return value.
+            budget_tokens: The most tokens to serialize. Defaults to `configs.result_token_budget`.
+            spill: Keep the full result in the result store if it doesn't fit.
+
+        Returns:
+            ShapedResult: The serialized result, and where to read the full result if it was truncated.
+        """
+        budget = _Budget(self.configs.result_token_budget if budget_tokens is None else budget_tokens)
+        pruned = self._prune(result, budget)
+        if not budget.elided:
+            return ShapedResult(text=repr(result))
+
+        if isinstance(result, str):
+            text = repr(pruned)
+        else:
+            text = json.dumps(pruned, ensure_ascii=False, default=str)
+        shaped = ShapedResult(text=text, truncated=True)
+        if spill:
+            shaped.result_id = self._result_store.put(result)
+        return shaped
+
+    async def _shape_served(self, name: str, result: Any) -> CallToolResult | None:
+        """A served tool's result fit to the budget, or None if it fits as it is."""
+        with self._tool_tracer.span("truncate", tool=name):
+            budget = _Budget(self.configs.result_token_budget)
+            pruned = self._prune(result, budget)
+            if not budget.elided:
+                return None
+            self._tool_metrics.record_truncation(name)
+            text = pruned if isinstance(result, str) else json.dumps(pruned, ensure_ascii=False, default=str)
+            # Writing the whole result to the store is the slow part, so it's kept off the event loop.
+            result_id = await asyncio.to_thread(self._result_store.put, result)
+        note = self.truncation_note(ShapedResult(text=text, truncated=True, result_id=result_id))
+        return CallToolResult(content=[TextContent(type="text", text=f"{text}\n{note}")], isError=False)
+
+    def shape_mcp(self, mcp: FastMCP) -> None:
+        """Fit the result of every tool called through a FastMCP server to the token budget.
+
+        Results that fit are converted by FastMCP as usual. Larger ones are sent as their
+        shaped text and a note with their result ID, without structured content, since a
+        truncated result can't match the tool's output schema.
+        """
+        tool_manager = mcp._tool_manager
+        call_tool = tool_manager.call_tool
+
+        async def shaped_call_tool(name: str, arguments: dict[str, Any], *args, convert_result: bool = False, **kwargs) -> Any:
+            # The raw result, so an oversized one is never converted to content in full.
+            result = await call_tool(name, arguments, *args, convert_result=False, **kwargs)
+            if not convert_result:
+                return result
+            # A CallToolResult was already formatted, e.g. by run_tool, which shapes results itself.
+            converted = None if isinstance(result, CallToolResult) else await self._shape_served(name, result)
+            if converted is None:
+                try:
+                    converted = tool_manager.get_tool(name).fn_metadata.convert_result(result)
+                except Exception as e:
+                    raise ToolError(f"Error executing tool {name}: {e}") from e
+            # Measured here, where the result is already text, rather than serializing it again.
+            self._tool_metrics.record_output(name, _content_bytes(converted))
+            return converted
+
+        tool_manager.call_tool = shaped_call_tool
+
+    def truncation_note(self, shaped: ShapedResult) -> str:
+        """A note telling the caller that a result was truncated, and how to read all of it."""
+        if not shaped.truncated:
+            return ""
+        reason = f"Output truncated to fit {self.configs.result_token_budget:,} tokens."
+        if shaped.result_id is None:
+            return f"[{reason}]"
+        return self._result_store.note(shaped.result_id, reason)
+
+
+# Create singleton instance of ResultShaper.
+resources = {
+    'logger': mcp_logger,
+    'result_store': result_store,
+    'tool_metrics': tool_metrics,
+    'tool_tracer': tool_tracer,
+}
+result_shaper = ResultShaper(configs=configs, resources=resources)
@@ -0,0 +1,190 @@
+import codecs
+from dataclasses import dataclass
+import os
+import signal
+import subprocess as sub
+import threading
+import time
+from typing import Callable, Protocol
+
+
+_CHUNK_SIZE = 65536
+_TERMINATE_GRACE_SECONDS = 2.0
+
+
+class _Spill(Protocol):
+    def write(self, text: str) -> None: ...
+
+
+@dataclass
+class StreamedProcessResult:
+    """The outcome of a process whose output was read incrementally."""
+    returncode: int
+    stdout: str
+    stderr: str
+    truncated: bool = False
+    terminated_at_limit: bool = False
+    spill: _Spill | None = None
+
+
+class _PipeReader(threading.Thread):
+    """
+    Read a pipe in chunks, keeping text up to a character budget and discarding the rest.
+
+    If `open_spill` is given, it is called once the budget is exceeded, and all of the output,
+    kept and discarded, is written to what it returns instead of being lost. Once `stop` is
+    called, the pipe is still drained, but nothing more is kept, spilled or reported.
+    """
+
+    def __init__(self,
+                 pipe,
+                 max_chars: int,
+                 on_output: Callable[[int, str], None] | None = None,
+                 on_limit: Callable[[], None] | None = None,
+                 open_spill: Callable[[], _Spill] | None = None
+                 ) -> None:
+        super().__init__(daemon=True)
+        self._pipe = pipe
+        self._max_chars = max_chars
+        self._on_output = on_output
+        self._on_limit = on_limit
+        self._open_spill = open_spill
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._parts: list[str] = []
+        self.chars = 0
+        self.truncated = False
+        self.spill: _Spill | None = None
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def stop(self) -> None:
+        """Stop keeping and spilling output, so the caller can use and close the spill while the pipe is still open."""
+        with self._lock:
+            self._stopped = True
+
+    def run(self) -> None:
+        fd = self._pipe.fileno()
+        while True:
+            chunk = os.read(fd, _CHUNK_SIZE)
+            if not chunk:
+                break
+            with self._lock:
+                if not self._stopped:
+                    self._read(chunk)
+        with self._lock:
+            if not self._stopped and not self.truncated:
+                self._parts.append(self._decoder.decode(b"", final=True))
+            elif not self._stopped and self.spill is not None:
+                self.spill.write(self._decoder.decode(b"", final=True))
+        self._pipe.close()
+
+    def _read(self, chunk: bytes) -> None:
+        if self.truncated:
+            # Keep draining, so the process doesn't block on a full pipe.
+            if self.spill is not None:
+                self.spill.write(self._decoder.decode(chunk))
+            return
+        text = self._decoder.decode(chunk)
+        if self.chars + len(text) > self._max_chars:
+            if self._open_spill is not None:
+                self.spill = self._open_spill()
+                self.spill.write("".join(self._parts) + text)
+            text = text[:self._max_chars - self.chars]
+            self.truncated = True
+        self._parts.append(text)
+        self.chars += len(text)
+        if self._on_output is not None and text:
+            self._on_output(self.chars, text)
+        if self.truncated and self._on_limit is not None:
+            self._on_limit()
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+
+def _signal(process: sub.Popen, kill: bool = False) -> None:
+    """Terminate or kill a process and, on POSIX, the rest of its process group, e.g. a shell's children."""
+    if process.poll() is not None:
+        return
+    if os.name == "posix":
+        try:
+            os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+            return
+        except OSError:
+            pass
+    process.kill() if kill else process.terminate()
+
+
+def stream_process(cmd: list[str],
+                   max_chars: int,
+                   timeout: float | None = None,
+                   on_output: Callable[[int, str], None] | None = None,
+                   terminate_at_limit: bool = False,
+                   open_spill: Callable[[], _Spill] | None = None
+                   ) -> StreamedProcessResult:
+    """
+    Run a command, reading its output incrementally and keeping at most `max_chars` of each stream.
+
+    Output past the budget is read and discarded as it arrives, rather than buffered,
+    or the process is terminated if `terminate_at_limit` is set.
+
+    Args:
+        cmd: The command to run.
+        max_chars: The most characters of stdout, and of stderr, to keep.
+        timeout: Seconds to wait for the process. None waits indefinitely.
+        on_output: Called from a reader thread with the characters of stdout kept so far
+            and the newest chunk of stdout, as it arrives.
+        terminate_at_limit: Terminate the process once its stdout reaches the budget.
+        open_spill: Called once if stdout exceeds the budget. All of stdout is written to what it returns.
+
+    Returns:
+        StreamedProcessResult: The exit code and the kept output.
+
+    Raises:
+        subprocess.TimeoutExpired: If the process ran longer than `timeout`. It is killed first.
+    """
+    process = sub.Popen(cmd, stdout=sub.PIPE, stderr=sub.PIPE, start_new_session=os.name == "posix")
+    terminated_at_limit = threading.Event()
+
+    def on_limit() -> None:
+        if terminate_at_limit and not terminated_at_limit.is_set():
+            terminated_at_limit.set()
+            _signal(process)
+            # Kill it if it ignores SIGTERM.
+            killer = threading.Timer(_TERMINATE_GRACE_SECONDS, _signal, args=(process,), kwargs={"kill": True})
+            killer.daemon = True
+            killer.start()
+
+    stdout_reader = _PipeReader(process.stdout, max_chars, on_output=on_output, on_limit=on_limit, open_spill=open_spill)
+    stderr_reader = _PipeReader(process.stderr, max_chars)
+    stdout_reader.start()
+    stderr_reader.start()
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        process.wait(timeout=timeout)
+    except sub.TimeoutExpired:
+        _signal(process, kill=True)
+        process.wait()
+        stdout_reader.join(_TERMINATE_GRACE_SECONDS)
+        stderr_reader.join(_TERMINATE_GRACE_SECONDS)
+        stdout_reader.stop()
+        stderr_reader.stop()
+        raise sub.TimeoutExpired(cmd, timeout, output=stdout_reader.text, stderr=stderr_reader.text)
+
+    remaining = None if deadline is None else max(deadline - time.monotonic(), _TERMINATE_GRACE_SECONDS)
+    # Grandchildren may hold the pipes open after the process exits, so don't wait on them forever.
+    stdout_reader.join(remaining)
+    stderr_reader.join(remaining)
+    # Readers still running are stopped, so the caller can close the spill without them writing to it.
+    stdout_reader.stop()
+    stderr_reader.stop()
+    return StreamedProcessResult(
+        returncode=process.returncode,
+        stdout=stdout_reader.text,
+        stderr=stderr_reader.text,
+        truncated=stdout_reader.truncated,
+        terminated_at_limit=terminated_at_limit.is_set(),
+        spill=stdout_reader.spill,
+    )
@@ -1,11 +1,73 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import hashlib
+import json
+import logging
+import os
 from pathlib import Path
 import subprocess as sub
+import sys
+import threading
+import time
+from typing import Any, Callable
 
 
+from configs import configs, Configs
 from logger import mcp_logger
 
 
-def install_tool_dependencies_to_shared_venv(requirements_file_paths: list[Path]) -> None:
+_FINGERPRINTS_PATH = configs.ROOT_DIR / ".cache" / "requirements_fingerprints.json"
+# Parallel installs use `uv pip install`, which doesn't add to pyproject.toml, so they're fingerprinted separately.
+_PARALLEL_FINGERPRINTS_PATH = configs.ROOT_DIR / ".cache" / "requirements_fingerprints_parallel.json"
+
+
+def _hash_file(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _get_environment_fingerprint() -> str:
+    """Identify the current virtual environment, so recreating it invalidates every fingerprint."""
+    pyvenv_cfg = Path(sys.prefix) / "pyvenv.cfg"
+    try:
+        return f"{sys.prefix}:{pyvenv_cfg.stat().st_mtime_ns}"
+    except OSError:
+        return sys.prefix
+
+
+def _load_fingerprints(fingerprints_path: Path) -> dict[str, str]:
+    """Load the hashes of the requirements files installed by previous runs."""
+    try:
+        data = json.loads(fingerprints_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("environment") != _get_environment_fingerprint():
+        return {}
+    return data.get("files", {})
+
+
+def _save_fingerprints(fingerprints_path: Path, fingerprints: dict[str, str]) -> None:
+    """Atomically save the hashes of the installed requirements files."""
+    try:
+        fingerprints_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = fingerprints_path.with_name(f"{fingerprints_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(
+            json.dumps({"environment": _get_environment_fingerprint(), "files": fingerprints}, indent=2),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, fingerprints_path)
+    except OSError as e:
+        mcp_logger.warning(f"Could not save requirements fingerprints to {fingerprints_path}: {e}")
+
+
+def _check_uv_is_installed() -> None:
+    try:
+        sub.run(["uv", "--version"], check=True, capture_output=True)
+    except (sub.SubprocessError, FileNotFoundError) as e:
+        raise RuntimeError("uv is not installed. Please install it first.") from e
+
+
+def install_tool_dependencies_to_shared_venv(requirements_file_paths: list[Path],
+                                             fingerprints_path: Path = _FINGERPRINTS_PATH
+                                             ) -> None:
     """
     Install dependencies from multiple requirements.txt files to a shared virtual environment using uv.
 
@@ -13,9 +75,14 @@ def install_tool_dependencies_to_shared_venv(requirements_file_paths: list[Path]
     into the current virtual environment using the 'uv' package manager. It validates that uv
     is installed and available before proceeding.
 
+    The sha256 of every successfully installed requirements file is saved, along with the
+    identity of the virtual environment. On later runs, only files whose hash changed are
+    installed, and all of them are passed to a single 'uv add' invocation.
+
     Args:
-        requirements_file_paths (list[Path]): List of Path objects pointing to requirements.txt 
+        requirements_file_paths (list[Path]): List of Path objects pointing to requirements.txt
                                             files containing package dependencies to install.
+        fingerprints_path (Path): JSON file the hashes of installed requirements files are kept in.
 
     Returns:
         None
@@ -25,42 +92,190 @@ def install_tool_dependencies_to_shared_venv(requirements_file_paths: list[Path]
 
     Note:
         - Skips non-existent file paths with a warning
-        - Logs progress and results for each requirements file processed
-        - Uses 'uv add -r' command to install packages
+        - Skips unchanged requirements files without running uv at all
+        - Uses one 'uv add -r <file> -r <file> ...' command to install the changed files
     """
-    # Check if uv is installed
-    try:
-        sub.run(["uv", "--version"], check=True, capture_output=True)
-    except (sub.SubprocessError, FileNotFoundError):
-        raise RuntimeError("uv is not installed. Please install it first.") from e
-
-    if requirements_file_paths is None:
+    if not requirements_file_paths:
         mcp_logger.info("No requirements.txt files found.")
-    else:
-        len_requirements_file_paths = len(requirements_file_paths)
-        mcp_logger.info(f"Found {len_requirements_file_paths} requirements.txt files.")
+        return
+    len_requirements_file_paths = len(requirements_file_paths)
+    mcp_logger.info(f"Found {len_requirements_file_paths} requirements.txt files.")
 
-    installed_tools = 0
-    # Install each tool's dependencies
+    fingerprints = _load_fingerprints(fingerprints_path)
+    changed: dict[str, str] = {}
     for path in requirements_file_paths:
         abs_path = path.resolve()
         if not abs_path.exists():
-            mcp_logger.warning(f"Path {abs_path.resolve()} does not exist. Skipping...")
+            mcp_logger.warning(f"Path {abs_path} does not exist. Skipping...")
             continue
-        else:
-            mcp_logger.info(f"Installing dependencies from {abs_path.resolve()}...")
+        file_hash = _hash_file(abs_path)
+        if fingerprints.get(str(abs_path)) != file_hash:
+            changed[str(abs_path)] = file_hash
 
-            try:
-                results = sub.run(["uv", "add", "-r", f"{abs_path}"],capture_output=True)
-            except sub.SubprocessError as e:
-                raise RuntimeError(f"Failed to install dependencies from {path}.") from e
+    if not changed:
+        mcp_logger.info(f"Requirements for all {len_requirements_file_paths} tools are up to date.")
+        return
 
-            if results.returncode != 0:
-                raise RuntimeError(f"""
-    Failed to install dependencies from {path}.\nresults:{results.stdout}\nerror:{results.stderr}
+    # Check if uv is installed
+    _check_uv_is_installed()
+
+    mcp_logger.info(f"Installing dependencies from {len(changed)} changed requirements files: {', '.join(changed)}")
+    command = ["uv", "add"]
+    for abs_path in changed:
+        command += ["-r", abs_path]
+
+    try:
+        results = sub.run(command, capture_output=True)
+    except sub.SubprocessError as e:
+        raise RuntimeError(f"Failed to install dependencies from {', '.join(changed)}.") from e
+
+    if results.returncode != 0:
+        raise RuntimeError(f"""
+    Failed to install dependencies from {', '.join(changed)}.\nresults:{results.stdout}\nerror:{results.stderr}
             """)
-            else:
-                mcp_logger.info(f"Successfully installed dependencies from {path}.")
-                installed_tools += 1
 
-    mcp_logger.info(f"Installed {installed_tools} requirements for {len_requirements_file_paths} tools at .venv.")
+    fingerprints.update(changed)
+    _save_fingerprints(fingerprints_path, fingerprints)
+    mcp_logger.info(f"Installed {len(changed)} requirements for {len_requirements_file_paths} tools at .venv.")
+
+
+class DependencyInstaller:
+    """
+    Install changed requirements files in the background, on a bounded pool of worker threads.
+
+    Each changed requirements file is installed by its own `uv pip install -r` job, and gets its
+    own future. Server startup doesn't wait for them. Instead, a tool waits for the installs of
+    the requirements files in its directory and the directories above it, and only when its
+    module is about to be imported. Unchanged files are skipped, as with
+    `install_tool_dependencies_to_shared_venv`.
+    """
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger: logging.Logger = self.resources['logger']
+        self._futures: dict[Path, Future] = {}
+        self._timings: dict[Path, dict[str, Any]] = {}
+        self._fingerprints: dict[str, str] = {}
+        self._fingerprints_path: Path = _PARALLEL_FINGERPRINTS_PATH
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._done = 0
+
+    def _install(self, abs_path: Path, file_hash: str) -> None:
+        start = time.perf_counter()
+        try:
+            results = sub.run(["uv", "pip", "install", "-r", str(abs_path)], capture_output=True)
+            if results.returncode != 0:
+                raise RuntimeError(
+                    f"Failed to install dependencies from {abs_path}.\nresults:{results.stdout}\nerror:{results.stderr}"
+                )
+        except Exception as e:
+            self._finish(abs_path, start, error=e)
+            raise
+        self._finish(abs_path, start)
+        with self._lock:
+            self._fingerprints[str(abs_path)] = file_hash
+            _save_fingerprints(self._fingerprints_path, self._fingerprints)
+
+    def _finish(self, abs_path: Path, start: float, error: Exception | None = None) -> None:
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._done += 1
+            self._timings[abs_path] = {"seconds": elapsed, "status": "failed" if error else "installed"}
+            progress = f"[{self._done}/{len(self._futures)}]"
+        if error is None:
+            self._logger.info(f"{progress} Installed dependencies from {abs_path} in {elapsed:.2f} s.")
+        else:
+            self._logger.error(f"{progress} Failed to install dependencies from {abs_path} after {elapsed:.2f} s: {error}")
+
+    def start(self,
+              requirements_file_paths: list[Path],
+              max_workers: int = 4,
+              fingerprints_path: Path = _PARALLEL_FINGERPRINTS_PATH
+              ) -> dict[Path, Future]:
+        """Start installing the changed requirements files in the background.
+
+        Args:
+            requirements_file_paths: Paths to the requirements.txt files to install.
+            max_workers: The most installs that run at the same time.
+            fingerprints_path: JSON file the hashes of installed requirements files are kept in.
+
+        Returns:
+            dict[Path, Future]: A future for each requirements file being installed, by resolved path.
+
+        Raises:
+            RuntimeError: If uv is not installed.
+        """
+        self._fingerprints_path = fingerprints_path
+        self._fingerprints = _load_fingerprints(fingerprints_path)
+
+        changed: dict[Path, str] = {}
+        for path in requirements_file_paths or []:
+            abs_path = path.resolve()
+            if not abs_path.exists():
+                self._logger.warning(f"Path {abs_path} does not exist. Skipping...")
+                continue
+            file_hash = _hash_file(abs_path)
+            if self._fingerprints.get(str(abs_path)) != file_hash:
+                changed[abs_path] = file_hash
+
+        if not changed:
+            self._logger.info(f"Requirements for all {len(requirements_file_paths or [])} tools are up to date.")
+            return {}
+        _check_uv_is_installed()
+
+        self._logger.info(f"Installing {len(changed)} changed requirements files in the background with {max_workers} workers.")
+        with self._lock:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dependency_installer")
+            for abs_path, file_hash in changed.items():
+                self._futures[abs_path] = self._executor.submit(self._install, abs_path, file_hash)
+            # Let the worker threads exit once the queued installs are done.
+            self._executor.shutdown(wait=False)
+            return dict(self._futures)
+
+    def wait_for(self, path: Path | str, timeout: float | None = None) -> None:
+        """Block until the requirements a tool depends on are installed.
+
+        A tool depends on the requirements files in its own directory and in every directory above it.
+
+        Args:
+            path: The tool's source file or directory.
+            timeout: The most seconds to wait for each install. None waits indefinitely.
+
+        Raises:
+            RuntimeError: If one of the installs failed.
+            TimeoutError: If an install didn't finish in time.
+        """
+        if not self._futures:
+            return
+        path = Path(path).resolve()
+        with self._lock:
+            futures = [
+                future for requirements_path, future in self._futures.items()
+                if requirements_path.parent == path or requirements_path.parent in path.parents
+            ]
+        for future in futures:
+            future.result(timeout=timeout)
+
+    def wait_for_module(self, module_name: str, timeout: float | None = None) -> None:
+        """Block until the requirements of a tool module under the project root are installed.
+
+        Args:
+            module_name: The fully qualified name of the module, e.g. 'tools.functions.my_tool'.
+            timeout: The most seconds to wait for each install. None waits indefinitely.
+        """
+        self.wait_for(self.configs.ROOT_DIR.joinpath(*module_name.split(".")), timeout=timeout)
+
+    def timings(self) -> dict[str, dict[str, Any]]:
+        """Seconds taken and status of each finished install, by requirements file path."""
+        with self._lock:
+            return {str(path): dict(timing) for path, timing in self._timings.items()}
+
+
+# Create singleton instance of DependencyInstaller.
+resources = {
+    'logger': mcp_logger
+}
+dependency_installer = DependencyInstaller(configs=configs, resources=resources)
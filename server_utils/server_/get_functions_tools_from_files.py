@@ -10,6 +10,10 @@ from pydantic import ValidationError
 
 from logger import logger, mcp_logger
 from configs import configs
+from server_utils.install_tool_dependencies_to_shared_venv import dependency_installer
+from server_utils.server_.lazy_tools import make_lazy_tool
+from server_utils.server_.tool_manifest import tool_manifest
+from server_utils.server_.tool_registry import tool_registry
 
 def _get_tool_file_paths(tool_dir: Path) -> list[Path]:
     """Load Python tool files from a directory.
@@ -67,7 +71,7 @@ def _tool_wrapper(func: Callable[..., Any]) -> Callable[..., Any]:
     """
     @wraps(func)
     def wrapped_tool(*args, **kwargs):
-        logger.debug(f"Running tool '{func.__name__}' with args: {args}, kwargs: {kwargs}")
+        logger.debug("Running tool '%s' with args: %s, kwargs: %s", func.__name__, args, kwargs)
         error_msg = None
         result = None
         try:
@@ -89,6 +93,15 @@ def _tool_wrapper(func: Callable[..., Any]) -> Callable[..., Any]:
     return wrapped_tool
 
 
+def _record_in_manifest(mcp: FastMCP, file: Path, tool_name: str, module_name: str) -> None:
+    """Save a freshly registered tool to the tool manifest, if the manifest is enabled."""
+    if not configs.use_tool_manifest:
+        return
+    tool = tool_manifest.get_registered_tool(mcp, tool_name)
+    if tool is not None:
+        tool_manifest.record(file, tool, module_name)
+
+
 def get_function_tools_from_files(mcp: FastMCP) -> FastMCP:
     """
     Load and register function tools from Python files in the tools directory.
@@ -100,7 +113,21 @@ def get_function_tools_from_files(mcp: FastMCP) -> FastMCP:
     - Don't start with an underscore (not private)
     - Have a docstring (used as the tool description)
 
-    Each registered function is wrapped to handle output truncation and JSON serialization.
+    Registered functions are called as they are. Their results are fit to the token budget
+    for every tool at once, by `result_shaper.shape_mcp`.
+
+    If `lazy_tool_registration` is enabled in the configs, each tool's name, docstring and
+    signature are read statically from its file, and a proxy is registered in place of the
+    function. The tool's module is then only imported the first time the tool is called.
+    Tools whose signature cannot be read statically are imported and registered as usual.
+
+    If `use_tool_manifest` is enabled in the configs, every registered tool's name, docstring,
+    JSON schemas and source hash are saved to a manifest next to the tools. On the next start,
+    tools whose source is unchanged are registered straight from the manifest, without reading
+    their source, importing their module or building their pydantic models until first called.
+
+    Tools decorated with `@memoize` from `server_utils.server_.tool_cache` have their results cached,
+    keyed on their arguments and the contents of the files they refer to.
 
     Args:
         mcp (FastMCP): The FastMCP server instance to register tools with.
@@ -121,7 +148,26 @@ def get_function_tools_from_files(mcp: FastMCP) -> FastMCP:
                 # Skip files that start with an underscore
                 if module_name.startswith("_"):
                     continue
-                # Import the module using its relative path
+
+                if configs.use_tool_manifest:
+                    entry = tool_manifest.get(file)
+                    if entry is not None:
+                        tool = tool_manifest.make_tool(entry)
+                        tool_registry.add_tool(mcp, tool.fn, name=tool.name, description=tool.description, tool=tool)
+                        mcp_logger.info(f"Registered tool: {tool.name} (manifest)")
+                        continue
+
+                if configs.lazy_tool_registration:
+                    proxy = make_lazy_tool(file)
+                    if proxy is not None:
+                        tool_registry.add_tool(mcp, proxy, name=module_name, description=proxy.__doc__)
+                        _record_in_manifest(mcp, file, module_name, proxy.__module__)
+                        mcp_logger.info(f"Registered tool: {module_name} (lazy)")
+                        continue
+                    mcp_logger.debug(f"Tool '{module_name}' cannot be registered lazily. Importing it.")
+
+                # Import the module using its relative path, once its requirements are installed.
+                dependency_installer.wait_for(file)
                 module = importlib.import_module(f"tools.functions.{module_name}")
 
                 # Find all functions in the module that don't start with underscore
@@ -145,9 +191,9 @@ def get_function_tools_from_files(mcp: FastMCP) -> FastMCP:
                             logger.warning(f"Function '{name}' in module '{module_name}' has no docstring. Skipping.")
                             continue
 
-                        # 
-
-                        mcp.add_tool(func, name=tool_name, description=tool_desc)
+                        # Register through the registry so the tool is re-registered when its source changes.
+                        tool_registry.add_tool(mcp, func, name=tool_name, description=tool_desc)
+                        _record_in_manifest(mcp, file, tool_name, func.__module__)
                         mcp_logger.info(f"Registered tool: {tool_name}")
 
             except ImportError as e:
@@ -159,4 +205,7 @@ def get_function_tools_from_files(mcp: FastMCP) -> FastMCP:
                 mcp_logger.error(f"Unexpected error loading tool from {file}: {e}\n{traceback.format_exc()}")
 
     finally:
+        if configs.use_tool_manifest:
+            tool_manifest.prune(tool_files)
+            tool_manifest.save()
         return mcp
\ No newline at end of file
@@ -0,0 +1,158 @@
+import ast
+import builtins
+import importlib
+import inspect
+import sys
+from pathlib import Path
+import typing
+from typing import Any, Callable
+
+
+from server_utils.install_tool_dependencies_to_shared_venv import dependency_installer
+
+
+# Names an annotation may use and still be resolved without importing the tool's module.
+_ANNOTATION_NAMESPACE: dict[str, Any] = {
+    **vars(builtins),
+    **{name: getattr(typing, name) for name in typing.__all__},
+    "Path": Path,
+}
+
+
+def _evaluate_annotation(node: ast.expr | None) -> Any:
+    """Evaluate an annotation from the AST.
+
+    Raises:
+        ValueError: If the annotation is a string, which could only be resolved in the tool's module.
+        NameError: If the annotation uses a name outside of builtins, typing and pathlib.Path.
+    """
+    if node is None:
+        return inspect.Parameter.empty
+    annotation = eval(compile(ast.Expression(node), "<annotation>", "eval"), dict(_ANNOTATION_NAMESPACE))
+    if isinstance(annotation, str):
+        raise ValueError(f"String annotation '{annotation}' cannot be resolved statically")
+    return annotation
+
+
+def _static_signature(node: ast.FunctionDef | ast.AsyncFunctionDef) -> inspect.Signature | None:
+    """Build a function's signature from its AST alone.
+
+    Args:
+        node: The function's AST node.
+
+    Returns:
+        inspect.Signature | None: The signature, or None if any annotation or default
+            value cannot be evaluated without importing the function's module.
+    """
+    Parameter = inspect.Parameter
+    args = node.args
+    try:
+        params = []
+        positional = args.posonlyargs + args.args
+        defaults = [None] * (len(positional) - len(args.defaults)) + args.defaults
+        for arg, default in zip(positional, defaults):
+            params.append(Parameter(
+                arg.arg,
+                Parameter.POSITIONAL_ONLY if arg in args.posonlyargs else Parameter.POSITIONAL_OR_KEYWORD,
+                default=Parameter.empty if default is None else ast.literal_eval(default),
+                annotation=_evaluate_annotation(arg.annotation),
+            ))
+        if args.vararg:
+            params.append(Parameter(
+                args.vararg.arg, Parameter.VAR_POSITIONAL, annotation=_evaluate_annotation(args.vararg.annotation)
+            ))
+        for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+            params.append(Parameter(
+                arg.arg,
+                Parameter.KEYWORD_ONLY,
+                default=Parameter.empty if default is None else ast.literal_eval(default),
+                annotation=_evaluate_annotation(arg.annotation),
+            ))
+        if args.kwarg:
+            params.append(Parameter(
+                args.kwarg.arg, Parameter.VAR_KEYWORD, annotation=_evaluate_annotation(args.kwarg.annotation)
+            ))
+        return inspect.Signature(params, return_annotation=_evaluate_annotation(node.returns))
+    except Exception:
+        return None
+
+
+def make_proxy(module_name: str,
+               func_name: str,
+               doc: str,
+               is_async: bool,
+               signature: inspect.Signature | None = None
+               ) -> Callable:
+    """
+    Make a function that imports a tool's module on its first call, then calls the tool.
+    If the tool's requirements are still being installed in the background, the first call waits for them.
+
+    Args:
+        module_name: The fully qualified name of the tool's module.
+        func_name: The name of the tool function in the module.
+        doc: The tool's docstring.
+        is_async: Whether the tool is a coroutine function. If so, the proxy is one too.
+        signature: The tool's signature, for FastMCP to build the argument schema from.
+
+    Returns:
+        Callable: The proxy function. Its `load` attribute imports and returns the real function.
+    """
+    def load() -> Callable:
+        if module_name not in sys.modules:
+            dependency_installer.wait_for_module(module_name)
+        return getattr(importlib.import_module(module_name), func_name)
+
+    if is_async:
+        async def proxy(*args, **kwargs):
+            return await load()(*args, **kwargs)
+    else:
+        def proxy(*args, **kwargs):
+            return load()(*args, **kwargs)
+
+    proxy.__name__ = proxy.__qualname__ = func_name
+    proxy.__module__ = module_name
+    proxy.__doc__ = doc
+    proxy.load = load
+    if signature is not None:
+        proxy.__signature__ = signature
+    return proxy
+
+
+def make_lazy_tool(file: Path, package: str = "tools.functions") -> Callable | None:
+    """
+    Build a proxy for a tool function without importing the tool's module.
+
+    The tool's name, docstring and signature are read statically from the file with `ast`.
+    The proxy carries them, so FastMCP can build the tool's argument schema from it.
+    The real module is imported the first time the proxy is called.
+
+    Args:
+        file: Path to the tool's source file. The tool function must have the same name as the file.
+        package: The package the tool's module belongs to.
+
+    Returns:
+        Callable | None: The proxy function, or None if the tool cannot be registered lazily,
+            i.e. the file doesn't define a public, documented function with the same name,
+            or the function's signature cannot be evaluated statically.
+    """
+    func_name = file.stem
+    module_name = f"{package}.{func_name}"
+
+    try:
+        tree = ast.parse(file.read_text(encoding="utf-8"), filename=str(file))
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    node = next((
+        node for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == func_name
+    ), None)
+    if node is None or func_name.startswith("_") or node.decorator_list:
+        return None
+
+    doc = ast.get_docstring(node, clean=False)
+    signature = _static_signature(node)
+    if not doc or signature is None:
+        return None
+
+    return make_proxy(module_name, func_name, doc, isinstance(node, ast.AsyncFunctionDef), signature)
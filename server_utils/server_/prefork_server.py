@@ -0,0 +1,127 @@
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable, NoReturn
+
+
+from mcp.server.fastmcp import FastMCP
+
+
+from configs import configs, Configs
+from logger import mcp_logger
+
+
+class PreforkServer:
+    """
+    Serves a FastMCP server's streamable HTTP app from several worker processes sharing one listening socket.
+
+    The parent binds `configs.host`:`configs.port`, then forks `configs.workers` workers, which
+    each accept connections from the socket with uvicorn, so calls are spread across cores.
+    Everything the parent loaded before forking, such as the registered tools and the tool
+    manifest, is shared with the workers copy-on-write, and memory-mapped files like the
+    tool search embedding index are shared through the page cache. The parent only supervises:
+    a worker that exits unexpectedly is replaced, and SIGINT or SIGTERM stops them all.
+
+    A client's requests can reach any worker, so the FastMCP server must be stateless
+    (`stateless_http=True`). Only POSIX systems can fork.
+    """
+
+    # Seconds to wait before replacing a worker that exited, so one that crashes on start doesn't spin.
+    _RESTART_DELAY = 1.0
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger: logging.Logger = self.resources['logger']
+        self._stopping = False
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.configs.host else socket.AF_INET
+        return socket.create_server((self.configs.host, self.configs.port), family=family, backlog=2048)
+
+    def _run_worker(self, index: int, sock: socket.socket, mcp: FastMCP, on_fork: Callable[[int], None] | None) -> NoReturn:
+        """Serve requests in a forked worker until it is told to stop, then exit the process."""
+        import uvicorn
+
+        # Signals go to uvicorn's handlers, not the parent's supervisor.
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            if on_fork is not None:
+                on_fork(index)
+            config = uvicorn.Config(mcp.streamable_http_app(), log_level=mcp.settings.log_level.lower())
+            uvicorn.Server(config).run(sockets=[sock])
+        except BaseException as e:
+            self._logger.exception("Server worker %s failed: %s", index, e)
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _spawn(self, index: int, sock: socket.socket, mcp: FastMCP, on_fork: Callable[[int], None] | None) -> int:
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(index, sock, mcp, on_fork)
+        self._logger.info("Started server worker %s (pid %s)", index, pid)
+        return pid
+
+    def _stop(self, workers: dict[int, int]) -> None:
+        self._stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def serve(self, mcp: FastMCP, on_fork: Callable[[int], None] | None = None) -> None:
+        """Fork the workers and supervise them until they are stopped.
+
+        Args:
+            mcp: The FastMCP server, with its tools registered and `stateless_http` set.
+            on_fork: Called in each worker, with its index, right after it is forked,
+                e.g. to start the background threads a forked process doesn't inherit.
+
+        Raises:
+            RuntimeError: If processes can't be forked on this platform.
+        """
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Multiple server workers need os.fork, which this platform doesn't support.")
+
+        sock = self._bind()
+        self._stopping = False
+        workers: dict[int, int] = {}
+        for index in range(self.configs.workers):
+            workers[self._spawn(index, sock, mcp, on_fork)] = index
+
+        signal.signal(signal.SIGTERM, lambda signum, frame: self._stop(workers))
+        signal.signal(signal.SIGINT, lambda signum, frame: self._stop(workers))
+        self._logger.info("Serving streamable-http clients at http://%s:%s with %s workers", self.configs.host, self.configs.port, len(workers))
+
+        try:
+            while workers:
+                try:
+                    pid, status = os.wait()
+                except ChildProcessError:
+                    break
+                index = workers.pop(pid, None)
+                if index is None:
+                    # Some other child of the server, e.g. a tool's process pool worker.
+                    continue
+                if not self._stopping:
+                    self._logger.warning("Server worker %s (pid %s) exited with status %s. Replacing it.", index, pid, os.waitstatus_to_exitcode(status))
+                    time.sleep(self._RESTART_DELAY)
+                    if not self._stopping:
+                        workers[self._spawn(index, sock, mcp, on_fork)] = index
+        finally:
+            self._stop(workers)
+            sock.close()
+
+
+# Create singleton instance of PreforkServer.
+resources = {
+    'logger': mcp_logger
+}
+prefork_server = PreforkServer(configs=configs, resources=resources)
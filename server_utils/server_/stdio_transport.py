@@ -0,0 +1,115 @@
+from contextlib import asynccontextmanager
+from io import TextIOWrapper
+import sys
+from typing import AsyncIterator, BinaryIO
+
+
+import anyio
+import anyio.lowlevel
+import anyio.to_thread
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from mcp.server.fastmcp import FastMCP
+import mcp.types as types
+from mcp.shared.message import SessionMessage
+
+
+from configs import configs
+
+
+# Most messages written together with one flush.
+_MAX_BATCH = 64
+
+
+def write_messages(stdout: BinaryIO, messages: list[SessionMessage], chunk_size: int) -> int:
+    """Write messages to a binary stream as JSON lines, flushing once after all of them.
+
+    Each message is serialized straight to UTF-8 bytes and written in slices of at most
+    `chunk_size` bytes, so a large response is neither decoded to a string nor copied again.
+
+    Args:
+        stdout: The binary stream to write to.
+        messages: The messages to write.
+        chunk_size: Most bytes handed to the stream in one write.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    written = 0
+    for session_message in messages:
+        message = session_message.message
+        data = memoryview(message.__pydantic_serializer__.to_json(message, by_alias=True, exclude_none=True))
+        for start in range(0, len(data), chunk_size):
+            stdout.write(data[start:start + chunk_size])
+        stdout.write(b"\n")
+        written += len(data) + 1
+    stdout.flush()
+    return written
+
+
+@asynccontextmanager
+async def stdio_server(stdin: anyio.AsyncFile[str] | None = None,
+                       stdout: BinaryIO | None = None,
+                       chunk_size: int = 64 * 1024
+                       ) -> AsyncIterator[tuple[MemoryObjectReceiveStream, MemoryObjectSendStream]]:
+    """
+    Stdio transport for an MCP server that writes responses off the event loop.
+
+    It reads messages like the MCP SDK's stdio transport. Outgoing messages are serialized
+    and written on a worker thread, so a large response doesn't stall the event loop while
+    it is encoded. Messages that are waiting when a write starts are written with it, and
+    flushed once.
+
+    Args:
+        stdin: The text stream to read messages from. Defaults to the process's stdin, as UTF-8.
+        stdout: The binary stream to write messages to. Defaults to the process's stdout.
+        chunk_size: Most bytes of a message handed to stdout in one write.
+    """
+    if not stdin:
+        stdin = anyio.wrap_file(TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace"))
+    if not stdout:
+        stdout = sys.stdout.buffer
+
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+
+    async def stdin_reader():
+        try:
+            async with read_stream_writer:
+                async for line in stdin:
+                    try:
+                        message = types.JSONRPCMessage.model_validate_json(line)
+                    except Exception as exc:
+                        await read_stream_writer.send(exc)
+                        continue
+                    await read_stream_writer.send(SessionMessage(message))
+        except anyio.ClosedResourceError:
+            await anyio.lowlevel.checkpoint()
+
+    async def stdout_writer():
+        try:
+            async with write_stream_reader:
+                async for session_message in write_stream_reader:
+                    batch = [session_message]
+                    while len(batch) < _MAX_BATCH:
+                        try:
+                            batch.append(write_stream_reader.receive_nowait())
+                        except (anyio.WouldBlock, anyio.EndOfStream):
+                            break
+                    await anyio.to_thread.run_sync(write_messages, stdout, batch, chunk_size)
+        except anyio.ClosedResourceError:
+            await anyio.lowlevel.checkpoint()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(stdin_reader)
+        tg.start_soon(stdout_writer)
+        yield read_stream, write_stream
+
+
+async def run_stdio_async(mcp: FastMCP) -> None:
+    """Run a FastMCP server over stdio, writing responses in chunks of `configs.stdio_write_chunk_size` bytes."""
+    async with stdio_server(chunk_size=configs.stdio_write_chunk_size) as (read_stream, write_stream):
+        await mcp._mcp_server.run(
+            read_stream,
+            write_stream,
+            mcp._mcp_server.create_initialization_options(),
+        )
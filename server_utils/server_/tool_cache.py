@@ -0,0 +1,298 @@
+import asyncio
+from collections import OrderedDict
+import copy
+from dataclasses import dataclass
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+from pathlib import Path
+import pickle
+import threading
+from typing import Any, Callable
+
+
+from configs import configs, Configs
+from logger import mcp_logger
+
+
+MEMOIZE_ATTR = "__tool_memoize__"
+
+
+@dataclass(frozen=True)
+class MemoizeSpec:
+    """How a memoized tool's calls are cached."""
+    paths: tuple[str, ...] | None = None
+    persist: bool = False
+
+
+def memoize(func: Callable | None = None, *, paths: tuple[str, ...] | list[str] | None = None, persist: bool = False) -> Callable:
+    """
+    Mark a tool function as deterministic, so repeated calls with the same inputs return a cached result.
+
+    The decorator only marks the function. The tool cache honours it when the tool is registered.
+    A call's inputs are its arguments, plus the contents of the files and directories they refer to,
+    so editing a referenced file invalidates the cached result.
+
+    Args:
+        func: The tool function.
+        paths: Names of the arguments that are file or directory paths. By default, any argument
+            whose value is the path of an existing file is treated as one. Directories are only
+            hashed if named here, since hashing one means reading every file under it.
+        persist: Also keep results on disk, so they survive server restarts. Results must be picklable.
+
+    Example:
+        >>> @memoize(paths=("file_path",))
+        ... def extract_function_stubs(file_path: str) -> list[str]:
+        ...     ...
+    """
+    spec = MemoizeSpec(paths=tuple(paths) if paths is not None else None, persist=persist)
+
+    def mark(func: Callable) -> Callable:
+        setattr(func, MEMOIZE_ATTR, spec)
+        return func
+
+    return mark(func) if func is not None else mark
+
+
+class ToolCache:
+    """
+    Caches the results of tools marked with `@memoize`, keyed on their arguments and the contents of the paths they refer to.
+
+    Results are kept in a size-bounded LRU of `configs.tool_cache_max_entries` entries.
+    Tools marked with `persist=True` also keep results in `.cache/tool_cache`, bounded to
+    `configs.tool_cache_max_disk_entries` files. File contents are only re-hashed when
+    their size or modification time changes. Exceptions are never cached. Each caller gets
+    its own deep copy of a cached result.
+    """
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger: logging.Logger = self.resources['logger']
+        self._dir: Path = self.configs.ROOT_DIR / ".cache" / "tool_cache"
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._file_digests: dict[str, tuple[int, int, str]] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def spec(func: Callable) -> MemoizeSpec | None:
+        """The memoize spec of a tool function, or None if it isn't memoized."""
+        return getattr(func, MEMOIZE_ATTR, None)
+
+    def _file_digest(self, path: str) -> str:
+        stat = os.stat(path)
+        cached = self._file_digests.get(path)
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        self._file_digests[path] = (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+        return digest.hexdigest()
+
+    def _path_digest(self, path: str) -> str:
+        """Digest of a file's contents, or of the names and contents of every file under a directory."""
+        path = os.path.abspath(path)
+        if os.path.isfile(path):
+            return self._file_digest(path)
+        if not os.path.isdir(path):
+            return "missing"
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file = os.path.join(root, name)
+                try:
+                    digest.update(f"{os.path.relpath(file, path)}\0{self._file_digest(file)}\0".encode("utf-8"))
+                except OSError:
+                    continue
+        return digest.hexdigest()
+
+    def _key(self, func: Callable, spec: MemoizeSpec, args: tuple, kwargs: dict) -> str:
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+
+        if spec.paths is not None:
+            path_args = {name: arguments[name] for name in spec.paths if arguments.get(name) is not None}
+        else:
+            path_args = {
+                name: value for name, value in arguments.items()
+                if isinstance(value, (str, os.PathLike)) and str(value) and os.path.isfile(value)
+            }
+        # The tool's own source is an input too, so editing the tool invalidates its results.
+        source_file = inspect.getsourcefile(func)
+        digests = {name: self._path_digest(os.fspath(value)) for name, value in path_args.items()}
+        key = json.dumps({
+            "tool": f"{func.__module__}.{func.__qualname__}",
+            "source": self._file_digest(source_file) if source_file else None,
+            "arguments": arguments,
+            "paths": digests,
+        }, sort_keys=True, default=repr)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _count(self, name: str, outcome: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(name, {"hits": 0, "misses": 0})
+            stats[outcome] += 1
+
+    def _get(self, key: str, spec: MemoizeSpec) -> tuple[bool, Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return True, self._entries[key]
+        if spec.persist:
+            try:
+                with open(self._dir / f"{key}.pickle", "rb") as f:
+                    result = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+                return False, None
+            self._put(key, result, persist=False)
+            return True, result
+        return False, None
+
+    def _put(self, key: str, result: Any, persist: bool) -> None:
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.configs.tool_cache_max_entries:
+                self._entries.popitem(last=False)
+        if persist:
+            self._save(key, result)
+
+    def _save(self, key: str, result: Any) -> None:
+        self._dir.mkdir(parents=True, exist_ok=True)
+        path = self._dir / f"{key}.pickle"
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(result, f)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+            self._logger.warning(f"Could not persist cached tool result: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        files = sorted(self._dir.glob("*.pickle"), key=lambda file: file.stat().st_mtime_ns)
+        for file in files[:max(len(files) - self.configs.tool_cache_max_disk_entries, 0)]:
+            file.unlink(missing_ok=True)
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Call a tool, returning its cached result if it is memoized and was called with the same inputs before.
+
+        Args:
+            func: The tool function.
+            *args: Positional arguments to pass to the function.
+            **kwargs: Keyword arguments to pass to the function.
+        """
+        return self._call(func, func, args, kwargs)
+
+    def _lookup(self, real: Callable, spec: MemoizeSpec, args: tuple, kwargs: dict) -> tuple[str | None, bool, Any]:
+        """Return the call's cache key, or None if it can't be cached, whether it was a hit, and the cached result."""
+        try:
+            key = self._key(real, spec, args, kwargs)
+        except (TypeError, OSError) as e:
+            # Arguments that don't bind, or paths that can't be read. Let the tool report it.
+            self._logger.debug(f"Not caching call to '{real.__name__}': {e}")
+            return None, False, None
+
+        hit, result = self._get(key, spec)
+        if hit:
+            self._count(real.__name__, "hits")
+            return key, True, copy.deepcopy(result)
+        self._count(real.__name__, "misses")
+        return key, False, None
+
+    def _store(self, real: Callable, spec: MemoizeSpec, key: str, result: Any) -> None:
+        # Callers get their own copy, so one mutating its result can't change what the others get.
+        try:
+            cached = copy.deepcopy(result)
+        except Exception as e:
+            self._logger.debug(f"Not caching result of '{real.__name__}', since it can't be copied: {e}")
+            return
+        self._put(key, cached, persist=spec.persist)
+
+    def _call(self, real: Callable, func: Callable, args: tuple, kwargs: dict) -> Any:
+        """Cache on the real function's inputs, but call through `func`, which may be a wrapper or proxy of it."""
+        spec = self.spec(real)
+        if spec is None:
+            return func(*args, **kwargs)
+        key, hit, result = self._lookup(real, spec, args, kwargs)
+        if hit:
+            return result
+        result = func(*args, **kwargs)
+        if key is not None:
+            self._store(real, spec, key, result)
+        return result
+
+    async def _acall(self, real: Callable, func: Callable, args: tuple, kwargs: dict) -> Any:
+        """Like `_call`, for coroutine functions. Hashing and disk access run on a thread, off the event loop."""
+        spec = self.spec(real)
+        if spec is None:
+            return await func(*args, **kwargs)
+        key, hit, result = await asyncio.to_thread(self._lookup, real, spec, args, kwargs)
+        if hit:
+            return result
+        result = await func(*args, **kwargs)
+        if key is not None:
+            await asyncio.to_thread(self._store, real, spec, key, result)
+        return result
+
+    def wrap(self, func: Callable, call: Callable | None = None) -> Callable:
+        """Wrap a tool function so its calls are cached if it is memoized.
+
+        The check is made on each call, after the real function is loaded,
+        so it works for lazily registered tools and picks up reloaded modules.
+
+        Args:
+            func: The tool function or coroutine function, or a lazy proxy with a `load` attribute.
+            call: What to call on a cache miss, e.g. `func` routed to a worker process. Defaults to `func`.
+
+        Returns:
+            Callable: A function of the same kind, with the same name, docstring and `load` attribute.
+        """
+        load = getattr(func, "load", None)
+        call = func if call is None else call
+
+        if asyncio.iscoroutinefunction(func):
+            async def cached(*args, **kwargs):
+                real = load() if load is not None else func
+                return await self._acall(real, call, args, kwargs)
+        else:
+            def cached(*args, **kwargs):
+                real = load() if load is not None else func
+                return self._call(real, call, args, kwargs)
+
+        functools.update_wrapper(cached, func)
+        return cached
+
+    def stats(self) -> dict[str, Any]:
+        """Hit and miss counts, overall and for each memoized tool."""
+        with self._lock:
+            tools = {name: dict(counts) for name, counts in self._stats.items()}
+            entries = len(self._entries)
+        hits = sum(counts["hits"] for counts in tools.values())
+        misses = sum(counts["misses"] for counts in tools.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": entries,
+            "tools": tools,
+        }
+
+    def clear(self) -> None:
+        """Drop every cached result from memory."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Create singleton instance of ToolCache.
+resources = {
+    'logger': mcp_logger
+}
+tool_cache = ToolCache(configs=configs, resources=resources)
@@ -0,0 +1,199 @@
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+import threading
+from typing import Any, Callable
+
+
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.tools.base import Tool
+from mcp.server.fastmcp.utilities.context_injection import find_context_parameter
+from mcp.server.fastmcp.utilities.func_metadata import FuncMetadata, func_metadata
+
+
+from configs import configs, Configs
+from logger import mcp_logger
+from server_utils.server_.lazy_tools import make_proxy
+
+
+_MANIFEST_VERSION = 1
+
+
+def _hash_source(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class _ManifestTool(Tool):
+    """
+    A FastMCP tool rebuilt from a manifest entry instead of from its function.
+
+    The argument and output schemas come from the manifest. The pydantic models
+    FastMCP validates arguments with are only built from the real function,
+    importing its module, the first time the tool is run.
+    """
+    fn_metadata: FuncMetadata | None = None
+    cached_output_schema: dict[str, Any] | None = None
+
+    @property
+    def output_schema(self) -> dict[str, Any] | None:
+        if self.fn_metadata is not None:
+            return self.fn_metadata.output_schema
+        return self.cached_output_schema
+
+    async def run(self, arguments: dict[str, Any], context: Any = None, convert_result: bool = False) -> Any:
+        if self.fn_metadata is None:
+            func = self.fn.load()
+            self.context_kwarg = find_context_parameter(func)
+            self.fn_metadata = func_metadata(
+                func, skip_names=[self.context_kwarg] if self.context_kwarg is not None else []
+            )
+        return await super().run(arguments, context=context, convert_result=convert_result)
+
+
+class ToolManifest:
+    """
+    On-disk manifest of the function tools registered with FastMCP.
+
+    Each entry holds a tool's name, docstring, argument and output JSON schemas and the hash
+    of its source file. A tool whose source file is unchanged can be registered straight
+    from its entry, without reading its source, importing its module or building its
+    pydantic models. Files are first compared by mtime and size, and only hashed if those differ.
+    """
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger = self.resources['logger']
+        self._path: Path = self.configs.ROOT_DIR / "tools" / "functions" / ".tool_manifest.json"
+        self._entries: dict[str, dict[str, Any]] | None = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self._entries is None:
+            try:
+                data = json.loads(self._path.read_text(encoding="utf-8"))
+                self._entries = data["tools"] if data.get("version") == _MANIFEST_VERSION else {}
+            except (OSError, ValueError, KeyError, AttributeError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, file: Path) -> dict[str, Any] | None:
+        """Get the manifest entry for a tool file, if the file is unchanged since it was recorded.
+
+        Args:
+            file: The tool's source file.
+
+        Returns:
+            dict[str, Any] | None: The entry, or None if there is none or the file changed.
+        """
+        with self._lock:
+            entry = self._load().get(file.stem)
+            if entry is None:
+                return None
+            try:
+                stat = file.stat()
+                if stat.st_mtime_ns == entry["mtime_ns"] and stat.st_size == entry["size"]:
+                    return entry
+                # Touched but possibly unchanged, e.g. after a checkout.
+                if _hash_source(file) != entry["source_hash"]:
+                    return None
+            except OSError:
+                return None
+            entry["mtime_ns"], entry["size"] = stat.st_mtime_ns, stat.st_size
+            self._dirty = True
+            return entry
+
+    def record(self, file: Path, tool: Tool, module_name: str) -> None:
+        """Record a tool that was registered from its source file.
+
+        Args:
+            file: The tool's source file.
+            tool: The tool as registered with FastMCP.
+            module_name: The fully qualified name of the tool function's module.
+        """
+        try:
+            stat = file.stat()
+            source_hash = _hash_source(file)
+        except OSError:
+            return
+        # Synchronous tools are registered wrapped in a coroutine function that runs them on a thread.
+        fn = inspect.unwrap(tool.fn)
+        with self._lock:
+            self._load()[file.stem] = {
+                "name": tool.name,
+                "module_name": module_name,
+                "func_name": fn.__name__,
+                "description": tool.description,
+                "parameters": tool.parameters,
+                "output_schema": tool.output_schema,
+                "is_async": inspect.iscoroutinefunction(fn),
+                "source_hash": source_hash,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+            }
+            self._dirty = True
+
+    def prune(self, files: list[Path]) -> None:
+        """Drop the entries of tool files that no longer exist."""
+        with self._lock:
+            stems = {file.stem for file in files}
+            entries = self._load()
+            for stem in [stem for stem in entries if stem not in stems]:
+                del entries[stem]
+                self._dirty = True
+
+    def save(self) -> None:
+        """Write the manifest to disk atomically, if it changed since it was loaded."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self._path.with_name(f"{self._path.name}.{os.getpid()}.tmp")
+            try:
+                tmp_path.write_text(
+                    json.dumps({"version": _MANIFEST_VERSION, "tools": self._entries}, indent=2),
+                    encoding="utf-8",
+                )
+                os.replace(tmp_path, self._path)
+            except (OSError, TypeError, ValueError) as e:
+                self._logger.warning(f"Could not write tool manifest to {self._path}: {e}")
+                tmp_path.unlink(missing_ok=True)
+                return
+            self._dirty = False
+
+    @staticmethod
+    def make_tool(entry: dict[str, Any]) -> Tool:
+        """Build a FastMCP tool from a manifest entry, without importing the tool's module.
+
+        Args:
+            entry: A manifest entry returned by `get`.
+
+        Returns:
+            Tool: A tool whose function imports the real one on its first call.
+        """
+        proxy = make_proxy(entry["module_name"], entry["func_name"], entry["description"], entry["is_async"])
+        return _ManifestTool(
+            fn=proxy,
+            name=entry["name"],
+            description=entry["description"],
+            parameters=entry["parameters"],
+            cached_output_schema=entry["output_schema"],
+            is_async=entry["is_async"],
+        )
+
+    @staticmethod
+    def get_registered_tool(mcp: FastMCP, name: str) -> Tool | None:
+        """Get a tool as registered with FastMCP, or None if it isn't a FastMCP tool."""
+        tool_manager = getattr(mcp, "_tool_manager", None)
+        tool = tool_manager.get_tool(name) if tool_manager is not None else None
+        return tool if isinstance(tool, Tool) else None
+
+
+# Create singleton instance of ToolManifest.
+resources = {
+    'logger': mcp_logger
+}
+tool_manifest = ToolManifest(configs=configs, resources=resources)
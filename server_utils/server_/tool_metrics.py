@@ -0,0 +1,289 @@
+import asyncio
+from bisect import bisect_left
+import functools
+import json
+import logging
+import math
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any, Callable
+
+
+from mcp.server.fastmcp import FastMCP
+
+
+from configs import configs, Configs
+from logger import mcp_logger
+
+
+METRICS_URI = "metrics://tools"
+
+_SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_BYTES_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class Histogram:
+    """A fixed-bucket histogram, as in Prometheus, that also tracks the largest value seen."""
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating within the bucket it falls in."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class _ToolStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.truncations = 0
+        self.wall_seconds = Histogram(_SECONDS_BUCKETS)
+        self.cpu_seconds = Histogram(_SECONDS_BUCKETS)
+        self.output_bytes = Histogram(_BYTES_BUCKETS)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class ToolMetrics:
+    """
+    Per-tool call counts, errors, truncations and histograms of wall time, CPU time and output size.
+
+    CPU time is the time spent by the thread that ran the tool, so it is only recorded for
+    synchronous tools, and covers only the dispatch for tools run in worker processes.
+    Output size is recorded where a served tool's result is converted to content, with
+    `record_output`, so results aren't serialized a second time just to measure them.
+    The metrics are exposed as the `metrics://tools` resource and the `server_stats` tool,
+    and written in Prometheus text format to `configs.metrics_prometheus_path` if it is set.
+    """
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger: logging.Logger = self.resources['logger']
+        self._tools: dict[str, _ToolStats] = {}
+        self._lock = threading.Lock()
+        self._exporter: threading.Thread | None = None
+        self._stop_exporting = threading.Event()
+        # Labels added to every exported series, e.g. the worker when several serve at once.
+        self.labels: dict[str, str] = {}
+
+    def _get(self, name: str) -> _ToolStats:
+        stats = self._tools.get(name)
+        if stats is None:
+            stats = self._tools[name] = _ToolStats()
+        return stats
+
+    def observe(self,
+                name: str,
+                wall_seconds: float,
+                cpu_seconds: float | None = None,
+                output_bytes: int | None = None,
+                error: bool = False
+                ) -> None:
+        """Record one call of a tool.
+
+        Args:
+            name: The tool's name.
+            wall_seconds: How long the call took.
+            cpu_seconds: CPU time the call used, if known.
+            output_bytes: Size of the call's output, if it returned one.
+            error: Whether the call failed.
+        """
+        with self._lock:
+            stats = self._get(name)
+            stats.calls += 1
+            stats.errors += error
+            stats.wall_seconds.observe(wall_seconds)
+            if cpu_seconds is not None:
+                stats.cpu_seconds.observe(cpu_seconds)
+            if output_bytes is not None:
+                stats.output_bytes.observe(output_bytes)
+
+    def record_output(self, name: str, output_bytes: int) -> None:
+        """Record the size of a tool call's output, once it has been converted to content."""
+        with self._lock:
+            self._get(name).output_bytes.observe(output_bytes)
+
+    def record_truncation(self, name: str) -> None:
+        """Record that a tool's output was truncated."""
+        with self._lock:
+            self._get(name).truncations += 1
+
+    def instrument(self, name: str, func: Callable) -> Callable:
+        """Wrap a tool function so each call's wall time, CPU time and failure are recorded.
+
+        Args:
+            name: The tool's name.
+            func: The tool function or coroutine function.
+
+        Returns:
+            Callable: A function of the same kind, with the same name, docstring and `load` attribute.
+        """
+        if asyncio.iscoroutinefunction(func):
+            async def instrumented(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException:
+                    self.observe(name, time.perf_counter() - start, error=True)
+                    raise
+                self.observe(name, time.perf_counter() - start)
+                return result
+        else:
+            def instrumented(*args, **kwargs):
+                start, cpu_start = time.perf_counter(), time.thread_time()
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException:
+                    self.observe(name, time.perf_counter() - start, time.thread_time() - cpu_start, error=True)
+                    raise
+                self.observe(name, time.perf_counter() - start, time.thread_time() - cpu_start)
+                return result
+
+        functools.update_wrapper(instrumented, func)
+        return instrumented
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Counts and histogram summaries (count, sum, mean, p50, p95, p99, max) for each tool."""
+        with self._lock:
+            return {
+                name: {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "truncations": stats.truncations,
+                    "wall_seconds": stats.wall_seconds.summary(),
+                    "cpu_seconds": stats.cpu_seconds.summary(),
+                    "output_bytes": stats.output_bytes.summary(),
+                }
+                for name, stats in sorted(self._tools.items())
+            }
+
+    def _label_set(self, name: str) -> str:
+        labels = {"tool": name, **self.labels}
+        return ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+
+    def to_prometheus(self) -> str:
+        """The metrics in Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            tools = sorted(self._tools.items())
+            for metric, help_text, attribute in (
+                ("mcp_tool_calls_total", "Tool calls.", "calls"),
+                ("mcp_tool_errors_total", "Tool calls that failed.", "errors"),
+                ("mcp_tool_truncations_total", "Tool calls whose output was truncated.", "truncations"),
+            ):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                lines += [f'{metric}{{{self._label_set(name)}}} {getattr(stats, attribute)}' for name, stats in tools]
+
+            for metric, help_text, attribute in (
+                ("mcp_tool_wall_seconds", "Wall time of tool calls.", "wall_seconds"),
+                ("mcp_tool_cpu_seconds", "CPU time of synchronous tool calls.", "cpu_seconds"),
+                ("mcp_tool_output_bytes", "Size of tool outputs.", "output_bytes"),
+            ):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for name, stats in tools:
+                    histogram: Histogram = getattr(stats, attribute)
+                    label_set = self._label_set(name)
+                    cumulative = 0
+                    for bound, count in zip((*histogram.buckets, math.inf), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else repr(float(bound))
+                        lines.append(f'{metric}_bucket{{{label_set},le="{le}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{{label_set}}} {histogram.sum!r}')
+                    lines.append(f'{metric}_count{{{label_set}}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str | Path) -> None:
+        """Write the metrics in Prometheus text format to a file, atomically, e.g. for node_exporter's textfile collector."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(self.to_prometheus(), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self._logger.warning(f"Could not export tool metrics to {path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def start_exporting(self, path: str | Path, interval: float) -> None:
+        """Export the metrics to a file every `interval` seconds on a background thread."""
+        if self._exporter is not None:
+            return
+        self._stop_exporting.clear()
+
+        def export_periodically() -> None:
+            while not self._stop_exporting.wait(interval):
+                self.export(path)
+            self.export(path)
+
+        self._exporter = threading.Thread(target=export_periodically, name="tool_metrics_exporter", daemon=True)
+        self._exporter.start()
+
+    def stop_exporting(self) -> None:
+        """Stop the background exporter, after a final export."""
+        if self._exporter is None:
+            return
+        self._stop_exporting.set()
+        self._exporter.join()
+        self._exporter = None
+
+    def register_resource(self, mcp: FastMCP) -> None:
+        """Expose the metrics as the `metrics://tools` resource."""
+        def read_tool_metrics() -> str:
+            return json.dumps(self.snapshot(), indent=2)
+
+        mcp.resource(
+            METRICS_URI,
+            name="tool_metrics",
+            description="Per-tool call counts, errors, truncations, and wall time, CPU time and output size histograms.",
+            mime_type="application/json",
+        )(read_tool_metrics)
+
+    def reset(self) -> None:
+        """Drop every recorded metric."""
+        with self._lock:
+            self._tools.clear()
+
+
+# Create singleton instance of ToolMetrics.
+resources = {
+    'logger': mcp_logger
+}
+tool_metrics = ToolMetrics(configs=configs, resources=resources)
@@ -0,0 +1,180 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import functools
+import importlib
+import logging
+import multiprocessing
+import sys
+import threading
+from typing import Any, Callable
+
+
+from configs import configs, Configs
+from logger import mcp_logger
+
+
+# Module-level flag a tool's module sets to run the tool in a worker process.
+RUN_IN_PROCESS_FLAG = "RUN_IN_PROCESS"
+
+
+def _preload(module_names: tuple[str, ...]) -> None:
+    """Import a tool's module and its dependencies when a worker process starts."""
+    for module_name in module_names:
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            # The tool call will raise the import error itself.
+            pass
+
+
+def _call_in_worker(module_name: str, func_name: str, args: tuple, kwargs: dict) -> Any:
+    """Look up a tool function in a worker process and call it."""
+    func = getattr(importlib.import_module(module_name), func_name)
+    return func(*args, **kwargs)
+
+
+class ToolProcessPool:
+    """
+    Warm worker processes for CPU-heavy function tools, so they don't hold the server's GIL.
+
+    A tool opts in by setting `RUN_IN_PROCESS = True` in its module. Each such tool gets its
+    own `ProcessPoolExecutor`, whose workers import the tool's module when they start.
+    Arguments and results cross the process boundary by pickle. Calls beyond the number of
+    workers wait their turn before being submitted, so `configs.tool_timeout` times only a
+    call's execution. A call that runs longer has its tool's workers killed; the next call
+    starts new ones. When a tool's module is reloaded, its pool is retired, so new calls run
+    the new code.
+    """
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger: logging.Logger = self.resources['logger']
+        self._executors: dict[str, ProcessPoolExecutor] = {}
+        # One slot per worker for each tool, so a submitted call never waits in the executor's queue.
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        # Spawned rather than forked, since the server process has running threads.
+        self._context = multiprocessing.get_context("spawn")
+
+    @staticmethod
+    def runs_in_process(func: Callable) -> bool:
+        """Whether a tool function's module asks for it to be run in a worker process."""
+        module = sys.modules.get(getattr(func, "__module__", None))
+        return getattr(module, RUN_IN_PROCESS_FLAG, False) is True
+
+    def _get_executor(self, module_name: str) -> ProcessPoolExecutor:
+        with self._lock:
+            executor = self._executors.get(module_name)
+            if executor is None:
+                executor = ProcessPoolExecutor(
+                    max_workers=self.configs.tool_process_pool_workers,
+                    mp_context=self._context,
+                    initializer=_preload,
+                    initargs=((module_name,),),
+                )
+                self._executors[module_name] = executor
+            return executor
+
+    def _get_slots(self, module_name: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slots = self._slots.get(module_name)
+            if slots is None:
+                slots = self._slots[module_name] = threading.BoundedSemaphore(self.configs.tool_process_pool_workers)
+            return slots
+
+    def _kill(self, module_name: str) -> None:
+        """Hard-terminate a tool's worker processes and drop its pool."""
+        with self._lock:
+            executor = self._executors.pop(module_name, None)
+        if executor is None:
+            return
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def retire(self, module_name: str) -> None:
+        """Stop using a tool's worker processes, e.g. because its module was reloaded.
+
+        Calls already running finish on the old workers, which then exit.
+        The next call starts new workers, which import the module afresh.
+        """
+        with self._lock:
+            executor = self._executors.pop(module_name, None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+            self._logger.debug("Retired the worker processes of '%s'", module_name)
+
+    def warm_up(self, func: Callable) -> None:
+        """Start a tool's worker processes ahead of its first call."""
+        executor = self._get_executor(func.__module__)
+        for _ in range(self.configs.tool_process_pool_workers):
+            executor.submit(_preload, ())
+
+    def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a tool function in one of its worker processes and wait for the result.
+
+        Args:
+            func: The tool function. It must be a top-level function of an importable module.
+            *args: Positional arguments to pass to the function. Must be picklable.
+            **kwargs: Keyword arguments to pass to the function. Must be picklable.
+
+        Returns:
+            Any: The function's return value.
+
+        Raises:
+            TimeoutError: If the call ran longer than `configs.tool_timeout`, not counting
+                the time it waited for a free worker. The tool's worker processes are killed.
+        """
+        module_name, func_name = func.__module__, func.__name__
+        with self._get_slots(module_name):
+            future = self._get_executor(module_name).submit(_call_in_worker, module_name, func_name, args, kwargs)
+            try:
+                return future.result(timeout=self.configs.tool_timeout)
+            except FutureTimeoutError:
+                self._kill(module_name)
+                self._logger.error(f"Tool '{func_name}' timed out after {self.configs.tool_timeout} s. Killed its worker processes.")
+                raise TimeoutError(f"Tool '{func_name}' timed out after {self.configs.tool_timeout} seconds.")
+
+    def route(self, func: Callable) -> Callable:
+        """Wrap a synchronous tool function so it runs in a worker process if its module opts in.
+
+        The check is made on each call, after the real function is loaded,
+        so it works for lazily registered tools and picks up reloaded modules.
+
+        Args:
+            func: The tool function, or a lazy proxy with a `load` attribute.
+
+        Returns:
+            Callable: A function with the same name, docstring and `load` attribute.
+        """
+        load = getattr(func, "load", None)
+
+        def routed(*args, **kwargs):
+            real = load() if load is not None else func
+            if self.runs_in_process(real):
+                return self.run(real, *args, **kwargs)
+            return func(*args, **kwargs)
+
+        functools.update_wrapper(routed, func)
+        return routed
+
+    def reset_after_fork(self) -> None:
+        """Forget the parent's worker processes in a forked child process. They are started again when needed."""
+        self._executors = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def shutdown(self) -> None:
+        """Stop every tool's worker processes."""
+        with self._lock:
+            module_names = list(self._executors)
+        for module_name in module_names:
+            self._kill(module_name)
+
+
+# Create singleton instance of ToolProcessPool.
+resources = {
+    'logger': mcp_logger
+}
+tool_process_pool = ToolProcessPool(configs=configs, resources=resources)
@@ -0,0 +1,289 @@
+import asyncio
+from dataclasses import dataclass
+import importlib
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable
+
+
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.tools.base import Tool
+
+
+from configs import configs, Configs
+from logger import mcp_logger
+from server_utils.server_.tool_cache import tool_cache, ToolCache
+from server_utils.server_.tool_metrics import tool_metrics, ToolMetrics
+from server_utils.server_.tool_process_pool import tool_process_pool, ToolProcessPool
+from server_utils.server_.tool_single_flight import tool_single_flight, ToolSingleFlight
+from server_utils.server_.tool_tracing import tool_tracer, ToolTracer
+from server_utils.server_.tool_thread_pool import tool_thread_pool, ToolThreadPool
+
+
+@dataclass
+class _ModuleState:
+    """Source file state and reload statistics for one tool module."""
+    path: str
+    mtime_ns: int
+    reloads: int = 0
+    errors: int = 0
+    total_reload_seconds: float = 0.0
+    last_reload_seconds: float = 0.0
+    last_reloaded_at: float | None = None
+
+
+class ToolRegistry:
+    """
+    Registry of function tools that reloads a tool's module only when its source file changes.
+
+    Source files are tracked by mtime. A changed module is reloaded either by the background
+    watcher thread, or on demand when a tool from it is about to run. After a reload, the
+    module's tools are re-registered with FastMCP so that changes to their signatures
+    and docstrings are picked up as well.
+
+    Synchronous tools are run on the tool thread pool, so they don't block FastMCP's event loop.
+    Those whose module sets `RUN_IN_PROCESS = True` are run in worker processes instead.
+    Calls to tools marked with `@memoize` are answered from the tool cache when their inputs are unchanged.
+    Identical calls to a tool that are in flight at the same time share one execution.
+    Every call's wall time, CPU time, output size and failure are recorded in the tool metrics,
+    and traced as an "execute" span when tracing is enabled.
+    """
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger: logging.Logger = self.resources['logger']
+        self._tool_thread_pool: ToolThreadPool = self.resources['tool_thread_pool']
+        self._tool_process_pool: ToolProcessPool = self.resources['tool_process_pool']
+        self._tool_cache: ToolCache = self.resources['tool_cache']
+        self._tool_single_flight: ToolSingleFlight = self.resources['tool_single_flight']
+        self._tool_metrics: ToolMetrics = self.resources['tool_metrics']
+        self._tool_tracer: ToolTracer = self.resources['tool_tracer']
+        self._mcp: FastMCP | None = None
+        self._modules: dict[str, _ModuleState] = {}
+        self._tools: dict[str, dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+
+    def _track(self, module_name: str) -> _ModuleState | None:
+        """Start tracking a module's source file, if it has one."""
+        state = self._modules.get(module_name)
+        if state is not None:
+            return state
+
+        path = getattr(sys.modules.get(module_name), "__file__", None)
+        if path is None:
+            return None
+        try:
+            state = _ModuleState(path=path, mtime_ns=os.stat(path).st_mtime_ns)
+        except OSError:
+            return None
+        self._modules[module_name] = state
+        return state
+
+    def add_tool(self, mcp: FastMCP, func: Callable, name: str, description: str, tool: Tool | None = None) -> None:
+        """Register a function tool with FastMCP and track its module for changes.
+
+        Args:
+            mcp: The FastMCP server instance to register the tool with.
+            func: The tool function.
+            name: The name of the tool.
+            description: The description of the tool.
+            tool: A prebuilt FastMCP tool for `func`, registered as is instead of building one.
+        """
+        with self._lock:
+            self._mcp = mcp
+            self._register(mcp, func, name, description, tool)
+            self._tools[name] = {"module_name": func.__module__, "func_name": func.__name__}
+            self._track(func.__module__)
+
+    def _register(self, mcp: FastMCP, func: Callable, name: str, description: str, tool: Tool | None = None) -> None:
+        """Register a tool with FastMCP, with synchronous tools run on the tool thread pool and identical concurrent calls coalesced."""
+        if tool is None:
+            mcp.add_tool(func, name=name, description=description)
+            tool_manager = getattr(mcp, "_tool_manager", None)
+            tool = tool_manager.get_tool(name) if tool_manager is not None else None
+        else:
+            mcp._tool_manager._tools[name] = tool
+
+        # FastMCP would call a synchronous tool on its event loop. The argument model
+        # was already built from the real function, so only the call is swapped out.
+        if isinstance(tool, Tool) and not tool.is_async:
+            routed = self._tool_process_pool.route(tool.fn)
+            # Instrumented on the thread the tool runs on, so its CPU time can be measured.
+            instrumented = self._tool_metrics.instrument(name, self._tool_cache.wrap(tool.fn, call=routed))
+            fn = self._tool_thread_pool.offload(instrumented)
+            tool.fn = fn
+            tool.is_async = asyncio.iscoroutinefunction(fn)
+            if self._tool_process_pool.runs_in_process(func):
+                self._tool_process_pool.warm_up(func)
+        elif isinstance(tool, Tool):
+            fn = self._tool_metrics.instrument(name, self._tool_cache.wrap(tool.fn))
+            tool.fn = fn
+
+        # Identical calls made while one is running, e.g. client retries, wait for it instead of running again.
+        if isinstance(tool, Tool) and tool.is_async:
+            fn = self._tool_single_flight.wrap(name, tool.fn)
+            tool.fn = fn
+
+        # Outermost, so the time from the call's start until FastMCP enters the tool is its argument validation.
+        if isinstance(tool, Tool):
+            fn = self._tool_tracer.wrap(name, tool.fn)
+            tool.fn = fn
+
+    def _remove_tool(self, name: str) -> None:
+        tool_manager = self._mcp._tool_manager
+        if hasattr(tool_manager, "remove_tool"):
+            tool_manager.remove_tool(name)
+        else:
+            tool_manager._tools.pop(name, None)
+
+    def _reregister(self, module_name: str) -> None:
+        """Re-register every tool from a freshly reloaded module with FastMCP."""
+        if self._mcp is None:
+            return
+        module = sys.modules[module_name]
+        for name, tool in self._tools.items():
+            if tool["module_name"] != module_name:
+                continue
+            self._remove_tool(name)
+            func = getattr(module, tool["func_name"], None)
+            if not inspect.isfunction(func) or not func.__doc__:
+                self._logger.warning(f"Tool '{name}' is no longer a documented function after reload. Unregistered it.")
+                continue
+            self._register(self._mcp, func, name, func.__doc__)
+
+    def _check(self, module_name: str) -> bool:
+        """Reload a module if its source file changed since it was last loaded.
+
+        Returns:
+            bool: True if the module was reloaded.
+        """
+        with self._lock:
+            state = self._track(module_name)
+            if state is None:
+                return False
+            try:
+                mtime_ns = os.stat(state.path).st_mtime_ns
+            except OSError:
+                return False
+            if mtime_ns == state.mtime_ns:
+                return False
+
+            # Record the new mtime up front, so a broken file isn't reloaded on every call.
+            state.mtime_ns = mtime_ns
+            start = time.perf_counter()
+            try:
+                importlib.reload(sys.modules[module_name])
+                # Worker processes imported the old code, so they're replaced before the tools are warmed up again.
+                self._tool_process_pool.retire(module_name)
+                self._reregister(module_name)
+            except Exception as e:
+                state.errors += 1
+                self._logger.error(f"Failed to reload module '{module_name}': {e}")
+                return False
+
+            elapsed = time.perf_counter() - start
+            state.reloads += 1
+            state.total_reload_seconds += elapsed
+            state.last_reload_seconds = elapsed
+            state.last_reloaded_at = time.time()
+            self._logger.info(f"Reloaded module '{module_name}' in {elapsed * 1000:.1f} ms (reload #{state.reloads})")
+            return True
+
+    def refresh(self, func: Callable) -> Callable:
+        """Get the latest version of a tool function.
+
+        The function's module is reloaded only if its source file changed.
+
+        Args:
+            func: The tool function, possibly from an older version of its module.
+
+        Returns:
+            Callable: The function from the current version of its module.
+        """
+        module_name = func.__module__
+        self._check(module_name)
+
+        # Only top-level functions can be looked up again by name.
+        if getattr(func, "__qualname__", None) != getattr(func, "__name__", None):
+            return func
+        current = getattr(sys.modules.get(module_name), func.__name__, None)
+        return current if callable(current) else func
+
+    def check_all(self) -> int:
+        """Reload every tracked module whose source changed.
+
+        Returns:
+            int: The number of modules reloaded.
+        """
+        with self._lock:
+            # Lazily registered tools are only tracked once their module has been imported.
+            module_names = set(self._modules) | {tool["module_name"] for tool in self._tools.values()}
+        return sum(self._check(module_name) for module_name in module_names)
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.check_all()
+            except Exception as e:
+                self._logger.error(f"Tool watcher failed: {e}")
+
+    def start_watching(self, interval: float = 1.0) -> None:
+        """Poll tracked tool modules for changes on a background thread.
+
+        Args:
+            interval: Seconds between polls.
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="tool_watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """Stop the background watcher thread."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def reset_after_fork(self) -> None:
+        """Forget the parent's watcher thread in a forked child process, so it can watch on its own."""
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Reload counts and timings for each tracked module."""
+        with self._lock:
+            return {
+                module_name: {
+                    "path": state.path,
+                    "reloads": state.reloads,
+                    "errors": state.errors,
+                    "total_reload_seconds": state.total_reload_seconds,
+                    "last_reload_seconds": state.last_reload_seconds,
+                    "last_reloaded_at": state.last_reloaded_at,
+                }
+                for module_name, state in self._modules.items()
+            }
+
+
+# Create singleton instance of ToolRegistry.
+resources = {
+    'logger': mcp_logger,
+    'tool_thread_pool': tool_thread_pool,
+    'tool_process_pool': tool_process_pool,
+    'tool_cache': tool_cache,
+    'tool_single_flight': tool_single_flight,
+    'tool_metrics': tool_metrics,
+    'tool_tracer': tool_tracer,
+}
+tool_registry = ToolRegistry(configs=configs, resources=resources)
@@ -0,0 +1,171 @@
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Hashable
+
+
+from mcp.server.fastmcp import FastMCP
+
+
+from configs import configs, Configs
+from logger import mcp_logger
+
+
+@dataclass
+class _Waiter:
+    tool: str
+    future: asyncio.Future
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+class ToolScheduler:
+    """
+    Admits tool calls under a global in-flight cap and per-tool concurrency limits, queuing the rest fairly between clients.
+
+    At most `configs.max_concurrent_tool_calls` calls run at once, and at most the limit in
+    `configs.tool_concurrency_limits` (or `configs.default_tool_concurrency`) of any one tool.
+    0 means unlimited. Waiting calls are queued per client. When a slot frees up, clients
+    take turns: the next client in turn gets its oldest call that can run, so one client
+    sending many calls doesn't hold up the others, and a call waiting for a busy tool doesn't
+    hold up the same client's calls to other tools.
+    """
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger: logging.Logger = self.resources['logger']
+        self._in_flight = 0
+        self._running: dict[str, int] = {}
+        # Clients with waiting calls, in the order they take turns.
+        self._queues: OrderedDict[Hashable, deque[_Waiter]] = OrderedDict()
+        self._admitted = 0
+        self._queued_calls = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _limit(self, tool: str) -> int:
+        return self.configs.tool_concurrency_limits.get(tool, self.configs.default_tool_concurrency)
+
+    def _can_run(self, tool: str) -> bool:
+        max_in_flight = self.configs.max_concurrent_tool_calls
+        limit = self._limit(tool)
+        return (max_in_flight <= 0 or self._in_flight < max_in_flight) and (limit <= 0 or self._running.get(tool, 0) < limit)
+
+    def _start(self, tool: str) -> None:
+        self._in_flight += 1
+        self._running[tool] = self._running.get(tool, 0) + 1
+        self._admitted += 1
+
+    def _dispatch(self) -> None:
+        """Admit waiting calls while there is room, one per client in turn."""
+        admitted = True
+        while admitted and self._queues:
+            admitted = False
+            for client, queue in self._queues.items():
+                waiter = next((waiter for waiter in queue if self._can_run(waiter.tool)), None)
+                if waiter is None:
+                    continue
+                queue.remove(waiter)
+                if not queue:
+                    del self._queues[client]
+                else:
+                    self._queues.move_to_end(client)
+                self._start(waiter.tool)
+                wait = time.perf_counter() - waiter.queued_at
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+                waiter.future.set_result(None)
+                admitted = True
+                break
+
+    async def acquire(self, tool: str, client: Hashable = None) -> None:
+        """Wait until a call to a tool may run. Every acquire must be followed by a `release`.
+
+        Args:
+            tool: The tool's name.
+            client: Identifies the client making the call, for fair queuing. Calls without one share a queue.
+        """
+        if not self._queues and self._can_run(tool):
+            self._start(tool)
+            return
+        waiter = _Waiter(tool, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(client, deque()).append(waiter)
+        self._queued_calls += 1
+        self._logger.debug("Queued call to '%s' with %s calls in flight", tool, self._in_flight)
+        # Other clients' calls are ahead of it, but it may still run now if their tools are at their limits.
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as the caller was cancelled; give the slot back.
+                self.release(tool)
+            else:
+                queue = self._queues.get(client)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[client]
+            raise
+
+    def release(self, tool: str) -> None:
+        """Free a tool call's slot and admit waiting calls."""
+        self._in_flight -= 1
+        self._running[tool] -= 1
+        if not self._running[tool]:
+            del self._running[tool]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, tool: str, client: Hashable = None) -> AsyncIterator[None]:
+        """Hold a slot for a tool call for the duration of the block."""
+        await self.acquire(tool, client)
+        try:
+            yield
+        finally:
+            self.release(tool)
+
+    def schedule_mcp(self, mcp: FastMCP) -> None:
+        """Admit every tool call made through a FastMCP server through the scheduler, with each session as a client."""
+        tool_manager = mcp._tool_manager
+        call_tool = tool_manager.call_tool
+
+        async def scheduled_call_tool(name: str, arguments: dict[str, Any], *args, context=None, **kwargs) -> Any:
+            async with self.slot(name, _client_of(context)):
+                return await call_tool(name, arguments, *args, context=context, **kwargs)
+
+        tool_manager.call_tool = scheduled_call_tool
+
+    def stats(self) -> dict[str, Any]:
+        """Calls running and waiting, and how long admitted calls waited."""
+        return {
+            "in_flight": self._in_flight,
+            "running": dict(self._running),
+            "queued": {str(client): len(queue) for client, queue in self._queues.items()},
+            "admitted": self._admitted,
+            "queued_calls": self._queued_calls,
+            "total_wait_seconds": self._total_wait,
+            "max_wait_seconds": self._max_wait,
+        }
+
+
+def _client_of(context: Any) -> Hashable:
+    """The session a tool call came from, which is one per connected client."""
+    if context is None:
+        return None
+    try:
+        return id(context.session)
+    except (AttributeError, ValueError):
+        # No request is being handled, e.g. a call made outside a session.
+        return None
+
+
+# Create singleton instance of ToolScheduler.
+resources = {
+    'logger': mcp_logger
+}
+tool_scheduler = ToolScheduler(configs=configs, resources=resources)
@@ -0,0 +1,135 @@
+import asyncio
+import functools
+import json
+import logging
+import threading
+from typing import Any, Awaitable, Callable
+
+
+from mcp.server.fastmcp import Context
+
+
+from configs import configs, Configs
+from logger import mcp_logger
+
+
+class ToolSingleFlight:
+    """
+    Deduplicates identical tool calls that are in flight at the same time.
+
+    Calls to the same tool with the same canonicalised arguments share one execution, and every
+    caller receives its result or exception. The execution runs as its own task, so a caller that
+    is cancelled, e.g. a client retrying, doesn't cancel it for the others. Calls are only shared
+    while in flight; nothing is cached once the execution finishes. Calls given a FastMCP `Context`
+    are never shared, since the execution would report progress and log to the first caller's
+    request and session only.
+    """
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger: logging.Logger = self.resources['logger']
+        self._in_flight: dict[tuple, asyncio.Task] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, args: tuple, kwargs: dict) -> tuple | None:
+        """A canonical key for a call, or None if it can't be shared."""
+        if any(isinstance(value, Context) for value in (*args, *kwargs.values())):
+            return None
+        try:
+            arguments = json.dumps([args, kwargs], sort_keys=True, default=_canonical)
+        except (TypeError, ValueError):
+            return None
+        return name, arguments
+
+    def _count(self, name: str, outcome: str) -> None:
+        stats = self._stats.setdefault(name, {"executions": 0, "coalesced": 0})
+        stats[outcome] += 1
+
+    async def run(self, name: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run a coroutine function, or join an identical call of it that is already running.
+
+        Args:
+            name: The tool's name. Only calls to the same tool are shared.
+            func: The coroutine function to run.
+            *args: Positional arguments to pass to the function.
+            **kwargs: Keyword arguments to pass to the function.
+
+        Returns:
+            Any: The result of the shared execution.
+        """
+        key = self._key(name, args, kwargs) if self.configs.coalesce_tool_calls else None
+        if key is None:
+            return await func(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        # Tasks belong to one event loop, so only calls on the same loop are shared.
+        key = (id(loop), *key)
+        with self._lock:
+            task = self._in_flight.get(key)
+            if task is not None and task.get_loop() is loop:
+                self._count(name, "coalesced")
+                self._logger.debug(f"Joined an identical in-flight call to '{name}'")
+            else:
+                task = loop.create_task(func(*args, **kwargs))
+                self._in_flight[key] = task
+                self._count(name, "executions")
+                task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: tuple, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved, in case every caller was cancelled.
+            task.exception()
+
+    def wrap(self, name: str, func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """Wrap a coroutine tool function so identical concurrent calls share one execution.
+
+        Args:
+            name: The tool's name.
+            func: The coroutine function, e.g. a synchronous tool offloaded to the tool thread pool.
+
+        Returns:
+            Callable: A coroutine function with the same name, docstring and `load` attribute.
+        """
+        async def coalesced(*args, **kwargs):
+            return await self.run(name, func, *args, **kwargs)
+
+        functools.update_wrapper(coalesced, func)
+        return coalesced
+
+    def stats(self) -> dict[str, Any]:
+        """Executions run and calls that joined one instead, overall and for each tool."""
+        with self._lock:
+            tools = {name: dict(counts) for name, counts in self._stats.items()}
+            in_flight = len(self._in_flight)
+        return {
+            "executions": sum(counts["executions"] for counts in tools.values()),
+            "coalesced": sum(counts["coalesced"] for counts in tools.values()),
+            "in_flight": in_flight,
+            "tools": tools,
+        }
+
+
+def _canonical(value: Any) -> Any:
+    """Make argument values JSON-serializable for comparison. Anything without a stable form isn't shared."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f"Cannot canonicalise {type(value).__name__}")
+
+
+# Create singleton instance of ToolSingleFlight.
+resources = {
+    'logger': mcp_logger
+}
+tool_single_flight = ToolSingleFlight(configs=configs, resources=resources)
@@ -0,0 +1,152 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import functools
+import logging
+import threading
+from typing import Any, Callable, Coroutine
+
+
+from configs import configs, Configs
+from logger import mcp_logger
+
+
+class ToolThreadPool:
+    """
+    Bounded pool of threads that synchronous tools run on, off the server's event loop.
+
+    FastMCP calls synchronous tool functions directly on its event loop, so one slow tool
+    stalls every other request. Tools registered through the tool registry are instead
+    wrapped with `offload`, which awaits them on this pool. The pool also keeps one event loop
+    on a background thread, for synchronous callers that need to run a coroutine tool while
+    their own thread's loop is running.
+    """
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger: logging.Logger = self.resources['logger']
+        self._executor: ThreadPoolExecutor | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self._running = 0
+        self._queued = 0
+
+    @property
+    def max_workers(self) -> int:
+        return self.configs.tool_thread_pool_workers
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool_worker")
+            return self._executor
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="tool_loop", daemon=True).start()
+            return self._loop
+
+    def _call(self, func: Callable, args: tuple, kwargs: dict) -> Any:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a synchronous function on the pool and await its result.
+
+        Context variables are copied into the worker thread, as with `asyncio.to_thread`.
+        If the pool is disabled, the function is called directly.
+
+        Args:
+            func: The function to run.
+            *args: Positional arguments to pass to the function.
+            **kwargs: Keyword arguments to pass to the function.
+
+        Returns:
+            Any: The function's return value.
+        """
+        if self.max_workers <= 0:
+            return func(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        with self._lock:
+            self._queued += 1
+        return await loop.run_in_executor(
+            self._get_executor(), functools.partial(context.run, self._call, func, args, kwargs)
+        )
+
+    def run_coroutine(self, coro: Coroutine) -> Any:
+        """Run a coroutine on the pool's background event loop and wait for its result.
+
+        This is for synchronous code called from a coroutine, which can't run another coroutine
+        on its own thread's running loop without deadlocking. The calling thread is blocked
+        until the coroutine finishes, so coroutines should await tools instead where they can.
+
+        Args:
+            coro: The coroutine to run.
+
+        Returns:
+            Any: The coroutine's return value.
+
+        Raises:
+            RuntimeError: If called from the background event loop itself, which would deadlock.
+        """
+        loop = self._get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coro.close()
+            raise RuntimeError("Cannot block the tool event loop on itself. Await the coroutine instead.")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def reset_after_fork(self) -> None:
+        """Forget the parent's threads in a forked child process, so the pool starts afresh."""
+        self._executor = None
+        self._loop = None
+        self._lock = threading.Lock()
+        self._running = 0
+        self._queued = 0
+
+    def offload(self, func: Callable) -> Callable:
+        """Wrap a synchronous tool function in a coroutine function that runs it on the pool.
+
+        The wrapper keeps the function's name, docstring and any `load` attribute,
+        and is returned unchanged for coroutine functions or when the pool is disabled.
+
+        Args:
+            func: The tool function.
+
+        Returns:
+            Callable: A coroutine function, or func itself.
+        """
+        if self.max_workers <= 0 or asyncio.iscoroutinefunction(func):
+            return func
+
+        async def offloaded(*args, **kwargs):
+            return await self.run(func, *args, **kwargs)
+
+        functools.update_wrapper(offloaded, func)
+        return offloaded
+
+    def stats(self) -> dict[str, int]:
+        """Number of tool calls running and waiting for a thread."""
+        with self._lock:
+            return {"max_workers": self.max_workers, "running": self._running, "queued": self._queued}
+
+
+# Create singleton instance of ToolThreadPool.
+resources = {
+    'logger': mcp_logger
+}
+tool_thread_pool = ToolThreadPool(configs=configs, resources=resources)
@@ -0,0 +1,268 @@
+import asyncio
+from contextvars import ContextVar
+import functools
+import json
+import logging
+import os
+from pathlib import Path
+import random
+import threading
+import time
+from typing import Any, Callable
+
+
+from mcp.server.fastmcp import FastMCP
+
+
+from configs import configs, Configs
+from logger import mcp_logger
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    """A timed step of a tool call. Use as a context manager; exceptions are recorded and re-raised."""
+
+    __slots__ = ("_tracer", "name", "attributes", "trace_id", "span_id", "parent", "start_time", "start", "end", "children_end", "_token")
+
+    def __init__(self, tracer: "ToolTracer", name: str, attributes: dict[str, Any]) -> None:
+        self._tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.parent: Span | None = None
+        self.trace_id = ""
+        self.span_id = _new_id(32)
+        self.start_time = 0.0
+        self.start = 0.0
+        self.end = 0.0
+        # When the last of this span's children ended, so the time after it can be attributed.
+        self.children_end: float | None = None
+        self._token = None
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes to the span."""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.parent = _current_span.get()
+        self.trace_id = self.parent.trace_id if self.parent is not None else _new_id(64)
+        self.start_time = time.time()
+        self.start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end = time.perf_counter()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        if self.parent is not None:
+            self.parent.children_end = self.end
+        self._tracer._emit(self)
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is disabled, so instrumented code costs one check."""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Span | None] = ContextVar("tool_tracing_span", default=None)
+
+
+class JsonlSink:
+    """Appends spans to a file as JSON lines.
+
+    Args:
+        path: The file to append to. Its directory is created if needed.
+        flush_interval: Most seconds a span is buffered before being written to the file.
+    """
+
+    def __init__(self, path: str | Path, flush_interval: float = 1.0) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def emit(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line)
+            now = time.monotonic()
+            if now - self._last_flush >= self.flush_interval:
+                self._file.flush()
+                self._last_flush = now
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class ToolTracer:
+    """
+    Times the steps of tool calls as nested spans, and hands each finished span to its sinks.
+
+    A sink is any object with an `emit(record: dict)` method, and optionally `close()`.
+    Spans are written as JSON lines to `configs.trace_path` if it is set. Without sinks,
+    tracing is disabled and spans are no-ops. Spans nest through a context variable,
+    so they follow calls across the tool thread pool and into tasks.
+
+    Each record has the span's `name`, `trace_id`, `span_id`, `parent_id`, `start` (Unix time),
+    `duration_ms`, `pid`, `thread` and `attributes`, which include `error` if the step raised.
+    """
+
+    def __init__(self, configs: Configs = None, resources: dict[str, Callable] = None) -> None:
+        self.configs = configs
+        self.resources = resources
+
+        self._logger: logging.Logger = self.resources['logger']
+        self._sinks: list = []
+        self._lock = threading.Lock()
+        if getattr(self.configs, "trace_path", ""):
+            self.add_sink(JsonlSink(self.configs.trace_path))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._sinks)
+
+    def add_sink(self, sink: Any) -> None:
+        """Send finished spans to a sink, enabling tracing."""
+        with self._lock:
+            self._sinks = [*self._sinks, sink]
+
+    def remove_sink(self, sink: Any) -> None:
+        """Stop sending spans to a sink, and close it."""
+        with self._lock:
+            self._sinks = [s for s in self._sinks if s is not sink]
+        if hasattr(sink, "close"):
+            sink.close()
+
+    def close(self) -> None:
+        """Remove and close every sink, disabling tracing."""
+        for sink in list(self._sinks):
+            self.remove_sink(sink)
+
+    def span(self, name: str, **attributes: Any) -> Span | _NoopSpan:
+        """A span timing a step, nested in the current span if there is one.
+
+        Args:
+            name: The step, e.g. "reload", "execute", "truncate" or "serialize".
+            **attributes: Details to record with the span, e.g. the tool's name.
+        """
+        if not self._sinks:
+            return _NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def record(self, name: str, start: float, end: float, **attributes: Any) -> None:
+        """Record a step that was timed elsewhere, as a child of the current span.
+
+        Args:
+            name: The step.
+            start: When the step started, from `time.perf_counter()`.
+            end: When the step ended, from `time.perf_counter()`.
+            **attributes: Details to record with the span.
+        """
+        if not self._sinks:
+            return
+        span = Span(self, name, attributes)
+        span.parent = _current_span.get()
+        span.trace_id = span.parent.trace_id if span.parent is not None else _new_id(64)
+        span.start_time = time.time() - (time.perf_counter() - start)
+        span.start, span.end = start, end
+        self._emit(span)
+
+    def _emit(self, span: Span) -> None:
+        record = {
+            "name": span.name,
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent.span_id if span.parent is not None else None,
+            "start": span.start_time,
+            "duration_ms": (span.end - span.start) * 1000,
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+            "attributes": span.attributes,
+        }
+        for sink in self._sinks:
+            try:
+                sink.emit(record)
+            except Exception as e:
+                self._logger.warning(f"Tracing sink {type(sink).__name__} failed: {e}")
+
+    def _validated(self) -> None:
+        """Record FastMCP's argument validation, from the start of the tool call until the tool is entered."""
+        parent = _current_span.get()
+        if parent is not None and parent.name == "tool_call" and parent.children_end is None:
+            self.record("validate", parent.start, time.perf_counter())
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """Wrap a tool function so each call is traced as an "execute" span.
+
+        Args:
+            name: The tool's name.
+            func: The tool function or coroutine function.
+
+        Returns:
+            Callable: A function of the same kind, with the same name, docstring and `load` attribute.
+        """
+        if asyncio.iscoroutinefunction(func):
+            async def traced(*args, **kwargs):
+                if not self._sinks:
+                    return await func(*args, **kwargs)
+                self._validated()
+                with Span(self, "execute", {"tool": name}):
+                    return await func(*args, **kwargs)
+        else:
+            def traced(*args, **kwargs):
+                if not self._sinks:
+                    return func(*args, **kwargs)
+                self._validated()
+                with Span(self, "execute", {"tool": name}):
+                    return func(*args, **kwargs)
+
+        functools.update_wrapper(traced, func)
+        return traced
+
+    def trace_mcp(self, mcp: FastMCP) -> None:
+        """Trace every tool call made through a FastMCP server as a "tool_call" span.
+
+        Inside it, tools wrapped with `wrap` record "validate" for FastMCP's argument validation
+        and "execute" for the call, and "serialize" is recorded for converting the result to content.
+        """
+        tool_manager = mcp._tool_manager
+        call_tool = tool_manager.call_tool
+
+        async def traced_call_tool(name: str, arguments: dict[str, Any], *args, **kwargs) -> Any:
+            if not self._sinks:
+                return await call_tool(name, arguments, *args, **kwargs)
+            with Span(self, "tool_call", {"tool": name}) as span:
+                result = await call_tool(name, arguments, *args, **kwargs)
+                if span.children_end is not None:
+                    self.record("serialize", span.children_end, time.perf_counter(), tool=name)
+                return result
+
+        tool_manager.call_tool = traced_call_tool
+
+
+# Create singleton instance of ToolTracer.
+resources = {
+    'logger': mcp_logger
+}
+tool_tracer = ToolTracer(configs=configs, resources=resources)
@@ -0,0 +1,43 @@
+from concurrent.futures import Future
+import sys
+
+
+from logger import mcp_logger
+
+
+def _log_warm_up_result(future: Future) -> None:
+    exception = future.exception()
+    if exception is not None:
+        mcp_logger.error(f"Tool search warm-up failed: {exception}")
+    else:
+        mcp_logger.info("Tool search warm-up finished.")
+
+
+def warm_up_tool_search() -> Future | None:
+    """
+    Start loading the tool search model and pre-embedding the tool corpus in the background.
+
+    The work runs on a daemon thread, so the server can begin serving immediately.
+    Calls to list_tools_in_functions_dir that arrive before it finishes wait on the
+    returned future instead of loading the model a second time.
+
+    Returns:
+        Future | None: Resolves once the model is loaded and the corpus is embedded.
+            None if the tool search module could not be imported.
+    """
+    try:
+        from tools.functions.list_tools_in_functions_dir import _Cache
+    except Exception as e:
+        mcp_logger.warning(f"Could not import tool search for warm-up: {e}")
+        return None
+
+    future = _Cache.warm_up()
+    future.add_done_callback(_log_warm_up_result)
+    return future
+
+
+def reset_tool_search_after_fork() -> None:
+    """Let a forked process warm up tool search again if its parent's warm-up hadn't finished."""
+    module = sys.modules.get("tools.functions.list_tools_in_functions_dir")
+    if module is not None:
+        module._Cache.reset_after_fork()
@@ -33,9 +33,11 @@ logger = logging.getLogger("server")
 class DuckDBQueryRunner:
     """DuckDB query runner that provides database operations"""
     
-    def __init__(self, db_path: Optional[str] = None):
-        logger.debug(f"Initializing DuckDBQueryRunner with db_path={db_path}")
+    def __init__(self, db_path: Optional[str] = None, read_only: bool = False):
+        logger.debug(f"Initializing DuckDBQueryRunner with db_path={db_path}, read_only={read_only}")
         self.db_path = db_path or ":memory:"
+        # Several server workers can open the same database file only if none of them writes to it.
+        self.read_only = read_only and self.db_path != ":memory:"
         self.connection = None
         self._connect()
 
@@ -50,7 +52,7 @@ class DuckDBQueryRunner:
     def _connect(self):
         logger.debug(f"Connecting to DuckDB at {self.db_path}")
         try:
-            self.connection = duckdb.connect(self.db_path)
+            self.connection = duckdb.connect(self.db_path, read_only=self.read_only)
             logger.debug("DuckDB connection established")
         except Exception as e:
             logger.error(f"Failed to connect to DuckDB: {str(e)}")
@@ -238,7 +240,7 @@ def init_config(testing=False, test_db_type=None, test_db_config=None, test_db_c
                     id=db_id
                 )
                 config_db_path = config.get("db_path", ":memory:")
-                db_config.query_runner = DuckDBQueryRunner(db_path=config_db_path)
+                db_config.query_runner = DuckDBQueryRunner(db_path=config_db_path, read_only=config.get("read_only", False))
                 db_configs[db_id] = db_config
                 logger.debug(f"Initialized DuckDB connection for {db_id} at {config_db_path}")
             logger.info(f"Initialized {len(db_configs)} DuckDB connections")
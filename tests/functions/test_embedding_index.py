@@ -0,0 +1,212 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from tools.functions._embedding_index import _EmbeddingIndex
+
+
+def _fake_embed(calls: list):
+    """Deterministic embedder that records every docstring it is asked to embed."""
+    def embed(docstrings: list[str]) -> np.ndarray:
+        calls.extend(docstrings)
+        return np.array([[len(d), d.count("todo") + 1, 1.0] for d in docstrings], dtype=np.float32)
+    return embed
+
+
+def _extract(file_path: str) -> list[tuple[str, str]]:
+    name = Path(file_path).stem
+    return [(name, Path(file_path).read_text())]
+
+
+class TestEmbeddingIndex(unittest.TestCase):
+    """Test _EmbeddingIndex persistence and incremental re-embedding."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.index_dir = str(self.root / "index")
+        self.files = []
+        for name, text in (("a", "make a todo list"), ("b", "parse some files")):
+            path = self.root / f"{name}.py"
+            path.write_text(text)
+            self.files.append(str(path))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_unchanged_files_are_not_re_embedded(self):
+        """
+        GIVEN an index that has already been refreshed with two files
+        WHEN it is refreshed again, in the same process and from a fresh instance
+        THEN expect no docstrings to be embedded a second time
+        """
+        calls = []
+        index = _EmbeddingIndex(self.index_dir, "model", np)
+        self.assertEqual(index.refresh(self.files, _extract, _fake_embed(calls)), 2)
+        self.assertEqual(index.refresh(self.files, _extract, _fake_embed(calls)), 0)
+
+        reloaded = _EmbeddingIndex(self.index_dir, "model", np)
+        self.assertEqual(reloaded.refresh(self.files, _extract, _fake_embed(calls)), 0)
+        self.assertEqual(len(calls), 2)
+        self.assertIsInstance(reloaded._matrix, np.memmap)
+
+    def test_only_changed_docstring_is_re_embedded(self):
+        """
+        GIVEN an index built from two files
+        WHEN one file's docstring changes
+        THEN expect only that docstring to be embedded, and the rows to follow the files
+        """
+        calls = []
+        index = _EmbeddingIndex(self.index_dir, "model", np)
+        index.refresh(self.files, _extract, _fake_embed(calls))
+
+        Path(self.files[1]).write_text("parse some other files")
+        stat = os.stat(self.files[1])
+        os.utime(self.files[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        self.assertEqual(index.refresh(self.files, _extract, _fake_embed(calls)), 1)
+        self.assertEqual(calls[-1], "parse some other files")
+        self.assertEqual([row["func_name"] for row in index.rows], ["a", "b"])
+
+    def test_file_deleted_after_listing_is_skipped(self):
+        """
+        GIVEN an index built from two files
+        WHEN one file is deleted, and the index is refreshed with a listing that still includes it
+        THEN expect the refresh to succeed, and the deleted file's rows to be dropped
+        """
+        calls = []
+        index = _EmbeddingIndex(self.index_dir, "model", np)
+        index.refresh(self.files, _extract, _fake_embed(calls))
+
+        os.remove(self.files[1])
+
+        self.assertEqual(index.refresh(self.files, _extract, _fake_embed(calls)), 0)
+        self.assertEqual([row["func_name"] for row in index.rows], ["a"])
+        self.assertEqual(len(index._matrix), 1)
+
+    def test_search_matches_cosine_similarity(self):
+        """
+        GIVEN a refreshed index
+        WHEN it is searched with a query vector for every row
+        THEN expect the cosine similarity against each row, highest first
+        """
+        index = _EmbeddingIndex(self.index_dir, "model", np)
+        index.refresh(self.files, _extract, _fake_embed([]))
+        query = np.array([1.0, 2.0, 0.5], dtype=np.float32)
+
+        results = index.search(query, top_k=len(index.rows))
+
+        matrix = _fake_embed([])([row["docstring"] for row, _ in results])
+        expected = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query))
+        np.testing.assert_allclose([score for _, score in results], expected, rtol=1e-5)
+        self.assertEqual(list(expected), sorted(expected, reverse=True))
+
+    def test_int8_index_approximates_float32_similarities(self):
+        """
+        GIVEN an index stored as int8 with per-row scales
+        WHEN it is reloaded from disk and queried
+        THEN expect similarities within quantisation error of float32, and the same ranking
+        """
+        query = np.array([1.0, 2.0, 0.5], dtype=np.float32)
+        exact = _EmbeddingIndex(self.index_dir, "model", np)
+        exact.refresh(self.files, _extract, _fake_embed([]))
+        quantized = _EmbeddingIndex(str(self.root / "index_int8"), "model", np, dtype="int8")
+        quantized.refresh(self.files, _extract, _fake_embed([]))
+        reloaded = _EmbeddingIndex(str(self.root / "index_int8"), "model", np, dtype="int8")
+
+        self.assertEqual(reloaded._matrix.dtype, np.int8)
+        expected, results = exact.search(query, 2), reloaded.search(query, 2)
+        np.testing.assert_allclose([score for _, score in results], [score for _, score in expected], atol=1e-2)
+        self.assertEqual([row["func_name"] for row, _ in results], [row["func_name"] for row, _ in expected])
+
+    def test_failed_save_does_not_leave_search_on_the_old_matrix(self):
+        """
+        GIVEN a searchable index whose next save fails after the files changed
+        WHEN it is searched
+        THEN expect no results from the replaced matrix, rather than rows that no longer line up with it
+        """
+        index = _EmbeddingIndex(self.index_dir, "model", np)
+        index.refresh(self.files, _extract, _fake_embed([]))
+        Path(self.files[0]).unlink()
+
+        with patch.object(np, "save", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                index.refresh(self.files[1:], _extract, _fake_embed([]))
+
+        self.assertEqual(index.search(np.array([1.0, 2.0, 0.5], dtype=np.float32), 2), [])
+
+    def test_index_published_by_another_process_is_picked_up(self):
+        """
+        GIVEN two instances over the same index directory, as in two server workers
+        WHEN one refreshes and then the other does
+        THEN expect the second to load what the first published instead of embedding it again
+        """
+        calls = []
+        first = _EmbeddingIndex(self.index_dir, "model", np)
+        second = _EmbeddingIndex(self.index_dir, "model", np)
+
+        self.assertEqual(first.refresh(self.files, _extract, _fake_embed(calls)), 2)
+        self.assertEqual(second.refresh(self.files, _extract, _fake_embed(calls)), 0)
+
+        self.assertEqual(second.rows, first.rows)
+        self.assertEqual(len(second._matrix), len(second.rows))
+        self.assertEqual(len(calls), 2)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "Needs os.fork")
+    def test_concurrent_refreshes_in_several_processes_publish_one_consistent_index(self):
+        """
+        GIVEN several processes refreshing the same index directory at once
+        WHEN they have all finished
+        THEN expect the docstrings to be embedded once in all, and one matrix on disk whose rows match the metadata
+        """
+        def slow_embed(docstrings: list[str]) -> np.ndarray:
+            # Long enough for the processes' refreshes to overlap.
+            time.sleep(0.1)
+            return _fake_embed([])(docstrings)
+
+        pids = []
+        for _ in range(4):
+            pid = os.fork()
+            if pid == 0:
+                embedded = 255
+                try:
+                    embedded = _EmbeddingIndex(self.index_dir, "model", np).refresh(self.files, _extract, slow_embed)
+                finally:
+                    os._exit(embedded)
+            pids.append(pid)
+        embedded = sum(os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) for pid in pids)
+
+        index = _EmbeddingIndex(self.index_dir, "model", np)
+        self.assertEqual(embedded, 2)
+        self.assertEqual(len(index._matrix), len(index.rows))
+        self.assertEqual(len([name for name in os.listdir(self.index_dir) if name.endswith(".npy")]), 1)
+        self.assertEqual([name for name in os.listdir(self.index_dir) if name.endswith(".tmp")], [])
+
+    def test_dtype_change_invalidates_index(self):
+        """
+        GIVEN an index saved as float32
+        WHEN it is loaded as float16
+        THEN expect every docstring to be embedded again
+        """
+        _EmbeddingIndex(self.index_dir, "model", np).refresh(self.files, _extract, _fake_embed([]))
+        other = _EmbeddingIndex(self.index_dir, "model", np, dtype="float16")
+        self.assertEqual(other.refresh(self.files, _extract, _fake_embed([])), 2)
+
+    def test_model_change_invalidates_index(self):
+        """
+        GIVEN an index saved with one model name
+        WHEN it is loaded with a different model name
+        THEN expect every docstring to be embedded again
+        """
+        _EmbeddingIndex(self.index_dir, "model", np).refresh(self.files, _extract, _fake_embed([]))
+        other = _EmbeddingIndex(self.index_dir, "other-model", np)
+        self.assertEqual(other.refresh(self.files, _extract, _fake_embed([])), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import importlib
+import json
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+
+class _FakeSentenceTransformer:
+    """Embeds text by its length and its count of "todo", loading only once `gate` is open."""
+    gate = threading.Event()
+    loads = 0
+    error: Exception | None = None
+
+    def __init__(self, model_name: str):
+        type(self).loads += 1
+        self.gate.wait()
+        if self.error is not None:
+            raise self.error
+
+    def encode(self, text, show_progress_bar: bool = False) -> np.ndarray:
+        if isinstance(text, str):
+            return np.array([len(text), text.count("todo") + 1, 1.0], dtype=np.float32)
+        return np.array([[len(t), t.count("todo") + 1, 1.0] for t in text], dtype=np.float32)
+
+
+class TestToolSearchWarmUp(unittest.TestCase):
+    """Test warming up tool search in the background and waiting on it."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        (self.root / "todo_tools.py").write_text('def make_todo_list():\n    """Make a todo list."""\n')
+
+        _FakeSentenceTransformer.gate = threading.Event()
+        _FakeSentenceTransformer.loads = 0
+        _FakeSentenceTransformer.error = None
+        # The model and numpy come from the tools' shared dependencies, which are stood in for here.
+        dependencies_module = ModuleType("tools.functions._dependencies")
+        dependencies_module.dependencies = SimpleNamespace(
+            sentence_transformers=SimpleNamespace(SentenceTransformer=_FakeSentenceTransformer), numpy=np
+        )
+        modules = patch.dict(sys.modules, {"tools.functions._dependencies": dependencies_module})
+        modules.start()
+        self.addCleanup(modules.stop)
+        sys.modules.pop("tools.functions.list_tools_in_functions_dir", None)
+        self.module = importlib.import_module("tools.functions.list_tools_in_functions_dir")
+
+        for name, value in (
+            ("_INDEX_ROOT_DIR", str(self.root / "index")),
+            ("_get_search_dir", lambda: str(self.root)),
+            ("_save_results_to_csv", lambda *args: None),
+        ):
+            patcher = patch.object(self.module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        _FakeSentenceTransformer.gate.set()
+        ready = self.module._Cache._ready
+        if ready is not None:
+            ready.exception(timeout=10)
+        self.temp_dir.cleanup()
+
+    def _search(self) -> dict:
+        return self.module.list_tools_in_functions_dir("todo list", top_k=1, similarity_threshold=0.0)
+
+    def test_searches_during_warm_up_wait_for_it_and_share_the_model(self):
+        """
+        GIVEN a warm-up still loading the model
+        WHEN several searches start before it finishes
+        THEN expect them all to wait for it and return results, with the model loaded only once
+        """
+        warm_up = self.module._Cache.warm_up()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self._search())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+
+        self.assertFalse(warm_up.done())
+        _FakeSentenceTransformer.gate.set()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        self.assertEqual([result[1]["func_name"] for result in results], ["make_todo_list"] * 4)
+        self.assertIs(warm_up.result(), self.module._Cache())
+        self.assertEqual(_FakeSentenceTransformer.loads, 1)
+
+    def test_failed_warm_up_is_started_afresh_by_the_next_call(self):
+        """
+        GIVEN a warm-up whose model fails to load
+        WHEN warm-up is called again after it failed
+        THEN expect the failure to reach the callers that waited, and a new warm-up that succeeds
+        """
+        _FakeSentenceTransformer.error = OSError("model download failed")
+        failed = self.module._Cache.warm_up()
+        _FakeSentenceTransformer.gate.set()
+
+        self.assertIsInstance(failed.exception(timeout=10), OSError)
+        self.assertIsNone(self.module._Cache._ready)
+
+        _FakeSentenceTransformer.error = None
+        retried = self.module._Cache.warm_up()
+        self.assertIsNot(retried, failed)
+        self.assertIsInstance(retried.result(timeout=10), self.module._Cache)
+        self.assertEqual(self._search()[1]["func_name"], "make_todo_list")
+        self.assertEqual(_FakeSentenceTransformer.loads, 2)
+
+    def test_concurrent_get_index_creates_one_index(self):
+        """
+        GIVEN many threads asking for the same search directory's index at once
+        WHEN each calls get_index
+        THEN expect them all to get the same index
+        """
+        _FakeSentenceTransformer.gate.set()
+        cache = self.module._Cache()
+        barrier = threading.Barrier(8)
+        indexes = []
+
+        def get_index():
+            barrier.wait()
+            indexes.append(cache.get_index(str(self.root), False))
+
+        def slow_index(*args, **kwargs):
+            # Loading an index from disk takes a while, which is when the threads would race.
+            time.sleep(0.05)
+            return object()
+
+        with patch.object(self.module, "_EmbeddingIndex", side_effect=slow_index):
+            threads = [threading.Thread(target=get_index) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len({id(index) for index in indexes}), 1)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "Needs os.fork")
+    def test_search_returns_in_process_forked_during_warm_up(self):
+        """
+        GIVEN a warm-up still loading the model when the process forks
+        WHEN the forked child resets tool search and searches
+        THEN expect the child to load the model itself and return results, instead of waiting forever
+        """
+        self.module._Cache.warm_up()
+        read_fd, write_fd = os.pipe()
+        parent = os.getpid()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            # Without the reset the child would wait forever on the parent's warm-up.
+            signal.alarm(20)
+            try:
+                # The parent's warm-up thread is gone, so only the child's own load may get past the gate.
+                _FakeSentenceTransformer.gate.set()
+                self.module._Cache.reset_after_fork()
+                result = {"func_name": self._search()[1]["func_name"], "pid": os.getpid()}
+            except BaseException as e:
+                result = {"error": repr(e)}
+            os.write(write_fd, json.dumps(result).encode())
+            os._exit(0)
+
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            result = json.loads(pipe.read() or "{}")
+        os.waitpid(pid, 0)
+
+        self.assertEqual(result.get("func_name"), "make_todo_list", result)
+        self.assertNotEqual(result["pid"], parent)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+
+from tools.functions._search_backends import _top_k, _make_search_backend
+
+
+class TestTopK(unittest.TestCase):
+    """Test _top_k selection with argpartition."""
+
+    def test_returns_k_highest_in_descending_order(self):
+        """
+        GIVEN an unsorted array of scores
+        WHEN _top_k is called with k smaller than the array
+        THEN expect the indices of the k highest scores, highest first
+        """
+        scores = np.array([0.1, 0.9, 0.4, 0.7, 0.2])
+        self.assertEqual(_top_k(np, scores, 3).tolist(), [1, 3, 2])
+
+    def test_k_larger_than_array(self):
+        """
+        GIVEN k larger than the number of scores
+        WHEN _top_k is called
+        THEN expect every index, sorted by score
+        """
+        scores = np.array([0.3, 0.5])
+        self.assertEqual(_top_k(np, scores, 10).tolist(), [1, 0])
+
+
+class TestSearchBackends(unittest.TestCase):
+    """Test the exact and IVF search backends."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        matrix = rng.normal(size=(500, 16)).astype(np.float32)
+        self.matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+        query = rng.normal(size=16).astype(np.float32)
+        self.query = query / np.linalg.norm(query)
+
+    def test_ivf_scanning_every_list_matches_exact(self):
+        """
+        GIVEN an IVF backend that probes every one of its clusters
+        WHEN it is searched
+        THEN expect the same results as the exact backend
+        """
+        exact = _make_search_backend(np, "exact")
+        exact.build(self.matrix)
+        ivf = _make_search_backend(np, "ivf", lists=10, probes=10, min_rows=0)
+        ivf.build(self.matrix)
+
+        exact_indices, exact_scores = exact.search(self.query, 5)
+        ivf_indices, ivf_scores = ivf.search(self.query, 5)
+
+        self.assertEqual(ivf_indices.tolist(), exact_indices.tolist())
+        np.testing.assert_allclose(ivf_scores, exact_scores, rtol=1e-5)
+
+    def test_ivf_falls_back_to_exact_below_min_rows(self):
+        """
+        GIVEN an IVF backend with fewer rows than min_rows
+        WHEN it is built
+        THEN expect no clusters to be trained
+        """
+        ivf = _make_search_backend(np, "ivf", min_rows=1000)
+        ivf.build(self.matrix)
+        self.assertIsNone(ivf._centroids)
+
+    def test_unknown_backend_raises(self):
+        """
+        GIVEN an unknown backend name
+        WHEN _make_search_backend is called
+        THEN expect ValueError
+        """
+        with self.assertRaises(ValueError):
+            _make_search_backend(np, "hnsw")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+from server_utils._run_tool._cli_workers import CliWorkers
+from server_utils._run_tool._result_store import ResultStore
+from server_utils._run_tool._return_text_content import return_text_content
+from server_utils._run_tool._return_tool_call_results import return_tool_call_results
+from server_utils._run_tool._run_tool import _RunTool
+
+
+_MAIN_SOURCE = '''
+import os
+import sys
+import time
+
+args = sys.argv[1:]
+if args and args[0] == "--sleep":
+    time.sleep(float(args[1]))
+if args and args[0] == "--spam":
+    for i in range(int(args[1])):
+        print(f"line {i}")
+    print("done", file=sys.stderr)
+if args and args[0] == "--fail":
+    print("bad input", file=sys.stderr)
+    sys.exit(3)
+print(f"pid={os.getpid()} args={args}")
+'''
+
+
+class TestCliWorkers(unittest.TestCase):
+    """Test running CLI tools in persistent worker processes."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.tool_dir = Path(self.temp_dir.name) / "cli_worker_test_tool"
+        self.tool_dir.mkdir()
+        (self.tool_dir / "__main__.py").write_text(_MAIN_SOURCE)
+        self.workers = CliWorkers(
+            configs=SimpleNamespace(ROOT_DIR=Path(self.temp_dir.name), tool_timeout=10, cli_worker_max_calls=100),
+            resources={'logger': MagicMock()},
+        )
+
+    def tearDown(self):
+        self.workers.shutdown()
+        self.temp_dir.cleanup()
+
+    def _run(self, *args: str) -> tuple[int, str, str]:
+        result = self.workers.run(["python", "-m", str(self.tool_dir), *args], max_chars=10_000)
+        return result.returncode, result.stdout, result.stderr
+
+    def _run_tool(self, cli_output_limit: int) -> tuple[_RunTool, ResultStore]:
+        configs = SimpleNamespace(
+            ROOT_DIR=Path(self.temp_dir.name), tool_timeout=10, cli_workers=True, cli_output_limit=cli_output_limit,
+            terminate_cli_tool_at_output_limit=False, result_char_limit=19_000,
+            result_store_max_entries=10, result_store_max_bytes=10_000_000, result_store_ttl=60,
+        )
+        store = ResultStore(configs=configs, resources={'logger': MagicMock()})
+        run_tool = _RunTool(configs=configs, resources={
+            'return_tool_call_results': return_tool_call_results,
+            'return_text_content': return_text_content,
+            'logger': MagicMock(),
+            'tool_registry': MagicMock(),
+            'tool_thread_pool': MagicMock(),
+            'tool_single_flight': MagicMock(),
+            'cli_workers': self.workers,
+            'result_shaper': MagicMock(),
+            'result_store': store,
+            'tool_metrics': MagicMock(),
+            'tool_tracer': MagicMock(),
+        })
+        return run_tool, store
+
+    def _pid(self, stdout: str) -> str:
+        return stdout.split()[0]
+
+    def test_calls_reuse_one_worker_and_return_output(self):
+        """
+        GIVEN a CLI tool run through a worker
+        WHEN it is called twice with different arguments
+        THEN expect each call's output and exit code, with both served by the same process
+        """
+        first = self._run("--name", "a")
+        second = self._run("--name", "b")
+
+        self.assertEqual(first[0], 0)
+        self.assertIn("args=['--name', 'a']", first[1])
+        self.assertIn("args=['--name', 'b']", second[1])
+        self.assertEqual(self._pid(first[1]), self._pid(second[1]))
+        self.assertNotEqual(self._pid(first[1]), f"pid={os.getpid()}")
+
+    def test_exit_code_and_stderr_are_returned(self):
+        """
+        GIVEN a CLI tool that exits with an error
+        WHEN it is called
+        THEN expect its exit code and stderr, and the worker to keep serving
+        """
+        returncode, _, stderr = self._run("--fail")
+
+        self.assertEqual(returncode, 3)
+        self.assertIn("bad input", stderr)
+        self.assertEqual(self._run()[0], 0)
+
+    def test_output_over_limit_is_kept_to_limit_and_spilled(self):
+        """
+        GIVEN a CLI tool that prints far more than the output limit
+        WHEN it is run with a spill
+        THEN expect only the limit kept, and all of the output in the spill
+        """
+        spills = []
+
+        def open_spill():
+            spills.append(SimpleNamespace(parts=[], write=lambda text: spills[-1].parts.append(text)))
+            return spills[-1]
+
+        result = self.workers.run(["python", "-m", str(self.tool_dir), "--spam", "5000"], max_chars=100, open_spill=open_spill)
+
+        self.assertEqual(result.returncode, 0)
+        self.assertTrue(result.truncated)
+        self.assertEqual(len(result.stdout), 100)
+        self.assertTrue(result.stdout.startswith("line 0\n"))
+        spilled = "".join(spills[0].parts)
+        self.assertTrue(spilled.startswith(result.stdout))
+        self.assertIn("line 4999\n", spilled)
+        self.assertIn("done", result.stderr)
+
+    def test_run_tool_limits_worker_output_and_stores_the_rest(self):
+        """
+        GIVEN CLI tools run in workers, with an output limit
+        WHEN a tool that prints far more than the limit is run through run_tool
+        THEN expect the limited output with a note, and all of the output in the result store
+        """
+        run_tool, store = self._run_tool(cli_output_limit=100)
+
+        result = run_tool._execute_cli_tool(["python", "-m", str(self.tool_dir), "--spam", "5000"], "spam")
+
+        text = result.content[0].text
+        self.assertFalse(result.isError)
+        self.assertIn("Output truncated after 100 of", text)
+        self.assertNotIn("line 4999", text)
+        result_id = text.rsplit("Result ID: ", 1)[1][:16]
+        self.assertIn("line 4999\n", store.get(result_id))
+
+    def test_output_limit_above_result_char_limit_is_not_cut_again(self):
+        """
+        GIVEN an output limit above the 20,000 characters at which tool results are cut
+        WHEN a tool that prints past the limit is run through run_tool
+        THEN expect the output kept to the limit, with one note and one stored result
+        """
+        run_tool, store = self._run_tool(cli_output_limit=25_000)
+
+        text = run_tool._execute_cli_tool(["python", "-m", str(self.tool_dir), "--spam", "5000"], "spam").content[0].text
+
+        self.assertEqual(text.count("Result ID: "), 1)
+        self.assertIn("Output truncated after 25,000 of", text)
+        self.assertEqual(len(store._results), 1)
+
+    def test_terminate_at_limit_stops_the_tool(self):
+        """
+        GIVEN a CLI tool that prints far more than the output limit
+        WHEN it is run with terminate_at_limit
+        THEN expect it to be stopped at the limit, and the worker to keep serving
+        """
+        result = self.workers.run(["python", "-m", str(self.tool_dir), "--spam", "5000"], max_chars=100, terminate_at_limit=True)
+
+        self.assertTrue(result.terminated_at_limit)
+        self.assertEqual(len(result.stdout), 100)
+        self.assertNotIn("done", result.stderr)
+        self.assertEqual(self._run()[0], 0)
+
+    def test_source_change_recycles_worker(self):
+        """
+        GIVEN a worker that has served a call
+        WHEN the tool's source changes
+        THEN expect the next call to be served by a new process
+        """
+        first_pid = self._pid(self._run()[1])
+        main = self.tool_dir / "__main__.py"
+        main.write_text(_MAIN_SOURCE + "\n# changed\n")
+        stat = main.stat()
+        os.utime(main, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertNotEqual(self._pid(self._run()[1]), first_pid)
+
+    def test_max_calls_recycles_worker(self):
+        """
+        GIVEN a worker limited to two calls
+        WHEN a third call is made
+        THEN expect it to be served by a new process
+        """
+        self.workers.configs.cli_worker_max_calls = 2
+        pids = [self._pid(self._run()[1]) for _ in range(3)]
+
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+
+    def test_recycling_a_worker_lets_its_running_call_finish(self):
+        """
+        GIVEN a worker limited to one call, which is still running it
+        WHEN another call recycles the worker
+        THEN expect the running call to return its output, and the other call to be served by a new process
+        """
+        self.workers.configs.cli_worker_max_calls = 1
+        with ThreadPoolExecutor(max_workers=1) as caller:
+            running = caller.submit(self._run, "--sleep", "1")
+            time.sleep(0.5)
+            other = self._run()
+            returncode, stdout, _ = running.result()
+
+        self.assertEqual(returncode, 0)
+        self.assertIn("--sleep", stdout)
+        self.assertNotEqual(self._pid(other[1]), self._pid(stdout))
+
+    def test_timeout_kills_worker(self):
+        """
+        GIVEN a call that runs longer than the tool timeout
+        WHEN it is made
+        THEN expect a TimeoutError, and a fresh worker for the next call
+        """
+        self.workers.configs.tool_timeout = 0.5
+        start = time.perf_counter()
+        with self.assertRaises(TimeoutError):
+            self._run("--sleep", "30")
+        self.assertLess(time.perf_counter() - start, 5)
+
+        self.workers.configs.tool_timeout = 10
+        self.assertEqual(self._run()[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+import configs as configs_module
+from configs import _find_requirements_files
+
+
+class TestFindRequirementsFiles(unittest.TestCase):
+    """Test pruned, cached discovery of requirements.txt files."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.cache_path = self.root / ".cache" / "requirements_files.json"
+        for rel_path in (
+            "requirements.txt",
+            "tools/cli/tool_a/requirements.txt",
+            ".venv/lib/site-packages/pkg/requirements.txt",
+            "env_with_other_name/lib/requirements.txt",
+            "tests/fixture/requirements.txt",
+            "build/requirements.txt",
+        ):
+            path = self.root / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("package==1.0\n")
+        (self.root / "env_with_other_name" / "pyvenv.cfg").write_text("home = /usr/bin\n")
+        (self.root / ".gitignore").write_text("# build output\nbuild/\n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _find(self) -> list[Path]:
+        return _find_requirements_files(self.root, self.cache_path)
+
+    def test_ignored_directories_are_pruned(self):
+        """
+        GIVEN requirements files in tool directories, virtual environments, tests and a gitignored directory
+        WHEN requirements files are found
+        THEN expect only the root and tool requirements files
+        """
+        self.assertEqual(self._find(), [self.root / "requirements.txt", self.root / "tools/cli/tool_a/requirements.txt"])
+
+    def test_unchanged_tree_uses_cache_without_walking(self):
+        """
+        GIVEN requirements files found once
+        WHEN they are found again with no directory changed
+        THEN expect the same result without walking the tree
+        """
+        expected = self._find()
+
+        with patch.object(configs_module, "_walk_for_requirements") as mock_walk:
+            self.assertEqual(self._find(), expected)
+        mock_walk.assert_not_called()
+
+    def test_new_requirements_file_invalidates_cache(self):
+        """
+        GIVEN requirements files found once
+        WHEN a new tool directory with a requirements file is added
+        THEN expect the new file to be found
+        """
+        self._find()
+        tool_dir = self.root / "tools" / "cli" / "tool_b"
+        tool_dir.mkdir()
+        (tool_dir / "requirements.txt").write_text("package==2.0\n")
+        # Make sure the mtime moves even on filesystems with coarse timestamps.
+        parent_stat = tool_dir.parent.stat()
+        os.utime(tool_dir.parent, ns=(parent_stat.st_atime_ns, parent_stat.st_mtime_ns + 10**9))
+
+        self.assertIn(tool_dir / "requirements.txt", self._find())
+
+    def test_gitignore_change_invalidates_cache(self):
+        """
+        GIVEN requirements files found once
+        WHEN .gitignore is changed to ignore the tools directory
+        THEN expect the tool requirements file to no longer be found
+        """
+        self._find()
+        gitignore = self.root / ".gitignore"
+        gitignore.write_text("build/\n/tools\n")
+        gitignore_stat = gitignore.stat()
+        os.utime(gitignore, ns=(gitignore_stat.st_atime_ns, gitignore_stat.st_mtime_ns + 10**9))
+
+        self.assertEqual(self._find(), [self.root / "requirements.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
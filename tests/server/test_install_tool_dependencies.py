@@ -0,0 +1,169 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+
+from server_utils.install_tool_dependencies_to_shared_venv import install_tool_dependencies_to_shared_venv, DependencyInstaller
+
+
+_MODULE = "server_utils.install_tool_dependencies_to_shared_venv"
+
+
+class TestInstallToolDependencies(unittest.TestCase):
+    """Test that requirements files are only installed when they change."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.fingerprints_path = root / ".cache" / "requirements_fingerprints.json"
+        self.requirements = []
+        for name in ("tool_a", "tool_b"):
+            (root / name).mkdir()
+            path = root / name / "requirements.txt"
+            path.write_text(f"{name}-package==1.0\n")
+            self.requirements.append(path)
+
+        patcher = patch(f"{_MODULE}.sub.run", return_value=MagicMock(returncode=0))
+        self.mock_run = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _install(self):
+        install_tool_dependencies_to_shared_venv(self.requirements, fingerprints_path=self.fingerprints_path)
+
+    def _uv_add_calls(self) -> list[list[str]]:
+        return [call.args[0] for call in self.mock_run.call_args_list if call.args[0][:2] == ["uv", "add"]]
+
+    def test_first_run_installs_all_files_in_one_invocation(self):
+        """
+        GIVEN two requirements files and no fingerprints
+        WHEN dependencies are installed
+        THEN expect a single 'uv add' with both files
+        """
+        self._install()
+
+        calls = self._uv_add_calls()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0], ["uv", "add", "-r", str(self.requirements[0].resolve()), "-r", str(self.requirements[1].resolve())])
+
+    def test_unchanged_files_skip_uv_entirely(self):
+        """
+        GIVEN requirements files installed by a previous run
+        WHEN dependencies are installed again without changes
+        THEN expect uv not to be run at all
+        """
+        self._install()
+        self.mock_run.reset_mock()
+
+        self._install()
+
+        self.mock_run.assert_not_called()
+
+    def test_only_changed_file_is_installed(self):
+        """
+        GIVEN requirements files installed by a previous run
+        WHEN one of them changes
+        THEN expect 'uv add' to be run with only the changed file
+        """
+        self._install()
+        self.mock_run.reset_mock()
+        self.requirements[1].write_text("tool_b-package==2.0\n")
+
+        self._install()
+
+        self.assertEqual(self._uv_add_calls(), [["uv", "add", "-r", str(self.requirements[1].resolve())]])
+
+    def test_failed_install_is_retried(self):
+        """
+        GIVEN a run where 'uv add' fails
+        WHEN dependencies are installed again
+        THEN expect a RuntimeError the first time and the files to be installed again the second time
+        """
+        self.mock_run.return_value = MagicMock(returncode=1, stdout=b"", stderr=b"boom")
+        with self.assertRaises(RuntimeError):
+            self._install()
+
+        self.mock_run.return_value = MagicMock(returncode=0)
+        self.mock_run.reset_mock()
+        self._install()
+
+        self.assertEqual(len(self._uv_add_calls()), 1)
+
+
+class TestDependencyInstaller(unittest.TestCase):
+    """Test background installs of tool requirements with one future per file."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name).resolve()
+        self.fingerprints_path = self.root / ".cache" / "requirements_fingerprints_parallel.json"
+        self.requirements = {}
+        for name in ("tool_a", "tool_b"):
+            (self.root / name).mkdir()
+            path = self.root / name / "requirements.txt"
+            path.write_text(f"{name}-package==1.0\n")
+            self.requirements[name] = path
+
+        # Installs of tool_b block until released, so tests can observe which futures a tool waits on.
+        self.release_b = threading.Event()
+        def fake_run(command, **kwargs):
+            if command[:3] == ["uv", "pip", "install"] and "tool_b" in command[-1]:
+                self.release_b.wait(5)
+            return MagicMock(returncode=0)
+
+        patcher = patch(f"{_MODULE}.sub.run", side_effect=fake_run)
+        self.mock_run = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.installer = DependencyInstaller(configs=MagicMock(ROOT_DIR=self.root), resources={'logger': MagicMock()})
+
+    def tearDown(self):
+        self.release_b.set()
+        for future in self.installer._futures.values():
+            future.exception(timeout=5)
+        self.temp_dir.cleanup()
+
+    def test_start_returns_one_future_per_changed_file_without_blocking(self):
+        """
+        GIVEN two changed requirements files, one of which takes a while to install
+        WHEN the installer is started
+        THEN expect it to return immediately with a future for each file
+        """
+        futures = self.installer.start(list(self.requirements.values()), max_workers=2, fingerprints_path=self.fingerprints_path)
+
+        self.assertEqual(set(futures), {path.resolve() for path in self.requirements.values()})
+        self.assertFalse(futures[self.requirements["tool_b"].resolve()].done())
+
+    def test_tool_only_waits_for_its_own_requirements(self):
+        """
+        GIVEN a slow install for tool_b
+        WHEN tool_a waits for its requirements
+        THEN expect tool_a to return while tool_b's install is still running, with tool_a's timing reported
+        """
+        futures = self.installer.start(list(self.requirements.values()), max_workers=2, fingerprints_path=self.fingerprints_path)
+
+        self.installer.wait_for(self.root / "tool_a" / "tool_a.py", timeout=5)
+
+        self.assertFalse(futures[self.requirements["tool_b"].resolve()].done())
+        timing = self.installer.timings()[str(self.requirements["tool_a"].resolve())]
+        self.assertEqual(timing["status"], "installed")
+
+    def test_failed_install_raises_for_waiting_tool(self):
+        """
+        GIVEN an install that fails
+        WHEN the tool waits for its requirements
+        THEN expect a RuntimeError and the failure in the timings
+        """
+        self.mock_run.side_effect = lambda command, **kwargs: MagicMock(returncode=1, stdout=b"", stderr=b"boom")
+        self.installer.start([self.requirements["tool_a"]], fingerprints_path=self.fingerprints_path)
+
+        with self.assertRaises(RuntimeError):
+            self.installer.wait_for(self.root / "tool_a", timeout=5)
+        self.assertEqual(self.installer.timings()[str(self.requirements["tool_a"].resolve())]["status"], "failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
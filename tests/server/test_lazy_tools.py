@@ -0,0 +1,133 @@
+import asyncio
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+from mcp.server import FastMCP
+
+
+from server_utils.server_.lazy_tools import make_lazy_tool
+
+
+_TOOL_SOURCE = '''
+from typing import Optional
+
+IMPORTED = True
+
+def lazy_example_tool(name: str, count: int = 2, tags: Optional[list[str]] = None) -> str:
+    """Repeat a name."""
+    return " ".join([name] * count)
+'''
+
+_ASYNC_TOOL_SOURCE = '''
+async def lazy_async_tool(x: int) -> int:
+    """Double a number."""
+    return x * 2
+'''
+
+
+class TestMakeLazyTool(unittest.TestCase):
+    """Test make_lazy_tool static registration of tool functions."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.package_dir = Path(self.temp_dir.name) / "lazy_test_pkg"
+        self.package_dir.mkdir()
+        (self.package_dir / "__init__.py").touch()
+        sys.path.insert(0, self.temp_dir.name)
+
+    def tearDown(self):
+        sys.path.remove(self.temp_dir.name)
+        for name in [name for name in sys.modules if name.startswith("lazy_test_pkg")]:
+            del sys.modules[name]
+        self.temp_dir.cleanup()
+
+    def _write_tool(self, name: str, source: str) -> Path:
+        path = self.package_dir / f"{name}.py"
+        path.write_text(source)
+        return path
+
+    def test_proxy_matches_real_function_without_importing(self):
+        """
+        GIVEN a tool file with an annotated, documented function named after the file
+        WHEN make_lazy_tool is called and the proxy is registered with FastMCP
+        THEN expect:
+            - The module is not imported
+            - The proxy has the function's name and docstring
+            - FastMCP builds the same parameter schema as for the real function
+        """
+        path = self._write_tool("lazy_example_tool", _TOOL_SOURCE)
+
+        proxy = make_lazy_tool(path, package="lazy_test_pkg")
+        mcp = FastMCP("test")
+        mcp.add_tool(proxy, name="lazy_example_tool", description=proxy.__doc__)
+
+        self.assertNotIn("lazy_test_pkg.lazy_example_tool", sys.modules)
+        self.assertEqual(proxy.__name__, "lazy_example_tool")
+        self.assertEqual(proxy.__doc__, "Repeat a name.")
+
+        from lazy_test_pkg.lazy_example_tool import lazy_example_tool
+        real = FastMCP("real")
+        real.add_tool(lazy_example_tool, name="lazy_example_tool", description=lazy_example_tool.__doc__)
+        self.assertEqual(
+            mcp._tool_manager.get_tool("lazy_example_tool").parameters,
+            real._tool_manager.get_tool("lazy_example_tool").parameters,
+        )
+
+    def test_first_call_imports_module(self):
+        """
+        GIVEN a lazily registered tool
+        WHEN it is called through FastMCP
+        THEN expect the module to be imported and the real function's result returned
+        """
+        path = self._write_tool("lazy_example_tool", _TOOL_SOURCE)
+        proxy = make_lazy_tool(path, package="lazy_test_pkg")
+        mcp = FastMCP("test")
+        mcp.add_tool(proxy, name="lazy_example_tool", description=proxy.__doc__)
+
+        asyncio.run(mcp.call_tool("lazy_example_tool", {"name": "hi", "count": 3}))
+
+        self.assertIn("lazy_test_pkg.lazy_example_tool", sys.modules)
+        self.assertEqual(proxy(name="hi", count=3), "hi hi hi")
+
+    def test_async_tool_gets_async_proxy(self):
+        """
+        GIVEN a tool file with an async tool function
+        WHEN make_lazy_tool is called
+        THEN expect an async proxy that awaits the real coroutine
+        """
+        path = self._write_tool("lazy_async_tool", _ASYNC_TOOL_SOURCE)
+        proxy = make_lazy_tool(path, package="lazy_test_pkg")
+
+        self.assertTrue(asyncio.iscoroutinefunction(proxy))
+        self.assertEqual(asyncio.run(proxy(x=4)), 8)
+
+    def test_unresolvable_annotation_falls_back(self):
+        """
+        GIVEN a tool whose annotation uses a name only defined in its own module
+        WHEN make_lazy_tool is called
+        THEN expect None, so the tool is imported and registered eagerly instead
+        """
+        path = self._write_tool("custom_type_tool", '''
+from decimal import Decimal
+
+def custom_type_tool(amount: Decimal) -> str:
+    """Format an amount."""
+    return str(amount)
+''')
+        self.assertIsNone(make_lazy_tool(path, package="lazy_test_pkg"))
+
+    def test_missing_docstring_falls_back(self):
+        """
+        GIVEN a tool function without a docstring
+        WHEN make_lazy_tool is called
+        THEN expect None
+        """
+        path = self._write_tool("undocumented_tool", "def undocumented_tool(x: int) -> int:\n    return x\n")
+        self.assertIsNone(make_lazy_tool(path, package="lazy_test_pkg"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import logging
+import threading
+import unittest
+from types import SimpleNamespace
+
+
+from logger import McpLogger, _resolve_callable_message
+
+
+class _ExplodingRepr:
+    def __str__(self):
+        raise AssertionError("Formatted a message for a disabled level")
+
+
+class TestMcpLogger(unittest.TestCase):
+    """Test printing log records directly, and through the bounded background queue."""
+
+    def setUp(self):
+        self.printed = []
+        self.loggers = []
+
+    def tearDown(self):
+        for logger in self.loggers:
+            logger.flush()
+
+    def _logger(self, print_func=None, **configs) -> McpLogger:
+        configs = {"log_level": 10, "log_queue_size": 0, "log_queue_full_policy": "drop", **configs}
+        logger = McpLogger(configs=SimpleNamespace(**configs), resources={"print": print_func or self.printed.append})
+        self.loggers.append(logger)
+        return logger
+
+    def _lines(self) -> list[str]:
+        return [line for batch in self.printed for line in batch.splitlines()]
+
+    def test_unqueued_records_are_printed_on_the_calling_thread(self):
+        """
+        GIVEN a logger without a queue
+        WHEN a debug and an info message are logged
+        THEN expect each to be printed immediately with its level
+        """
+        logger = self._logger()
+
+        logger.debug("first")
+        logger.info("second")
+
+        self.assertEqual(len(self.printed), 2)
+        self.assertIn("[mcp-logger] [DEBUG] first", self.printed[0])
+        self.assertIn("[INFO] second", self.printed[1])
+
+    def test_queued_records_are_printed_in_order_by_the_writer(self):
+        """
+        GIVEN a logger with a queue
+        WHEN several messages are logged and the logger is flushed
+        THEN expect every message printed in order, from the writer thread
+        """
+        threads = []
+
+        def record_print(batch: str) -> None:
+            threads.append(threading.current_thread().name)
+            self.printed.append(batch)
+
+        logger = self._logger(print_func=record_print, log_queue_size=100)
+
+        for i in range(50):
+            logger.debug(f"message {i}")
+        logger.flush()
+
+        self.assertEqual([line.rsplit(" ", 1)[-1] for line in self._lines()], [str(i) for i in range(50)])
+        self.assertEqual(set(threads), {"mcp_logger_writer"})
+
+    def test_full_queue_drops_and_counts_records(self):
+        """
+        GIVEN a logger with a queue of one record, whose writer is stuck printing
+        WHEN more records are logged than fit in the queue
+        THEN expect the extra records to be dropped and counted, and the drop reported once the writer resumes
+        """
+        printing = threading.Event()
+        release = threading.Event()
+
+        def slow_print(batch: str) -> None:
+            printing.set()
+            release.wait(5)
+            self.printed.append(batch)
+
+        logger = self._logger(print_func=slow_print, log_queue_size=1)
+        logger.info("first")
+        printing.wait(5)
+
+        for i in range(5):
+            logger.info(f"extra {i}")
+        release.set()
+        logger.flush()
+        logger.info("last")
+        logger.flush()
+
+        self.assertEqual(logger.dropped, 4)
+        lines = self._lines()
+        self.assertEqual(sum("4 log records dropped" in line for line in lines), 1)
+        self.assertTrue(lines[-1].endswith("last"))
+
+    def test_block_policy_waits_instead_of_dropping(self):
+        """
+        GIVEN a logger with a queue of one record and the block policy
+        WHEN many records are logged quickly
+        THEN expect none to be dropped
+        """
+        logger = self._logger(log_queue_size=1, log_queue_full_policy="block")
+
+        for i in range(100):
+            logger.debug(f"message {i}")
+        logger.flush()
+
+        self.assertEqual(logger.dropped, 0)
+        self.assertEqual(len(self._lines()), 100)
+
+    def test_disabled_levels_do_not_format_messages(self):
+        """
+        GIVEN a logger at INFO level
+        WHEN debug messages are logged with %-style args and as a callable
+        THEN expect neither to be formatted or printed
+        """
+        logger = self._logger(log_level=logging.INFO)
+
+        logger.debug("Result: %s", _ExplodingRepr())
+        logger.debug(lambda: f"Result: {_ExplodingRepr()}")
+
+        self.assertEqual(self.printed, [])
+
+    def test_deferred_messages_are_formatted_when_enabled(self):
+        """
+        GIVEN an unqueued and a queued logger at DEBUG level
+        WHEN messages are logged with %-style args and as a callable
+        THEN expect both to be printed fully formatted
+        """
+        for queue_size in (0, 10):
+            self.printed.clear()
+            logger = self._logger(log_queue_size=queue_size)
+
+            logger.debug("Result of '%s': %s", "tool", {"a": 1})
+            logger.info(lambda: "built lazily")
+            logger.flush()
+
+            lines = self._lines()
+            self.assertTrue(lines[0].endswith("[DEBUG] Result of 'tool': {'a': 1}"))
+            self.assertTrue(lines[1].endswith("[INFO] built lazily"))
+
+    def test_standard_logger_filter_builds_callable_messages(self):
+        """
+        GIVEN a standard library logger with the callable message filter
+        WHEN a callable message is logged at an enabled and a disabled level
+        THEN expect only the enabled one to be built, as its result
+        """
+        handler_records = []
+        std_logger = logging.getLogger("test_mcp_logger.callable")
+        std_logger.propagate = False
+        std_logger.setLevel(logging.INFO)
+        std_logger.addFilter(_resolve_callable_message)
+        handler = logging.Handler()
+        handler.emit = lambda record: handler_records.append(record.getMessage())
+        std_logger.addHandler(handler)
+        self.addCleanup(std_logger.removeHandler, handler)
+
+        std_logger.debug(lambda: f"{_ExplodingRepr()}")
+        std_logger.info(lambda: "built lazily")
+
+        self.assertEqual(handler_records, ["built lazily"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import json
+import os
+import signal
+import socket
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+import httpx
+from mcp.server.fastmcp import FastMCP
+
+
+from server_utils.server_.prefork_server import PreforkServer
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "Forking server workers needs os.fork")
+class TestPreforkServer(unittest.TestCase):
+    """Test serving a FastMCP server from several forked workers sharing one socket."""
+
+    def setUp(self):
+        self.port = _free_port()
+        mcp = FastMCP("test", stateless_http=True, json_response=True, log_level="WARNING")
+
+        @mcp.tool()
+        def worker_pid() -> int:
+            time.sleep(0.05)
+            return os.getpid()
+
+        server = PreforkServer(
+            configs=SimpleNamespace(host="127.0.0.1", port=self.port, workers=2),
+            resources={'logger': MagicMock()},
+        )
+        # Supervise the workers from a child process, so its signal handlers don't replace the test runner's.
+        self.supervisor = os.fork()
+        if self.supervisor == 0:
+            try:
+                server.serve(mcp, on_fork=lambda index: None)
+            finally:
+                os._exit(0)
+
+    def tearDown(self):
+        os.kill(self.supervisor, signal.SIGTERM)
+        os.waitpid(self.supervisor, 0)
+
+    def _call_worker_pid(self, client: httpx.Client) -> int:
+        request = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "worker_pid", "arguments": {}}}
+        response = client.post(
+            f"http://127.0.0.1:{self.port}/mcp",
+            json=request,
+            headers={"Accept": "application/json, text/event-stream"},
+        )
+        response.raise_for_status()
+        return json.loads(response.json()["result"]["content"][0]["text"])
+
+    def _wait_until_serving(self, client: httpx.Client) -> None:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                self._call_worker_pid(client)
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+
+    def test_calls_are_served_by_several_workers(self):
+        """
+        GIVEN a server with two workers
+        WHEN clients make calls on separate connections
+        THEN expect them served by two processes other than the supervisor
+        """
+        pids = set()
+        with httpx.Client(timeout=10) as client:
+            self._wait_until_serving(client)
+        for _ in range(50):
+            # A new connection each time, so the kernel can hand it to either worker.
+            with httpx.Client(timeout=10) as client:
+                pids.add(self._call_worker_pid(client))
+            if len(pids) == 2:
+                break
+
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(self.supervisor, pids)
+
+    def test_worker_that_exits_is_replaced(self):
+        """
+        GIVEN a server with two workers
+        WHEN one of them is killed
+        THEN expect calls to keep being served, by a replacement worker
+        """
+        with httpx.Client(timeout=10) as client:
+            self._wait_until_serving(client)
+            killed = self._call_worker_pid(client)
+        os.kill(killed, signal.SIGKILL)
+
+        pids = set()
+        deadline = time.monotonic() + 30
+        while len(pids - {killed}) < 2 and time.monotonic() < deadline:
+            try:
+                with httpx.Client(timeout=10) as client:
+                    pids.add(self._call_worker_pid(client))
+            except httpx.TransportError:
+                time.sleep(0.1)
+
+        self.assertGreaterEqual(len(pids - {killed}), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
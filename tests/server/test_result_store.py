@@ -0,0 +1,164 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+from server_utils._run_tool._result_store import ResultStore
+from server_utils._run_tool._stream_process import stream_process
+
+
+def _configs(root_dir: Path, **overrides) -> SimpleNamespace:
+    defaults = dict(
+        ROOT_DIR=root_dir,
+        result_char_limit=1000,
+        result_store_max_entries=10,
+        result_store_max_bytes=10_000_000,
+        result_store_ttl=60,
+    )
+    return SimpleNamespace(**{**defaults, **overrides})
+
+
+class TestResultStore(unittest.TestCase):
+    """Test the paged on-disk store for truncated tool results."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root_dir = Path(self.tmp.name)
+        self.store = self._store()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _store(self, **overrides) -> ResultStore:
+        return ResultStore(configs=_configs(self.root_dir, **overrides), resources={'logger': MagicMock()})
+
+    def test_pages_cover_the_whole_result(self):
+        """
+        GIVEN a stored result
+        WHEN it is read page by page, following next_offset
+        THEN expect the pages to join up to the full result, and the last page to have no next offset
+        """
+        text = "".join(f"line {i}\n" for i in range(10_000))
+        result_id = self.store.put(text)
+
+        pages, offset = [], 0
+        while offset is not None:
+            page = self.store.get_page(result_id, offset=offset, limit=4096)
+            self.assertEqual(page.total_chars, len(text))
+            pages.append(page.text)
+            offset = page.next_offset
+
+        self.assertEqual("".join(pages), text)
+
+    def test_pages_of_non_ascii_result_are_by_character(self):
+        """
+        GIVEN a stored result with multi-byte characters
+        WHEN a page is read from an offset
+        THEN expect the offset and limit to count characters, not bytes
+        """
+        text = "é" * 500 + "ü€" * 500
+        result_id = self.store.put(text)
+
+        page = self.store.get_page(result_id, offset=499, limit=3)
+
+        self.assertEqual(page.text, "éü€")
+        self.assertEqual(page.total_chars, 1500)
+
+    def test_non_string_result_is_stored_as_json(self):
+        """
+        GIVEN a list result
+        WHEN it is stored and read whole
+        THEN expect its JSON
+        """
+        result_id = self.store.put([1, "two", {"three": 3}])
+
+        self.assertEqual(self.store.get(result_id), '[1, "two", {"three": 3}]')
+
+    def test_least_recently_read_results_are_evicted_beyond_max_entries(self):
+        """
+        GIVEN a store that keeps two results
+        WHEN the first result is read, then a third is stored
+        THEN expect the second to be evicted, and its file removed
+        """
+        store = self._store(result_store_max_entries=2)
+        first, second = store.put("first"), store.put("second")
+        store.get(first)
+
+        store.put("third")
+
+        self.assertEqual(store.get(first), "first")
+        with self.assertRaises(KeyError):
+            store.get_page(second)
+        self.assertFalse((self.root_dir / ".cache" / "tool_results" / f"{second}.txt").exists())
+
+    def test_results_are_evicted_beyond_max_bytes(self):
+        """
+        GIVEN a store that keeps 1,000 bytes
+        WHEN two 600-byte results are stored
+        THEN expect only the newer one to be kept
+        """
+        store = self._store(result_store_max_bytes=1000)
+        first, second = store.put("a" * 600), store.put("b" * 600)
+
+        with self.assertRaises(KeyError):
+            store.get(first)
+        self.assertEqual(store.get(second), "b" * 600)
+
+    def test_results_expire_after_ttl(self):
+        """
+        GIVEN a store whose results expire after 0.1 seconds
+        WHEN a result is read after that
+        THEN expect it to be gone
+        """
+        store = self._store(result_store_ttl=0.1)
+        result_id = store.put("soon gone")
+
+        time.sleep(0.2)
+
+        with self.assertRaises(KeyError):
+            store.get(result_id)
+
+    def test_result_stored_by_another_process_is_readable(self):
+        """
+        GIVEN a result stored by one store instance, as by another server process
+        WHEN another instance pages through it
+        THEN expect it to be found on disk
+        """
+        result_id = self.store.put("shared " * 1000)
+
+        page = self._store().get_page(result_id, offset=7, limit=6)
+
+        self.assertEqual(page.text, "shared")
+
+    def test_invalid_result_id_is_not_a_path(self):
+        """
+        GIVEN a result ID that isn't one the store makes
+        WHEN it is looked up
+        THEN expect a KeyError, without touching the filesystem outside the store
+        """
+        with self.assertRaises(KeyError):
+            self.store.get("../../configs")
+
+    def test_cli_output_past_limit_is_spilled_to_store(self):
+        """
+        GIVEN a command whose output is far over the streaming budget
+        WHEN it is streamed with a result store writer as the spill
+        THEN expect only the budget in memory, and all of the output in the store
+        """
+        code = "import sys\nfor i in range(20000): sys.stdout.write(f'{i}\\n')"
+
+        result = stream_process([sys.executable, "-c", code], max_chars=100, open_spill=self.store.writer)
+        result_id = result.spill.close()
+
+        expected = "".join(f"{i}{os.linesep}" for i in range(20000))
+        self.assertEqual(len(result.stdout), 100)
+        self.assertEqual(self.store.get(result_id), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
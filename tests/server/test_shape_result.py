@@ -0,0 +1,204 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+from mcp.server.fastmcp import FastMCP
+
+
+from server_utils._run_tool._result_store import ResultStore
+from server_utils._run_tool._return_text_content import return_text_content
+from server_utils._run_tool._return_tool_call_results import return_tool_call_results
+from server_utils._run_tool._run_tool import _RunTool
+from server_utils._run_tool._shape_result import ResultShaper, _CharEstimateCounter
+from server_utils.server_.tool_metrics import ToolMetrics
+from server_utils.server_.tool_tracing import ToolTracer
+
+
+def _configs(**overrides) -> SimpleNamespace:
+    defaults = dict(
+        result_token_budget=100,
+        result_token_encoding="cl100k_base",
+        result_char_limit=19_000,
+        result_store_max_entries=10,
+        result_store_max_bytes=10_000_000,
+        result_store_ttl=60,
+    )
+    return SimpleNamespace(**{**defaults, **overrides})
+
+
+class TestResultShaper(unittest.TestCase):
+    """Test token-aware, structure-preserving truncation of tool results."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.configs = _configs(ROOT_DIR=Path(self.tmp.name))
+        resources = {'logger': MagicMock()}
+        self.store = ResultStore(configs=self.configs, resources=resources)
+        self.metrics = ToolMetrics(configs=SimpleNamespace(), resources=resources)
+        self.shaper = ResultShaper(configs=self.configs, resources={
+            **resources,
+            'result_store': self.store,
+            'tool_metrics': self.metrics,
+            'tool_tracer': ToolTracer(configs=SimpleNamespace(), resources=resources),
+        })
+        # Count tokens the same way whether or not tiktoken and its encodings are available.
+        self.shaper._counter = _CharEstimateCounter()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_small_result_is_repr_as_before(self):
+        """
+        GIVEN a result that fits in the token budget
+        WHEN it is shaped
+        THEN expect its repr, untruncated, and nothing stored
+        """
+        result = {"key": "value", "numbers": [1, 2, 3]}
+
+        shaped = self.shaper.shape(result)
+
+        self.assertEqual(shaped.text, repr(result))
+        self.assertFalse(shaped.truncated)
+        self.assertIsNone(shaped.result_id)
+
+    def test_large_list_keeps_structure_and_counts_elided_items(self):
+        """
+        GIVEN a list far larger than the token budget
+        WHEN it is shaped
+        THEN expect valid JSON holding the first items and a marker with the number of items left out
+        """
+        result = list(range(1_000_000))
+
+        shaped = self.shaper.shape(result)
+        pruned = json.loads(shaped.text)
+
+        self.assertTrue(shaped.truncated)
+        self.assertEqual(pruned[:3], [0, 1, 2])
+        kept = len(pruned) - 1
+        self.assertEqual(pruned[-1], f"... {len(result) - kept:,} more items")
+
+    def test_large_dict_of_lists_elides_inside_and_across_keys(self):
+        """
+        GIVEN a dict of long lists
+        WHEN it is shaped
+        THEN expect the first key's list cut short, and a marker for the keys left out
+        """
+        result = {f"key_{i}": list(range(1000)) for i in range(50)}
+
+        pruned = json.loads(self.shaper.shape(result).text)
+
+        self.assertIn("key_0", pruned)
+        self.assertTrue(pruned["key_0"][-1].endswith("more items"))
+        self.assertTrue(pruned["..."].endswith("more keys"))
+
+    def test_long_string_is_truncated_to_budget(self):
+        """
+        GIVEN a string far over the token budget
+        WHEN it is shaped
+        THEN expect the repr of its first budget's worth of characters with an ellipsis
+        """
+        result = "x" * 25_000
+
+        shaped = self.shaper.shape(result)
+
+        budget_chars = self.configs.result_token_budget * _CharEstimateCounter.CHARS_PER_TOKEN
+        self.assertTrue(shaped.truncated)
+        self.assertEqual(shaped.text, repr("x" * budget_chars + "..."))
+
+    def test_truncated_result_is_stored_and_readable(self):
+        """
+        GIVEN a result over the token budget
+        WHEN it is shaped
+        THEN expect the full result to be readable from the store by the returned ID, with the ID in the note
+        """
+        result = [{"id": i} for i in range(500)]
+
+        shaped = self.shaper.shape(result)
+
+        self.assertEqual(json.loads(self.store.get(shaped.result_id)), result)
+        self.assertIn(shaped.result_id, self.shaper.truncation_note(shaped))
+
+    def test_shaped_function_tool_output_is_not_cut_again(self):
+        """
+        GIVEN a function tool whose output is over a budget that shapes to more than 20,000 characters
+        WHEN it is run
+        THEN expect the shaper's note and result ID in the output, and the original output in the store
+        """
+        self.shaper.configs.result_token_budget = 6_000
+        run_tool = _RunTool(configs=SimpleNamespace(tool_timeout=10, result_char_limit=19_000), resources={
+            'return_tool_call_results': return_tool_call_results,
+            'return_text_content': return_text_content,
+            'logger': MagicMock(),
+            'tool_registry': MagicMock(refresh=lambda func: func),
+            'tool_thread_pool': MagicMock(),
+            'tool_single_flight': MagicMock(),
+            'cli_workers': MagicMock(),
+            'result_shaper': self.shaper,
+            'result_store': self.store,
+            'tool_metrics': MagicMock(instrument=lambda name, func: func),
+            'tool_tracer': MagicMock(),
+        })
+        output = 'a"b\n' * 30_000
+
+        def tool() -> str:
+            return output
+
+        text = run_tool(tool).content[0].text
+
+        self.assertGreater(len(text), 20_000)
+        self.assertIn("Output truncated to fit 6,000 tokens.", text)
+        self.assertNotIn("characters.", text)
+        result_id = text.rsplit("Result ID: ", 1)[1][:16]
+        self.assertEqual(self.store.get(result_id), output)
+
+
+    def test_served_tool_result_over_budget_is_shaped(self):
+        """
+        GIVEN a FastMCP tool with an output schema, returning far more than the token budget
+        WHEN it is called through a server whose results are shaped
+        THEN expect the shaped text with a note instead of the whole result, and the whole result in the store
+        """
+        mcp = FastMCP("test")
+
+        @mcp.tool()
+        def rows() -> list[dict[str, int]]:
+            return [{"id": i} for i in range(50_000)]
+
+        self.shaper.shape_mcp(mcp)
+
+        result = asyncio.run(mcp.call_tool("rows", {}))
+
+        text = result.content[0].text
+        self.assertLess(len(text), 2_000)
+        self.assertIn("more items", text)
+        result_id = text.rsplit("Result ID: ", 1)[1][:16]
+        self.assertEqual(len(json.loads(self.store.get(result_id))), 50_000)
+        self.assertEqual(self.metrics.snapshot()["rows"]["truncations"], 1)
+        self.assertEqual(self.metrics.snapshot()["rows"]["output_bytes"]["sum"], len(text.encode("utf-8")))
+
+    def test_served_tool_result_within_budget_is_unchanged(self):
+        """
+        GIVEN a FastMCP tool with an output schema, returning a small result
+        WHEN it is called through a server whose results are shaped
+        THEN expect FastMCP's usual content and structured content, and the size of that content recorded
+        """
+        mcp = FastMCP("test")
+
+        @mcp.tool()
+        def rows() -> list[dict[str, int]]:
+            return [{"id": 1}]
+
+        expected = asyncio.run(mcp.call_tool("rows", {}))
+        self.shaper.shape_mcp(mcp)
+
+        self.assertEqual(asyncio.run(mcp.call_tool("rows", {})), expected)
+        self.assertEqual(self.metrics.snapshot()["rows"]["output_bytes"]["sum"], len(expected[0][0].text))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import io
+import json
+import unittest
+
+
+import anyio
+import mcp.types as types
+from mcp.shared.message import SessionMessage
+
+
+from server_utils._run_tool._return_text_content import return_text_content
+from server_utils.server_.stdio_transport import stdio_server, write_messages
+
+
+class _RecordingBuffer(io.BytesIO):
+    """A binary stream that records the size of each write and counts flushes."""
+
+    def __init__(self):
+        super().__init__()
+        self.write_sizes = []
+        self.flushes = 0
+
+    def write(self, data) -> int:
+        self.write_sizes.append(len(data))
+        return super().write(data)
+
+    def flush(self) -> None:
+        self.flushes += 1
+
+
+def _response(request_id: int, text: str) -> SessionMessage:
+    result = types.CallToolResult(content=[types.TextContent(type="text", text=text)])
+    response = types.JSONRPCResponse(jsonrpc="2.0", id=request_id, result=result.model_dump(by_alias=True, exclude_none=True))
+    return SessionMessage(types.JSONRPCMessage(response))
+
+
+class TestStdioTransport(unittest.TestCase):
+    """Test writing MCP responses to stdout in chunks, several to a flush."""
+
+    def test_large_message_is_written_in_chunks(self):
+        """
+        GIVEN a response larger than the chunk size
+        WHEN it is written
+        THEN expect writes no larger than the chunk size, one flush, and the same JSON line the SDK would write
+        """
+        message = _response(1, 'line with "quotes" and \\ backslashes\n' * 1000)
+        stdout = _RecordingBuffer()
+
+        written = write_messages(stdout, [message], chunk_size=4096)
+
+        expected = message.message.model_dump_json(by_alias=True, exclude_none=True) + "\n"
+        self.assertEqual(stdout.getvalue().decode("utf-8"), expected)
+        self.assertEqual(written, len(expected.encode("utf-8")))
+        self.assertLessEqual(max(stdout.write_sizes), 4096)
+        self.assertGreater(len(stdout.write_sizes), 2)
+        self.assertEqual(stdout.flushes, 1)
+
+    def test_server_writes_every_message_as_a_json_line(self):
+        """
+        GIVEN the stdio transport with in-memory stdin and stdout
+        WHEN several responses are sent concurrently
+        THEN expect each on its own JSON line, in the order sent
+        """
+        stdout = _RecordingBuffer()
+
+        async def main():
+            stdin = anyio.wrap_file(io.StringIO(""))
+            async with stdio_server(stdin=stdin, stdout=stdout, chunk_size=1024) as (read_stream, write_stream):
+                async with write_stream:
+                    for request_id in range(5):
+                        await write_stream.send(_response(request_id, "x" * 3000))
+
+        anyio.run(main)
+
+        lines = stdout.getvalue().decode("utf-8").splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], list(range(5)))
+        self.assertLessEqual(stdout.flushes, 5)
+
+    def test_string_results_are_not_quoted_again(self):
+        """
+        GIVEN a string result with quotes, backslashes and newlines, and an exception result
+        WHEN they are turned into text content
+        THEN expect the string included as it is, and the exception as its repr
+        """
+        text = "'tool' output: a \"quoted\" C:\\path\nsecond line"
+
+        self.assertEqual(return_text_content(text, "Success").text, f"Success: {text}")
+        self.assertEqual(return_text_content(ValueError("no"), "Error").text, "Error: ValueError('no')")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import subprocess as sub
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+
+from server_utils._run_tool import _stream_process
+from server_utils._run_tool._stream_process import stream_process
+
+
+def _python(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+class TestStreamProcess(unittest.TestCase):
+    """Test incremental reading of CLI tool output with an output budget."""
+
+    def test_output_within_budget_is_returned_whole(self):
+        """
+        GIVEN a command whose output fits in the budget
+        WHEN it is streamed
+        THEN expect all of its stdout and stderr and its exit code
+        """
+        result = stream_process(_python("import sys; print('out'); print('err', file=sys.stderr); sys.exit(2)"), max_chars=100)
+
+        self.assertEqual(result.returncode, 2)
+        self.assertEqual(result.stdout.strip(), "out")
+        self.assertEqual(result.stderr.strip(), "err")
+        self.assertFalse(result.truncated)
+
+    def test_output_past_budget_is_discarded_while_reading(self):
+        """
+        GIVEN a command that writes far more than the budget
+        WHEN it is streamed
+        THEN expect only the budget to be kept, and the command to still finish normally
+        """
+        result = stream_process(_python("import sys; sys.stdout.write('x' * 5_000_000)"), max_chars=1000)
+
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(len(result.stdout), 1000)
+        self.assertTrue(result.truncated)
+        self.assertFalse(result.terminated_at_limit)
+
+    def test_terminate_at_limit_stops_chatty_command(self):
+        """
+        GIVEN a command that writes forever
+        WHEN it is streamed with terminate_at_limit
+        THEN expect it to be terminated soon after reaching the budget
+        """
+        start = time.perf_counter()
+        result = stream_process(
+            _python("import sys\nwhile True: sys.stdout.write('x' * 1000); sys.stdout.flush()"),
+            max_chars=10_000, timeout=30, terminate_at_limit=True,
+        )
+
+        self.assertLess(time.perf_counter() - start, 10)
+        self.assertTrue(result.terminated_at_limit)
+        self.assertEqual(len(result.stdout), 10_000)
+
+    def test_progress_callback_receives_output_as_it_arrives(self):
+        """
+        GIVEN a command that prints lines with pauses in between
+        WHEN it is streamed with an output callback
+        THEN expect the callback to be called more than once, with a growing character count
+        """
+        calls = []
+        stream_process(
+            _python("import time\nfor i in range(3): print(i, flush=True); time.sleep(0.1)"),
+            max_chars=1000, on_output=lambda chars, text: calls.append((chars, text)),
+        )
+
+        self.assertGreater(len(calls), 1)
+        self.assertEqual([chars for chars, _ in calls], sorted(chars for chars, _ in calls))
+
+    def test_spill_is_not_written_after_return_while_a_grandchild_holds_the_pipe(self):
+        """
+        GIVEN a command that goes past the budget and exits, leaving a child that keeps writing to its stdout
+        WHEN it is streamed with a spill that the caller closes once the result is returned
+        THEN expect nothing to be written to the spill after it is closed
+        """
+        child = "import time\nfor _ in range(60): print('y' * 1000, flush=True); time.sleep(0.05)"
+        parent = f"import subprocess, sys; subprocess.Popen([sys.executable, '-c', {child!r}]); print('x' * 5000, flush=True)"
+        writes_after_close = []
+
+        class Spill:
+            closed = False
+
+            def write(self, text: str) -> None:
+                if self.closed:
+                    writes_after_close.append(text)
+
+        spill = Spill()
+        with patch.object(_stream_process, "_TERMINATE_GRACE_SECONDS", 0.1):
+            result = stream_process(_python(parent), max_chars=1000, timeout=1, open_spill=lambda: spill)
+        spill.closed = True
+        # Let the child finish writing.
+        time.sleep(2.5)
+
+        self.assertTrue(result.truncated)
+        self.assertIs(result.spill, spill)
+        self.assertEqual(writes_after_close, [])
+
+    def test_timeout_kills_command(self):
+        """
+        GIVEN a command that runs longer than the timeout
+        WHEN it is streamed
+        THEN expect TimeoutExpired with the output read so far
+        """
+        with self.assertRaises(sub.TimeoutExpired) as context:
+            stream_process(_python("import time; print('started', flush=True); time.sleep(30)"), max_chars=1000, timeout=1)
+
+        self.assertIn("started", context.exception.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
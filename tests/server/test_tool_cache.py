@@ -0,0 +1,229 @@
+import asyncio
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+from server_utils.server_.tool_cache import ToolCache, memoize
+
+
+_TOOL_SOURCE = '''
+from server_utils.server_.tool_cache import memoize
+
+CALLS = []
+
+@memoize
+def count_lines(file_path: str, strip: bool = True) -> int:
+    """Count the lines in a file."""
+    CALLS.append(file_path)
+    with open(file_path) as f:
+        return len(f.read().splitlines())
+
+@memoize(paths=("directory",), persist=True)
+def list_files(directory: str) -> list[str]:
+    """List the files in a directory."""
+    import os
+    CALLS.append(directory)
+    return sorted(os.listdir(directory))
+
+def not_memoized(x: int) -> int:
+    """Not cached."""
+    CALLS.append(x)
+    return x
+'''
+
+
+class TestToolCache(unittest.TestCase):
+    """Test memoization of deterministic tools on their arguments and the contents of the files they read."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        (self.root / "cache_test_tool.py").write_text(_TOOL_SOURCE)
+        sys.path.insert(0, self.temp_dir.name)
+        import cache_test_tool
+        self.module = cache_test_tool
+        self.module.CALLS.clear()
+
+        self.data_file = self.root / "data.txt"
+        self.data_file.write_text("one\ntwo\n")
+        self.cache = self._cache()
+
+    def tearDown(self):
+        sys.path.remove(self.temp_dir.name)
+        sys.modules.pop("cache_test_tool", None)
+        self.temp_dir.cleanup()
+
+    def _cache(self, max_entries: int = 8) -> ToolCache:
+        configs = SimpleNamespace(ROOT_DIR=self.root, tool_cache_max_entries=max_entries, tool_cache_max_disk_entries=8)
+        return ToolCache(configs=configs, resources={'logger': MagicMock()})
+
+    def test_repeated_call_is_a_hit(self):
+        """
+        GIVEN a memoized tool
+        WHEN it is called twice with the same arguments
+        THEN expect it to run once, and the stats to count one miss and one hit
+        """
+        first = self.cache.call(self.module.count_lines, str(self.data_file))
+        second = self.cache.call(self.module.count_lines, file_path=str(self.data_file), strip=True)
+
+        self.assertEqual(first, 2)
+        self.assertEqual(second, 2)
+        self.assertEqual(len(self.module.CALLS), 1)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["tools"]["count_lines"], {"hits": 1, "misses": 1})
+
+    def test_callers_get_their_own_copy_of_a_cached_result(self):
+        """
+        GIVEN a memoized tool that returns a list
+        WHEN the first caller mutates its result and the tool is called again
+        THEN expect the second caller to get the original result, in a different object
+        """
+        (self.root / "sub").mkdir()
+        (self.root / "sub" / "a.txt").write_text("a")
+
+        first = self.cache.call(self.module.list_files, str(self.root / "sub"))
+        first.append("mutated")
+        second = self.cache.call(self.module.list_files, str(self.root / "sub"))
+        second.append("mutated again")
+        third = self.cache.call(self.module.list_files, str(self.root / "sub"))
+
+        self.assertEqual(third, ["a.txt"])
+        self.assertEqual(len(self.module.CALLS), 1)
+
+    def test_changed_file_contents_are_a_miss(self):
+        """
+        GIVEN a memoized tool that was called on a file
+        WHEN the file's contents change and it is called again
+        THEN expect it to run again and return the new result
+        """
+        self.cache.call(self.module.count_lines, str(self.data_file))
+        self.data_file.write_text("one\ntwo\nthree\nfour\n")
+
+        self.assertEqual(self.cache.call(self.module.count_lines, str(self.data_file)), 4)
+        self.assertEqual(len(self.module.CALLS), 2)
+
+    def test_changed_directory_contents_are_a_miss(self):
+        """
+        GIVEN a tool memoized on a directory argument
+        WHEN a file is added to the directory
+        THEN expect the cached result to be invalidated
+        """
+        directory = self.root / "listing"
+        directory.mkdir()
+        (directory / "a.txt").write_text("a")
+        self.cache.call(self.module.list_files, str(directory))
+        (directory / "b.txt").write_text("b")
+
+        self.assertEqual(self.cache.call(self.module.list_files, str(directory)), ["a.txt", "b.txt"])
+
+    def test_least_recently_used_results_are_evicted(self):
+        """
+        GIVEN a cache that keeps one result
+        WHEN a tool is called with two different arguments, then the first again
+        THEN expect the first to have been evicted and run again
+        """
+        cache = self._cache(max_entries=1)
+        other_file = self.root / "other.txt"
+        other_file.write_text("x\n")
+
+        for path in (self.data_file, other_file, self.data_file):
+            cache.call(self.module.count_lines, str(path))
+
+        self.assertEqual(len(self.module.CALLS), 3)
+
+    def test_persisted_results_survive_a_new_cache(self):
+        """
+        GIVEN a tool memoized with persist=True
+        WHEN it is called, then called again through a new cache, as after a restart
+        THEN expect the second call to be served from disk
+        """
+        directory = self.root / "persisted"
+        directory.mkdir()
+        (directory / "a.txt").write_text("a")
+        self.cache.call(self.module.list_files, str(directory))
+
+        result = self._cache().call(self.module.list_files, str(directory))
+
+        self.assertEqual(result, ["a.txt"])
+        self.assertEqual(len(self.module.CALLS), 1)
+
+    def test_unmarked_tool_is_not_cached(self):
+        """
+        GIVEN a tool without @memoize
+        WHEN it is called twice through the cache wrapper
+        THEN expect it to run both times
+        """
+        wrapped = self.cache.wrap(self.module.not_memoized)
+
+        wrapped(1)
+        wrapped(1)
+
+        self.assertEqual(self.module.CALLS, [1, 1])
+        self.assertEqual(self.cache.stats()["misses"], 0)
+
+    def test_wrapper_caches_and_calls_through_given_callable(self):
+        """
+        GIVEN a memoized tool wrapped with a different callable to run on a miss, as when routed to a worker process
+        WHEN the wrapper is called twice with the same arguments
+        THEN expect the callable to run once, and the wrapper to keep the tool's name
+        """
+        routed_calls = []
+
+        def routed(*args, **kwargs):
+            routed_calls.append(args)
+            return self.module.count_lines(*args, **kwargs)
+
+        wrapped = self.cache.wrap(self.module.count_lines, call=routed)
+
+        self.assertEqual(wrapped(str(self.data_file)), 2)
+        self.assertEqual(wrapped(str(self.data_file)), 2)
+        self.assertEqual(len(routed_calls), 1)
+        self.assertEqual(wrapped.__name__, "count_lines")
+
+    def test_async_tool_is_cached(self):
+        """
+        GIVEN a memoized coroutine function
+        WHEN its cache wrapper is awaited twice with the same arguments
+        THEN expect the wrapper to be a coroutine function, and the tool to run once
+        """
+        calls = []
+
+        @memoize
+        async def double(x: int) -> int:
+            calls.append(x)
+            return x * 2
+
+        wrapped = self.cache.wrap(double)
+
+        self.assertTrue(asyncio.iscoroutinefunction(wrapped))
+        self.assertEqual(asyncio.run(wrapped(2)), 4)
+        self.assertEqual(asyncio.run(wrapped(x=2)), 4)
+        self.assertEqual(calls, [2])
+        self.assertEqual(self.cache.stats()["tools"]["double"], {"hits": 1, "misses": 1})
+
+    def test_exceptions_are_not_cached(self):
+        """
+        GIVEN a memoized tool that raises
+        WHEN it is called twice
+        THEN expect it to run both times
+        """
+        calls = []
+
+        @memoize
+        def failing(x: int) -> int:
+            calls.append(x)
+            raise ValueError("no")
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.cache.call(failing, 1)
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
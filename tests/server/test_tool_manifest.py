@@ -0,0 +1,110 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+from mcp.server import FastMCP
+
+
+from server_utils.server_.tool_manifest import ToolManifest
+
+
+_TOOL_SOURCE = '''
+def manifest_example_tool(name: str, count: int = 2) -> str:
+    """Repeat a name."""
+    return " ".join([name] * count)
+'''
+
+
+class TestToolManifest(unittest.TestCase):
+    """Test registering function tools from the cached tool manifest."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        (root / "tools" / "functions").mkdir(parents=True)
+        self.package_dir = root / "manifest_test_pkg"
+        self.package_dir.mkdir()
+        (self.package_dir / "__init__.py").touch()
+        self.file = self.package_dir / "manifest_example_tool.py"
+        self.file.write_text(_TOOL_SOURCE)
+        sys.path.insert(0, self.temp_dir.name)
+
+        self.configs = SimpleNamespace(ROOT_DIR=root)
+        self.resources = {'logger': MagicMock()}
+
+    def tearDown(self):
+        sys.path.remove(self.temp_dir.name)
+        for name in [name for name in sys.modules if name.startswith("manifest_test_pkg")]:
+            del sys.modules[name]
+        self.temp_dir.cleanup()
+
+    def _record(self) -> FastMCP:
+        from manifest_test_pkg.manifest_example_tool import manifest_example_tool
+        mcp = FastMCP("real")
+        mcp.add_tool(manifest_example_tool, name="manifest_example_tool", description=manifest_example_tool.__doc__)
+        manifest = ToolManifest(configs=self.configs, resources=self.resources)
+        manifest.record(self.file, manifest.get_registered_tool(mcp, "manifest_example_tool"), manifest_example_tool.__module__)
+        manifest.save()
+        del sys.modules["manifest_test_pkg.manifest_example_tool"]
+        return mcp
+
+    def test_unchanged_tool_loads_from_manifest_without_import(self):
+        """
+        GIVEN a tool recorded in a saved manifest
+        WHEN a new manifest instance registers the unchanged tool from its entry
+        THEN expect:
+            - The tool's module is not imported
+            - FastMCP lists the same schema as for the real function
+            - Calling the tool imports the module and returns the real result
+        """
+        real = self._record()
+
+        manifest = ToolManifest(configs=self.configs, resources=self.resources)
+        entry = manifest.get(self.file)
+        self.assertIsNotNone(entry)
+        mcp = FastMCP("test")
+        mcp._tool_manager._tools[entry["name"]] = manifest.make_tool(entry)
+
+        self.assertNotIn("manifest_test_pkg.manifest_example_tool", sys.modules)
+        listed = asyncio.run(mcp.list_tools())
+        expected = asyncio.run(real.list_tools())
+        self.assertEqual(listed, expected)
+
+        result = asyncio.run(mcp.call_tool("manifest_example_tool", {"name": "hi", "count": 3}))
+        self.assertIn("manifest_test_pkg.manifest_example_tool", sys.modules)
+        self.assertIn("hi hi hi", str(result))
+
+    def test_changed_source_invalidates_entry(self):
+        """
+        GIVEN a tool recorded in a saved manifest
+        WHEN its source file is changed
+        THEN expect no entry, so the tool is registered from its source again
+        """
+        self._record()
+        self.file.write_text(_TOOL_SOURCE.replace("Repeat a name.", "Repeat a name a few times."))
+
+        manifest = ToolManifest(configs=self.configs, resources=self.resources)
+        self.assertIsNone(manifest.get(self.file))
+
+    def test_touched_but_unchanged_source_keeps_entry(self):
+        """
+        GIVEN a tool recorded in a saved manifest
+        WHEN its source file's mtime changes but its content does not
+        THEN expect the entry to still be used
+        """
+        self._record()
+        stat = self.file.stat()
+        os.utime(self.file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        manifest = ToolManifest(configs=self.configs, resources=self.resources)
+        self.assertIsNotNone(manifest.get(self.file))
+
+
+if __name__ == "__main__":
+    unittest.main()
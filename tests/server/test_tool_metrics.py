@@ -0,0 +1,134 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+from server_utils.server_.tool_metrics import Histogram, ToolMetrics
+
+
+class TestToolMetrics(unittest.TestCase):
+    """Test per-tool latency, CPU time, output size, error and truncation metrics."""
+
+    def setUp(self):
+        self.metrics = ToolMetrics(configs=SimpleNamespace(), resources={'logger': MagicMock()})
+
+    def test_histogram_quantiles_are_interpolated_within_buckets(self):
+        """
+        GIVEN a histogram with values spread evenly from 1 to 100
+        WHEN its quantiles are estimated
+        THEN expect them to be close to the true quantiles, and no larger than the largest value
+        """
+        histogram = Histogram((10, 50, 100, 1000))
+        for value in range(1, 101):
+            histogram.observe(value)
+
+        self.assertAlmostEqual(histogram.quantile(0.5), 50, delta=1)
+        self.assertAlmostEqual(histogram.quantile(0.95), 95, delta=1)
+        self.assertLessEqual(histogram.quantile(0.99), 100)
+        self.assertEqual(histogram.summary()["max"], 100)
+
+    def test_instrumented_sync_tool_records_wall_and_cpu_time(self):
+        """
+        GIVEN a synchronous tool that computes for a while and returns a string
+        WHEN it is called through the instrumented wrapper
+        THEN expect one call with its wall time and CPU time recorded, and its name kept
+        """
+        def busy_tool(n: int) -> str:
+            """Busy."""
+            deadline = time.thread_time() + 0.02
+            while time.thread_time() < deadline:
+                pass
+            return "x" * n
+
+        instrumented = self.metrics.instrument("busy_tool", busy_tool)
+        instrumented(500)
+
+        stats = self.metrics.snapshot()["busy_tool"]
+        self.assertEqual((stats["calls"], stats["errors"]), (1, 0))
+        self.assertGreaterEqual(stats["wall_seconds"]["sum"], 0.02)
+        self.assertGreaterEqual(stats["cpu_seconds"]["sum"], 0.02)
+        self.assertEqual(instrumented.__name__, "busy_tool")
+        self.assertEqual(instrumented.__doc__, "Busy.")
+
+    def test_instrumented_tool_errors_are_counted_and_reraised(self):
+        """
+        GIVEN a synchronous and an async tool that raise
+        WHEN they are called through the instrumented wrappers
+        THEN expect the exceptions to propagate, and an error to be counted for each
+        """
+        def failing() -> None:
+            raise ValueError("no")
+
+        async def afailing() -> None:
+            raise ValueError("no")
+
+        with self.assertRaises(ValueError):
+            self.metrics.instrument("failing", failing)()
+        with self.assertRaises(ValueError):
+            asyncio.run(self.metrics.instrument("afailing", afailing)())
+
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["failing"]["errors"], 1)
+        self.assertEqual(snapshot["afailing"]["errors"], 1)
+        self.assertEqual(snapshot["afailing"]["cpu_seconds"]["count"], 0)
+
+    def test_output_size_is_recorded_without_counting_a_call(self):
+        """
+        GIVEN an instrumented call, and the size of its output once converted to content
+        WHEN both are recorded
+        THEN expect one call, and the output size in its histogram
+        """
+        async def tool() -> dict:
+            return {"a": 1}
+
+        asyncio.run(self.metrics.instrument("tool", tool)())
+        self.metrics.record_output("tool", 7)
+
+        stats = self.metrics.snapshot()["tool"]
+        self.assertEqual(stats["calls"], 1)
+        self.assertEqual((stats["output_bytes"]["count"], stats["output_bytes"]["sum"]), (1, 7))
+
+    def test_prometheus_export(self):
+        """
+        GIVEN recorded calls and a truncation
+        WHEN the metrics are exported to a file
+        THEN expect Prometheus counters and cumulative histogram buckets for the tool
+        """
+        self.metrics.observe("tool", 0.02, output_bytes=5000)
+        self.metrics.observe("tool", 3.0, error=True)
+        self.metrics.record_truncation("tool")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "metrics" / "tools.prom"
+            self.metrics.export(path)
+            text = path.read_text()
+
+        self.assertIn('mcp_tool_calls_total{tool="tool"} 2', text)
+        self.assertIn('mcp_tool_errors_total{tool="tool"} 1', text)
+        self.assertIn('mcp_tool_truncations_total{tool="tool"} 1', text)
+        self.assertIn('mcp_tool_wall_seconds_bucket{tool="tool",le="0.025"} 1', text)
+        self.assertIn('mcp_tool_wall_seconds_bucket{tool="tool",le="+Inf"} 2', text)
+        self.assertIn('mcp_tool_output_bytes_count{tool="tool"} 1', text)
+
+    def test_prometheus_export_includes_labels(self):
+        """
+        GIVEN metrics labelled with the server worker that recorded them
+        WHEN they are formatted for Prometheus
+        THEN expect the worker label on every series, after the tool
+        """
+        self.metrics.labels["worker"] = "1"
+        self.metrics.observe("tool", 0.02)
+
+        text = self.metrics.to_prometheus()
+
+        self.assertIn('mcp_tool_calls_total{tool="tool",worker="1"} 1', text)
+        self.assertIn('mcp_tool_wall_seconds_bucket{tool="tool",worker="1",le="0.025"} 1', text)
+        self.assertIn('mcp_tool_wall_seconds_sum{tool="tool",worker="1"}', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
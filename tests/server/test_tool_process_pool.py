@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+import importlib
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+from server_utils.server_.tool_process_pool import ToolProcessPool
+
+
+_TOOL_SOURCE = '''
+import os
+import time
+
+RUN_IN_PROCESS = True
+
+def process_test_tool(seconds: float = 0.0) -> int:
+    """Sleep, then return the worker's process ID."""
+    time.sleep(seconds)
+    return os.getpid()
+'''
+
+
+class TestToolProcessPool(unittest.TestCase):
+    """Test running opted-in tools in warm worker processes."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.tool_path = Path(self.temp_dir.name) / "process_test_tool.py"
+        self.tool_path.write_text(_TOOL_SOURCE)
+        sys.path.insert(0, self.temp_dir.name)
+        import process_test_tool
+        self.func = process_test_tool.process_test_tool
+
+        self.pool = ToolProcessPool(
+            configs=SimpleNamespace(tool_process_pool_workers=1, tool_timeout=5),
+            resources={'logger': MagicMock()},
+        )
+
+    def tearDown(self):
+        self.pool.shutdown()
+        sys.path.remove(self.temp_dir.name)
+        sys.modules.pop("process_test_tool", None)
+        self.temp_dir.cleanup()
+
+    def test_opted_in_tool_runs_in_reused_worker_process(self):
+        """
+        GIVEN a tool whose module sets RUN_IN_PROCESS = True
+        WHEN it is called twice through a routed wrapper
+        THEN expect both calls to run in the same worker process, not the server's
+        """
+        routed = self.pool.route(self.func)
+
+        first, second = routed(), routed()
+
+        self.assertNotEqual(first, os.getpid())
+        self.assertEqual(first, second)
+
+    def test_tool_without_flag_runs_inline(self):
+        """
+        GIVEN a tool whose module doesn't opt in
+        WHEN it is called through a routed wrapper
+        THEN expect it to run in the server's process
+        """
+        def inline_tool() -> int:
+            """Return the process ID."""
+            return os.getpid()
+
+        self.assertEqual(self.pool.route(inline_tool)(), os.getpid())
+
+    def test_timeout_kills_worker_and_next_call_starts_a_new_one(self):
+        """
+        GIVEN a tool call that runs longer than the tool timeout
+        WHEN it is called
+        THEN expect a TimeoutError, with the worker killed and a new worker serving the next call
+        """
+        first_pid = self.pool.run(self.func)
+        self.pool.configs.tool_timeout = 0.5
+
+        start = time.perf_counter()
+        with self.assertRaises(TimeoutError):
+            self.pool.run(self.func, seconds=30)
+        self.assertLess(time.perf_counter() - start, 5)
+
+        self.pool.configs.tool_timeout = 5
+        self.assertNotEqual(self.pool.run(self.func), first_pid)
+
+    def test_time_waiting_for_a_worker_does_not_count_toward_timeout(self):
+        """
+        GIVEN one worker and two calls that each take most of the tool timeout
+        WHEN they are made at the same time
+        THEN expect both to finish, since the second one's wait for the worker isn't timed
+        """
+        self.pool.run(self.func)
+        self.pool.configs.tool_timeout = 1.5
+
+        with ThreadPoolExecutor(max_workers=2) as callers:
+            futures = [callers.submit(self.pool.run, self.func, seconds=1.0) for _ in range(2)]
+            pids = [future.result() for future in futures]
+
+        self.assertEqual(pids[0], pids[1])
+        self.assertFalse(self.pool._logger.error.called)
+
+    def test_retired_pool_runs_reloaded_code_in_new_workers(self):
+        """
+        GIVEN a tool that has run in a worker process
+        WHEN its module is changed, reloaded and its pool retired
+        THEN expect the next call to run the new code in a new worker
+        """
+        first_pid = self.pool.run(self.func)
+        self.tool_path.write_text(_TOOL_SOURCE.replace("return os.getpid()", "return -os.getpid()"))
+        importlib.invalidate_caches()
+        module = importlib.reload(sys.modules["process_test_tool"])
+
+        self.pool.retire("process_test_tool")
+        pid = self.pool.run(module.process_test_tool)
+
+        self.assertLess(pid, 0)
+        self.assertNotEqual(-pid, first_pid)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import inspect
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+
+from mcp.server import FastMCP
+
+
+from server_utils.server_.tool_cache import ToolCache
+from server_utils.server_.tool_metrics import ToolMetrics
+from server_utils.server_.tool_process_pool import ToolProcessPool
+from server_utils.server_.tool_tracing import ToolTracer
+from server_utils.server_.tool_registry import ToolRegistry
+from server_utils.server_.tool_single_flight import ToolSingleFlight
+from server_utils.server_.tool_thread_pool import ToolThreadPool
+
+
+_MODULE_TEMPLATE = '''
+LOADS = globals().get("LOADS", 0) + 1
+
+def registry_test_tool(x: int) -> int:
+    """{doc}"""
+    return x + {increment}
+'''
+
+
+class TestToolRegistry(unittest.TestCase):
+    """Test ToolRegistry mtime-based reloading and re-registration."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.module_path = Path(self.temp_dir.name) / "registry_test_tool.py"
+        self._write(doc="Add one.", increment=1)
+        sys.path.insert(0, self.temp_dir.name)
+
+        import registry_test_tool
+        self.module = registry_test_tool
+
+        self.mcp = FastMCP("test")
+        tool_thread_pool = ToolThreadPool(configs=SimpleNamespace(tool_thread_pool_workers=2), resources={"logger": Mock()})
+        tool_process_pool = ToolProcessPool(configs=SimpleNamespace(tool_process_pool_workers=1, tool_timeout=10), resources={"logger": Mock()})
+        tool_cache = ToolCache(
+            configs=SimpleNamespace(ROOT_DIR=Path(self.temp_dir.name), tool_cache_max_entries=8, tool_cache_max_disk_entries=8),
+            resources={"logger": Mock()},
+        )
+        tool_single_flight = ToolSingleFlight(configs=SimpleNamespace(coalesce_tool_calls=True), resources={"logger": Mock()})
+        self.registry = ToolRegistry(resources={
+            "logger": Mock(), "tool_thread_pool": tool_thread_pool, "tool_process_pool": tool_process_pool,
+            "tool_cache": tool_cache, "tool_single_flight": tool_single_flight,
+            "tool_metrics": ToolMetrics(configs=SimpleNamespace(), resources={"logger": Mock()}),
+            "tool_tracer": ToolTracer(configs=SimpleNamespace(), resources={"logger": Mock()}),
+        })
+        self.registry.add_tool(
+            self.mcp, self.module.registry_test_tool,
+            name="registry_test_tool", description=self.module.registry_test_tool.__doc__
+        )
+
+    def tearDown(self):
+        self.registry.stop_watching()
+        sys.path.remove(self.temp_dir.name)
+        sys.modules.pop("registry_test_tool", None)
+        self.temp_dir.cleanup()
+
+    def _write(self, doc: str, increment: int) -> None:
+        """Rewrite the tool module and push its mtime forward so the change is always visible."""
+        mtime_ns = os.stat(self.module_path).st_mtime_ns if self.module_path.exists() else 0
+        self.module_path.write_text(_MODULE_TEMPLATE.format(doc=doc, increment=increment))
+        os.utime(self.module_path, ns=(mtime_ns + 1_000_000_000, mtime_ns + 1_000_000_000))
+
+    def test_unchanged_module_is_not_reloaded(self):
+        """
+        GIVEN a registered tool whose source file has not changed
+        WHEN refresh is called repeatedly
+        THEN expect the module to never be reloaded
+        """
+        for _ in range(3):
+            func = self.registry.refresh(self.module.registry_test_tool)
+
+        self.assertEqual(func(1), 2)
+        self.assertEqual(self.module.LOADS, 1)
+        self.assertEqual(self.registry.stats()["registry_test_tool"]["reloads"], 0)
+
+    def test_changed_module_is_reloaded_once(self):
+        """
+        GIVEN a registered tool whose source file changed
+        WHEN refresh is called twice
+        THEN expect:
+            - The module to be reloaded exactly once
+            - The new version of the function to be returned
+            - Reload count and timing to be recorded
+        """
+        old_func = self.module.registry_test_tool
+        self._write(doc="Add two.", increment=2)
+
+        func = self.registry.refresh(old_func)
+        func = self.registry.refresh(old_func)
+
+        self.assertEqual(func(1), 3)
+        self.assertEqual(self.module.LOADS, 2)
+        stats = self.registry.stats()["registry_test_tool"]
+        self.assertEqual(stats["reloads"], 1)
+        self.assertGreater(stats["last_reload_seconds"], 0.0)
+
+    def test_changed_module_is_re_registered_with_fastmcp(self):
+        """
+        GIVEN a registered tool whose docstring changed on disk
+        WHEN check_all is called
+        THEN expect FastMCP to serve the new description
+        """
+        self._write(doc="Add three.", increment=3)
+
+        self.assertEqual(self.registry.check_all(), 1)
+
+        tool = self.mcp._tool_manager.get_tool("registry_test_tool")
+        self.assertEqual(tool.description, "Add three.")
+
+    def test_registered_tool_keeps_the_function_metadata(self):
+        """
+        GIVEN a registered synchronous tool
+        WHEN its FastMCP tool function is inspected
+        THEN expect:
+            - The same name and docstring as the tool function
+            - Unwrapping it to return the tool function
+        """
+        tool = self.mcp._tool_manager.get_tool("registry_test_tool")
+
+        self.assertEqual(tool.fn.__name__, "registry_test_tool")
+        self.assertEqual(tool.fn.__doc__, "Add one.")
+        self.assertIs(inspect.unwrap(tool.fn), self.module.registry_test_tool)
+
+    def test_reloaded_module_retires_its_worker_processes(self):
+        """
+        GIVEN a registered tool whose source changed
+        WHEN its module is reloaded
+        THEN expect its worker processes to be retired, so they don't keep running the old code
+        """
+        self._write(doc="Add four.", increment=4)
+
+        with patch.object(self.registry._tool_process_pool, "retire") as retire:
+            self.assertEqual(self.registry.check_all(), 1)
+
+        retire.assert_called_once_with("registry_test_tool")
+
+    def test_broken_module_is_not_retried_until_it_changes(self):
+        """
+        GIVEN a tool module that was edited into a syntax error
+        WHEN check_all is called twice
+        THEN expect one recorded error, and the old function to keep working
+        """
+        self.module_path.write_text("def registry_test_tool(:\n")
+        stat = os.stat(self.module_path)
+        os.utime(self.module_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+
+        self.assertEqual(self.registry.check_all(), 0)
+        self.assertEqual(self.registry.check_all(), 0)
+
+        self.assertEqual(self.registry.stats()["registry_test_tool"]["errors"], 1)
+        self.assertEqual(self.module.registry_test_tool(1), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
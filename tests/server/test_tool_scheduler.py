@@ -0,0 +1,138 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+from server_utils.server_.tool_scheduler import ToolScheduler
+
+
+class TestToolScheduler(unittest.TestCase):
+    """Test admitting tool calls under concurrency limits, fairly between clients."""
+
+    def setUp(self):
+        self.started = []
+
+    @staticmethod
+    def _scheduler(max_concurrent_tool_calls: int = 0, default_tool_concurrency: int = 0, **limits) -> ToolScheduler:
+        configs = SimpleNamespace(
+            max_concurrent_tool_calls=max_concurrent_tool_calls,
+            default_tool_concurrency=default_tool_concurrency,
+            tool_concurrency_limits=limits,
+        )
+        return ToolScheduler(configs=configs, resources={'logger': MagicMock()})
+
+    def _call(self, scheduler: ToolScheduler, tool: str, client: str, label: str, running: list[int] | None = None):
+        async def call():
+            async with scheduler.slot(tool, client):
+                self.started.append(label)
+                if running is not None:
+                    running.append(scheduler.stats()["in_flight"])
+                await asyncio.sleep(0.01)
+        return call()
+
+    def test_global_cap_limits_calls_in_flight(self):
+        """
+        GIVEN a scheduler that runs at most two calls at once
+        WHEN six calls are made at the same time
+        THEN expect every call to run, and never more than two in flight
+        """
+        scheduler = self._scheduler(max_concurrent_tool_calls=2)
+        in_flight = []
+
+        async def main():
+            await asyncio.gather(*(self._call(scheduler, "tool", "a", str(i), in_flight) for i in range(6)))
+
+        asyncio.run(main())
+
+        self.assertEqual(len(self.started), 6)
+        self.assertLessEqual(max(in_flight), 2)
+        stats = scheduler.stats()
+        self.assertEqual((stats["in_flight"], stats["admitted"], stats["queued_calls"]), (0, 6, 4))
+
+    def test_per_tool_limit_does_not_block_other_tools(self):
+        """
+        GIVEN a tool limited to one call at a time
+        WHEN one client calls it three times and then calls another tool
+        THEN expect the other tool's call to start before the limited tool's queued calls
+        """
+        scheduler = self._scheduler(slow=1)
+
+        async def main():
+            await asyncio.gather(
+                *(self._call(scheduler, "slow", "a", f"slow {i}") for i in range(3)),
+                self._call(scheduler, "fast", "a", "fast"),
+            )
+
+        asyncio.run(main())
+
+        self.assertEqual(self.started, ["slow 0", "fast", "slow 1", "slow 2"])
+
+    def test_clients_take_turns(self):
+        """
+        GIVEN a scheduler that runs one call at a time, busy with a call
+        WHEN one client queues four calls and then another client queues one
+        THEN expect the second client's call to run right after the first client's next call
+        """
+        scheduler = self._scheduler(max_concurrent_tool_calls=1)
+
+        async def main():
+            await asyncio.gather(
+                self._call(scheduler, "tool", "a", "a0"),
+                *(self._call(scheduler, "tool", "a", f"a{i}") for i in range(1, 5)),
+                self._call(scheduler, "tool", "b", "b0"),
+            )
+
+        asyncio.run(main())
+
+        self.assertEqual(self.started[:4], ["a0", "a1", "b0", "a2"])
+
+    def test_cancelled_waiter_gives_up_its_place(self):
+        """
+        GIVEN a scheduler that runs one call at a time, busy with a call, and a second call waiting
+        WHEN the waiting call is cancelled
+        THEN expect it never to run, and the scheduler to be idle afterwards
+        """
+        scheduler = self._scheduler(max_concurrent_tool_calls=1)
+
+        async def main():
+            first = asyncio.ensure_future(self._call(scheduler, "tool", "a", "first"))
+            second = asyncio.ensure_future(self._call(scheduler, "tool", "b", "second"))
+            await asyncio.sleep(0)
+            second.cancel()
+            await asyncio.gather(first, second, return_exceptions=True)
+
+        asyncio.run(main())
+
+        self.assertEqual(self.started, ["first"])
+        self.assertEqual((scheduler.stats()["in_flight"], scheduler.stats()["queued"]), (0, {}))
+
+    def test_schedule_mcp_queues_calls_per_session(self):
+        """
+        GIVEN a FastMCP tool manager scheduled with a cap of one call
+        WHEN two sessions call a tool at the same time
+        THEN expect the calls to run one after the other, and their results returned
+        """
+        scheduler = self._scheduler(max_concurrent_tool_calls=1)
+        in_flight = []
+
+        async def call_tool(name, arguments, context=None, convert_result=False):
+            in_flight.append(scheduler.stats()["in_flight"])
+            await asyncio.sleep(0.01)
+            return arguments["x"]
+
+        mcp = SimpleNamespace(_tool_manager=SimpleNamespace(call_tool=call_tool))
+        scheduler.schedule_mcp(mcp)
+
+        async def main():
+            return await asyncio.gather(*(
+                mcp._tool_manager.call_tool("tool", {"x": x}, context=SimpleNamespace(session=object()), convert_result=True)
+                for x in (1, 2)
+            ))
+
+        self.assertEqual(asyncio.run(main()), [1, 2])
+        self.assertEqual(in_flight, [1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
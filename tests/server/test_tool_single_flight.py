@@ -0,0 +1,169 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+from mcp.server.fastmcp import Context
+
+
+from server_utils.server_.tool_single_flight import ToolSingleFlight
+
+
+class TestToolSingleFlight(unittest.TestCase):
+    """Test that identical concurrent tool calls share one execution."""
+
+    def setUp(self):
+        self.calls = []
+        self.single_flight = self._single_flight(coalesce_tool_calls=True)
+
+    @staticmethod
+    def _single_flight(**configs) -> ToolSingleFlight:
+        return ToolSingleFlight(configs=SimpleNamespace(**configs), resources={'logger': MagicMock()})
+
+    async def _tool(self, x: int, options: dict | None = None) -> dict:
+        self.calls.append(x)
+        await asyncio.sleep(0.05)
+        return {"x": x}
+
+    def test_identical_concurrent_calls_share_one_execution(self):
+        """
+        GIVEN three concurrent calls to a tool with the same arguments, in a different keyword order
+        WHEN they run
+        THEN expect one execution, every caller to get its result, and two calls counted as coalesced
+        """
+        async def main():
+            return await asyncio.gather(*(
+                self.single_flight.run("tool", self._tool, **kwargs)
+                for kwargs in ({"x": 1, "options": {"a": 1, "b": 2}}, {"options": {"b": 2, "a": 1}, "x": 1}, {"x": 1, "options": {"a": 1, "b": 2}})
+            ))
+
+        results = asyncio.run(main())
+
+        self.assertEqual(results, [{"x": 1}] * 3)
+        self.assertEqual(self.calls, [1])
+        stats = self.single_flight.stats()
+        self.assertEqual((stats["executions"], stats["coalesced"], stats["in_flight"]), (1, 2, 0))
+        self.assertEqual(stats["tools"]["tool"], {"executions": 1, "coalesced": 2})
+
+    def test_different_arguments_or_tools_run_separately(self):
+        """
+        GIVEN concurrent calls with different arguments, and to a different tool name
+        WHEN they run
+        THEN expect each to execute
+        """
+        async def main():
+            await asyncio.gather(
+                self.single_flight.run("tool", self._tool, x=1),
+                self.single_flight.run("tool", self._tool, x=2),
+                self.single_flight.run("other_tool", self._tool, x=1),
+            )
+
+        asyncio.run(main())
+
+        self.assertEqual(sorted(self.calls), [1, 1, 2])
+
+    def test_sequential_calls_are_not_cached(self):
+        """
+        GIVEN two identical calls made one after the other
+        WHEN they run
+        THEN expect both to execute
+        """
+        async def main():
+            await self.single_flight.run("tool", self._tool, x=1)
+            await self.single_flight.run("tool", self._tool, x=1)
+
+        asyncio.run(main())
+
+        self.assertEqual(self.calls, [1, 1])
+
+    def test_exception_is_shared_by_every_caller(self):
+        """
+        GIVEN a tool that fails, called twice concurrently with the same arguments
+        WHEN they run
+        THEN expect one execution, and both callers to get the exception
+        """
+        async def failing(x: int) -> None:
+            self.calls.append(x)
+            await asyncio.sleep(0.05)
+            raise ValueError("failed")
+
+        async def main():
+            return await asyncio.gather(
+                self.single_flight.run("tool", failing, x=1),
+                self.single_flight.run("tool", failing, x=1),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(main())
+
+        self.assertEqual(self.calls, [1])
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    def test_cancelled_caller_does_not_cancel_shared_execution(self):
+        """
+        GIVEN two identical concurrent calls
+        WHEN the first caller is cancelled
+        THEN expect the second to still get the result
+        """
+        async def main():
+            first = asyncio.ensure_future(self.single_flight.run("tool", self._tool, x=1))
+            second = asyncio.ensure_future(self.single_flight.run("tool", self._tool, x=1))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(main()), {"x": 1})
+
+    def test_disabled_runs_every_call(self):
+        """
+        GIVEN coalescing is disabled in the configs
+        WHEN identical calls run concurrently
+        THEN expect each to execute
+        """
+        single_flight = self._single_flight(coalesce_tool_calls=False)
+
+        async def main():
+            await asyncio.gather(*(single_flight.run("tool", self._tool, x=1) for _ in range(3)))
+
+        asyncio.run(main())
+
+        self.assertEqual(self.calls, [1, 1, 1])
+
+    def test_calls_with_a_context_are_not_shared(self):
+        """
+        GIVEN concurrent calls with the same arguments, each from its own request with its own Context
+        WHEN they run
+        THEN expect each to execute with its own Context, so progress and logs reach its own session
+        """
+        contexts = [Context(), Context()]
+        seen = []
+
+        async def tool(x: int, ctx: Context) -> int:
+            seen.append(ctx)
+            await asyncio.sleep(0.05)
+            return x
+
+        async def main():
+            return await asyncio.gather(*(self.single_flight.run("tool", tool, x=1, ctx=ctx) for ctx in contexts))
+
+        self.assertEqual(asyncio.run(main()), [1, 1])
+        self.assertEqual(seen, contexts)
+        self.assertEqual(self.single_flight.stats()["coalesced"], 0)
+
+    def test_uncanonicalisable_arguments_are_not_shared(self):
+        """
+        GIVEN concurrent calls whose arguments have no stable serialized form
+        WHEN they run
+        THEN expect each to execute rather than risk sharing a result between different calls
+        """
+        async def main():
+            await asyncio.gather(*(self.single_flight.run("tool", self._tool, x=1, options=object()) for _ in range(2)))
+
+        asyncio.run(main())
+
+        self.assertEqual(self.calls, [1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+import asyncio
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+from mcp.server import FastMCP
+
+
+from server_utils.server_.tool_cache import ToolCache
+from server_utils.server_.tool_metrics import ToolMetrics
+from server_utils.server_.tool_process_pool import ToolProcessPool
+from server_utils.server_.tool_tracing import ToolTracer
+from server_utils.server_.tool_registry import ToolRegistry
+from server_utils.server_.tool_single_flight import ToolSingleFlight
+from server_utils.server_.tool_thread_pool import ToolThreadPool
+
+
+def slow_sync_tool(x: int) -> int:
+    """Wait until released, then double a number."""
+    if not RELEASE.wait(5):
+        raise TimeoutError("Never released")
+    return x * 2
+
+
+async def fast_async_tool() -> str:
+    """Release the slow tool."""
+    RELEASE.set()
+    return "released"
+
+
+RELEASE = threading.Event()
+
+
+class TestToolThreadPool(unittest.TestCase):
+    """Test that synchronous tools run on the tool thread pool, off FastMCP's event loop."""
+
+    def setUp(self):
+        RELEASE.clear()
+        resources = {'logger': MagicMock()}
+        self.pool = ToolThreadPool(configs=SimpleNamespace(tool_thread_pool_workers=2), resources=resources)
+        process_pool = ToolProcessPool(configs=SimpleNamespace(tool_process_pool_workers=1, tool_timeout=10), resources=resources)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        tool_cache = ToolCache(
+            configs=SimpleNamespace(ROOT_DIR=Path(self.temp_dir.name), tool_cache_max_entries=8, tool_cache_max_disk_entries=8),
+            resources=resources,
+        )
+        tool_single_flight = ToolSingleFlight(configs=SimpleNamespace(coalesce_tool_calls=True), resources=resources)
+        self.registry = ToolRegistry(configs=MagicMock(), resources={
+            **resources, 'tool_thread_pool': self.pool, 'tool_process_pool': process_pool,
+            'tool_cache': tool_cache, 'tool_single_flight': tool_single_flight,
+            'tool_metrics': ToolMetrics(configs=SimpleNamespace(), resources={'logger': MagicMock()}),
+            'tool_tracer': ToolTracer(configs=SimpleNamespace(), resources={'logger': MagicMock()}),
+        })
+        self.mcp = FastMCP("test")
+        for func in (slow_sync_tool, fast_async_tool):
+            self.registry.add_tool(self.mcp, func, name=func.__name__, description=func.__doc__)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_slow_sync_tool_does_not_block_other_requests(self):
+        """
+        GIVEN a sync tool that blocks until an async tool releases it
+        WHEN both are called concurrently through FastMCP
+        THEN expect both to finish, which is only possible if the sync tool runs off the event loop
+        """
+        async def call_both():
+            return await asyncio.gather(
+                self.mcp.call_tool("slow_sync_tool", {"x": 21}),
+                self.mcp.call_tool("fast_async_tool", {}),
+            )
+
+        slow_result, fast_result = asyncio.run(call_both())
+
+        self.assertIn("42", str(slow_result))
+        self.assertIn("released", str(fast_result))
+
+    def test_offloaded_tool_keeps_its_schema(self):
+        """
+        GIVEN a sync tool registered through the registry
+        WHEN its FastMCP tool is inspected
+        THEN expect the same parameter schema as registering the function directly
+        """
+        plain = FastMCP("plain")
+        plain.add_tool(slow_sync_tool, name="slow_sync_tool", description=slow_sync_tool.__doc__)
+
+        offloaded = self.mcp._tool_manager.get_tool("slow_sync_tool")
+        self.assertTrue(offloaded.is_async)
+        self.assertEqual(offloaded.parameters, plain._tool_manager.get_tool("slow_sync_tool").parameters)
+
+    def test_disabled_pool_leaves_tools_unchanged(self):
+        """
+        GIVEN a thread pool with no workers
+        WHEN a sync tool is offloaded
+        THEN expect the function itself back
+        """
+        pool = ToolThreadPool(configs=SimpleNamespace(tool_thread_pool_workers=0), resources={'logger': MagicMock()})
+        self.assertIs(pool.offload(slow_sync_tool), slow_sync_tool)
+
+
+class TestRunToolFromEventLoop(unittest.TestCase):
+    """Test running coroutine tools through run_tool and arun_tool from a running event loop."""
+
+    def test_run_tool_with_coroutine_inside_running_loop_does_not_deadlock(self):
+        """
+        GIVEN a coroutine tool
+        WHEN it is run with the synchronous run_tool from inside a running event loop
+        THEN expect its result instead of a deadlock
+        """
+        from server_utils._run_tool._run_tool import run_tool
+
+        async def double(x: int) -> int:
+            return x * 2
+
+        async def caller():
+            return run_tool(double, 4)
+
+        result = asyncio.run(asyncio.wait_for(caller(), timeout=5))
+        self.assertFalse(result.isError)
+        self.assertIn("8", str(result.content))
+
+    def test_run_tool_from_running_loop_reuses_one_background_loop(self):
+        """
+        GIVEN a coroutine tool
+        WHEN it is run twice with the synchronous run_tool from inside a running event loop
+        THEN expect both calls to run on the same background thread, rather than a new thread and loop each
+        """
+        from server_utils._run_tool._run_tool import run_tool
+
+        async def thread_id() -> int:
+            return threading.get_ident()
+
+        async def caller():
+            return [run_tool(thread_id) for _ in range(2)]
+
+        first, second = asyncio.run(asyncio.wait_for(caller(), timeout=5))
+        self.assertFalse(first.isError)
+        self.assertEqual(first.content, second.content)
+        self.assertNotIn(str(threading.get_ident()), str(first.content))
+
+    def test_arun_tool_awaits_coroutine_and_offloads_sync_tools(self):
+        """
+        GIVEN a coroutine tool and a sync tool
+        WHEN both are run with arun_tool
+        THEN expect both results
+        """
+        from server_utils._run_tool._run_tool import arun_tool
+
+        async def double(x: int) -> int:
+            return x * 2
+
+        def triple(x: int) -> int:
+            return x * 3
+
+        async def caller():
+            return await asyncio.gather(arun_tool(double, 4), arun_tool(triple, 4))
+
+        doubled, tripled = asyncio.run(caller())
+        self.assertIn("8", str(doubled.content))
+        self.assertIn("12", str(tripled.content))
+
+
+if __name__ == "__main__":
+    unittest.main()
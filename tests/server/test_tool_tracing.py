@@ -0,0 +1,123 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+from server_utils.server_.tool_tracing import JsonlSink, ToolTracer
+
+
+class _ListSink:
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record: dict) -> None:
+        self.records.append(record)
+
+
+class _FakeToolManager:
+    """Stands in for FastMCP's tool manager, validating arguments before calling the tool."""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    async def call_tool(self, name: str, arguments: dict, context=None, convert_result: bool = False):
+        await asyncio.sleep(0.01)
+        result = await self.fn(**arguments)
+        await asyncio.sleep(0.01)
+        return [result]
+
+
+class TestToolTracing(unittest.TestCase):
+    """Test tracing the steps of tool calls as nested spans."""
+
+    def setUp(self):
+        self.tracer = ToolTracer(configs=SimpleNamespace(trace_path=""), resources={'logger': MagicMock()})
+        self.sink = _ListSink()
+
+    def _by_name(self) -> dict[str, dict]:
+        return {record["name"]: record for record in self.sink.records}
+
+    def test_disabled_tracing_emits_nothing(self):
+        """
+        GIVEN a tracer without sinks
+        WHEN spans are opened and a wrapped tool is called
+        THEN expect no-op spans, and the tool's result returned unchanged
+        """
+        with self.tracer.span("execute", tool="tool") as span:
+            span.set(returncode=0)
+        wrapped = self.tracer.wrap("tool", lambda x: x * 2)
+
+        self.assertFalse(self.tracer.enabled)
+        self.assertEqual(wrapped(2), 4)
+        self.assertEqual(self.sink.records, [])
+
+    def test_nested_spans_share_a_trace(self):
+        """
+        GIVEN a tracer with a sink
+        WHEN spans are nested, and the inner one raises
+        THEN expect both to be emitted in one trace, the inner one parented to the outer one and recording the error
+        """
+        self.tracer.add_sink(self.sink)
+
+        with self.assertRaises(ValueError):
+            with self.tracer.span("run_tool"):
+                with self.tracer.span("execute", tool="tool"):
+                    raise ValueError("no")
+
+        spans = self._by_name()
+        self.assertEqual(spans["execute"]["trace_id"], spans["run_tool"]["trace_id"])
+        self.assertEqual(spans["execute"]["parent_id"], spans["run_tool"]["span_id"])
+        self.assertIsNone(spans["run_tool"]["parent_id"])
+        self.assertEqual(spans["execute"]["attributes"], {"tool": "tool", "error": "ValueError"})
+
+    def test_mcp_tool_call_is_split_into_validate_execute_serialize(self):
+        """
+        GIVEN a FastMCP tool manager traced by the tracer, and a wrapped tool
+        WHEN the tool is called through the manager
+        THEN expect validate, execute and serialize spans under one tool_call span
+        """
+        self.tracer.add_sink(self.sink)
+
+        async def tool(x: int) -> int:
+            await asyncio.sleep(0.01)
+            return x
+
+        mcp = SimpleNamespace(_tool_manager=_FakeToolManager(self.tracer.wrap("tool", tool)))
+        self.tracer.trace_mcp(mcp)
+
+        self.assertEqual(asyncio.run(mcp._tool_manager.call_tool("tool", {"x": 1})), [1])
+
+        spans = self._by_name()
+        self.assertEqual(set(spans), {"tool_call", "validate", "execute", "serialize"})
+        for name in ("validate", "execute", "serialize"):
+            self.assertEqual(spans[name]["parent_id"], spans["tool_call"]["span_id"])
+            self.assertGreaterEqual(spans[name]["duration_ms"], 5)
+
+    def test_jsonl_sink_writes_one_line_per_span(self):
+        """
+        GIVEN a tracer writing to a JSON lines file
+        WHEN two spans finish and the sink is closed
+        THEN expect two JSON lines in the file
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "traces" / "spans.jsonl"
+            sink = JsonlSink(path)
+            self.tracer.add_sink(sink)
+            with self.tracer.span("reload"):
+                pass
+            with self.tracer.span("execute", tool="tool"):
+                pass
+            self.tracer.remove_sink(sink)
+
+            records = [json.loads(line) for line in path.read_text().splitlines()]
+
+        self.assertEqual([record["name"] for record in records], ["reload", "execute"])
+        self.assertFalse(self.tracer.enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
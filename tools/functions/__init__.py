@@ -1,8 +1,18 @@
 import importlib
 from pathlib import Path
+from types import ModuleType
+from configs import configs
 from logger import mcp_logger
 
 
+def _get_module_names() -> list[str]:
+    """Get the names of all Python files in the functions directory, sorted alphabetically."""
+    return sorted(
+        file.stem for file in Path(__file__).parent.iterdir()
+        if file.is_file() and file.suffix == ".py" and file.name != "__init__.py"
+    )
+
+
 def register_files_in_functions_dir() -> list[str]:
     """
     Register all Python files in the functions directory as modules.
@@ -10,22 +20,31 @@ def register_files_in_functions_dir() -> list[str]:
     """
     # Iterate over all files in the current directory
     modules = []
-    for file in Path(__file__).parent.iterdir():
-        if file.is_file() and file.suffix == ".py" and file.name != "__init__.py":
-            module_name = file.stem
-            module_path = f"tools.functions.{module_name}"
-            # Register the module in the global namespace
-            try:
-                globals()[module_name] = importlib.import_module(module_path)
-            except Exception as e:
-                mcp_logger.exception(f"Failed to import module {module_name}: {e}")
-                continue
-            else:
-                modules.append(module_name)
-    # Sort the modules alphabetically
-    return sorted(modules)
-
-modules_names = register_files_in_functions_dir()
+    for module_name in _get_module_names():
+        module_path = f"tools.functions.{module_name}"
+        # Register the module in the global namespace
+        try:
+            globals()[module_name] = importlib.import_module(module_path)
+        except Exception as e:
+            mcp_logger.exception(f"Failed to import module {module_name}: {e}")
+            continue
+        else:
+            modules.append(module_name)
+    return modules
+
+
+def __getattr__(name: str) -> ModuleType:
+    """Import a function module the first time it is accessed as an attribute of this package."""
+    if name in modules_names:
+        return importlib.import_module(f"tools.functions.{name}")
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+# With lazy tool registration, modules are only imported when first accessed.
+if configs.lazy_tool_registration:
+    modules_names = _get_module_names()
+else:
+    modules_names = register_files_in_functions_dir()
 
 __all__ = [
     module for module in iter(modules_names)
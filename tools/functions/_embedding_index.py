@@ -0,0 +1,342 @@
+"""
+Persistent on-disk embedding index for the docstrings of function tools.
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+from types import ModuleType
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where only the threads of one process are kept from racing.
+    fcntl = None
+
+
+from tools.functions._search_backends import _make_search_backend
+
+
+_EMBEDDING_DTYPES = ("float32", "float16", "int8")
+
+
+def _hash_docstring(docstring: str) -> str:
+    return hashlib.sha256(docstring.encode("utf-8")).hexdigest()
+
+
+def _quantize(np: ModuleType, vectors: Any, dtype: str) -> tuple[Any, Any]:
+    """L2-normalise embeddings and store them in the given dtype.
+
+    Args:
+        np (ModuleType): The NumPy module.
+        vectors (np.ndarray): A 2D array of embeddings, one per row.
+        dtype (str): 'float32', 'float16' or 'int8'.
+
+    Returns:
+        tuple: The normalised matrix in the given dtype, and the per-row scales needed
+            to dequantise it. Scales are None for float dtypes.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    if dtype != "int8":
+        return vectors.astype(dtype), None
+
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+    quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+class _EmbeddingIndex:
+    """Docstring embeddings stored as a NumPy .npy matrix plus a JSON metadata sidecar.
+
+    Rows are keyed by file path, file mtime and a hash of the docstring.
+    When the index is refreshed, only files whose mtime changed are re-parsed,
+    and only docstrings whose hash is not already in the index are re-embedded.
+    Rows are L2-normalised before they are stored, optionally quantised to float16,
+    or to int8 with a per-row scale. The matrix is memory-mapped when loaded from disk,
+    so cosine similarity is a single matrix-vector product against it, or against
+    a subset of it when an approximate search backend is selected.
+
+    Several processes, e.g. forked server workers, can share one index directory. Refreshes
+    hold an exclusive file lock on it and pick up an index another process published first.
+    Each save writes the matrix and scales under new names, then publishes them by replacing
+    the metadata that names them, so a reader never pairs the rows of one save with the
+    matrix of another, even if the writer crashed part way.
+
+    Attributes:
+        index_dir (str): Directory holding the matrix and the metadata sidecar.
+        model_name (str): Name of the embedding model. A different name invalidates the index.
+        dtype (str): Storage dtype of the matrix. A different dtype invalidates the index.
+        rows (list[dict]): Metadata for each row of the matrix, in order.
+    """
+    # Each save writes a new generation of the arrays, which the metadata names.
+    _MATRIX_FILE = "embeddings.{}.npy"
+    _SCALES_FILE = "scales.{}.npy"
+    _METADATA_FILE = "metadata.json"
+    _LOCK_FILE = "index.lock"
+    _VERSION = 3
+
+    def __init__(self,
+                 index_dir: str,
+                 model_name: str,
+                 np: ModuleType,
+                 backend: str = "exact",
+                 dtype: str = "float32",
+                 **backend_options: Any
+                ) -> None:
+        if dtype not in _EMBEDDING_DTYPES:
+            raise ValueError(f"Unknown embedding dtype '{dtype}'. Expected one of {list(_EMBEDDING_DTYPES)}.")
+
+        self.index_dir = index_dir
+        self.model_name = model_name
+        self.dtype = dtype
+        self._np = np
+        self._lock = threading.Lock()
+        self._backend = backend
+        self._backend_options = backend_options
+        self._search = _make_search_backend(np, backend, **backend_options)
+
+        self.rows: list[dict[str, Any]] = []
+        self._files: dict[str, int] = {}
+        self._matrix = None
+        self._scales = None
+        # Identifies the metadata file this instance last loaded or saved.
+        self._published: tuple[int, int, int] | None = None
+
+        with self._locked(exclusive=False):
+            self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        """Hold a lock on the index directory shared with other processes."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self._path(self._LOCK_FILE), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _metadata_version(self) -> tuple[int, int, int] | None:
+        try:
+            stat = os.stat(self._path(self._METADATA_FILE))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> None:
+        """Load the index from disk, if a compatible one exists. Call with the directory locked."""
+        self._published = self._metadata_version()
+        try:
+            with open(self._path(self._METADATA_FILE), "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        if (metadata.get("version") != self._VERSION
+            or metadata.get("model_name") != self.model_name
+            or metadata.get("dtype") != self.dtype):
+            return
+
+        generation = metadata.get("generation")
+        try:
+            matrix = self._np.load(self._path(self._MATRIX_FILE.format(generation)), mmap_mode="r")
+            scales = self._np.load(self._path(self._SCALES_FILE.format(generation)), mmap_mode="r") if self.dtype == "int8" else None
+        except (FileNotFoundError, ValueError):
+            return
+
+        if len(matrix) != len(metadata["rows"]):
+            return
+
+        self.rows = metadata["rows"]
+        self._files = metadata["files"]
+        self._matrix = matrix
+        self._scales = scales
+        self._search.build(matrix, scales)
+
+    def _save(self, matrix: Any, scales: Any) -> None:
+        """Write the index to disk, then memory-map the new matrix. Call with the directory locked.
+
+        The arrays are written under names of their own, and the metadata is written under a name
+        unique to this process and then moved into place, so a crash never leaves the metadata
+        naming arrays that are missing or partly written.
+        """
+        # Release the old memory maps, including the search backend's, before their files are removed.
+        self._matrix = self._scales = None
+        self._search = _make_search_backend(self._np, self._backend, **self._backend_options)
+
+        generation = f"{os.getpid()}-{time.time_ns()}"
+        metadata = {
+            "version": self._VERSION,
+            "model_name": self.model_name,
+            "dtype": self.dtype,
+            "generation": generation,
+            "files": self._files,
+            "rows": self.rows,
+        }
+        arrays = [(self._MATRIX_FILE.format(generation), matrix)]
+        if scales is not None:
+            arrays.append((self._SCALES_FILE.format(generation), scales))
+        tmp_path = self._path(f"{self._METADATA_FILE}.{os.getpid()}.tmp")
+
+        try:
+            for name, array in arrays:
+                with open(self._path(name), "wb") as f:
+                    self._np.save(f, array)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(metadata, f)
+            os.replace(tmp_path, self._path(self._METADATA_FILE))
+        except BaseException:
+            for path in [self._path(name) for name, _ in arrays] + [tmp_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+            # Nothing was published, so the next refresh starts again from what is on disk.
+            self.rows, self._files, self._published = [], {}, None
+            raise
+        self._published = self._metadata_version()
+        self._remove_old_generations(generation)
+
+        self._matrix = self._np.load(self._path(self._MATRIX_FILE.format(generation)), mmap_mode="r")
+        if scales is not None:
+            self._scales = self._np.load(self._path(self._SCALES_FILE.format(generation)), mmap_mode="r")
+        self._search.build(self._matrix, self._scales)
+
+    def _remove_old_generations(self, generation: str) -> None:
+        """Remove arrays the metadata no longer names. Processes that mapped them keep their copy until they reload."""
+        current = {self._MATRIX_FILE.format(generation), self._SCALES_FILE.format(generation)}
+        for name in os.listdir(self.index_dir):
+            if name.endswith(".npy") and name not in current:
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    # Still mapped, on platforms that don't allow removing mapped files.
+                    pass
+
+    def refresh(self,
+                python_files: list[str],
+                extract_functions: Callable[[str], list[tuple[str, str]]],
+                embed: Callable[[list[str]], Any],
+                ) -> int:
+        """Bring the index up to date with the given files.
+
+        Args:
+            python_files (list[str]): Paths of the Python files to index.
+            extract_functions (Callable): Returns (func_name, docstring) pairs for a file path.
+            embed (Callable): Returns a 2D array of embeddings for a list of docstrings.
+
+        Returns:
+            int: The number of docstrings that had to be embedded.
+
+        Raises:
+            PermissionError: If a file cannot be read.
+        """
+        with self._lock, self._locked(exclusive=True):
+            # Another process, e.g. another server worker, may have published a newer index.
+            if self._metadata_version() != self._published:
+                self._load()
+
+            rows_by_file: dict[str, list[dict]] = {}
+            for idx, row in enumerate(self.rows):
+                rows_by_file.setdefault(row["file_path"], []).append({**row, "_src": idx})
+
+            files: dict[str, int] = {}
+            new_rows: list[dict] = []
+            changed = False
+
+            for file_path in python_files:
+                try:
+                    mtime = os.stat(file_path).st_mtime_ns
+                except FileNotFoundError:
+                    # Deleted since the files were listed. It is dropped from the index like any removed file.
+                    continue
+                files[file_path] = mtime
+
+                if self._files.get(file_path) == mtime:
+                    new_rows.extend(rows_by_file.get(file_path, []))
+                    continue
+
+                changed = True
+                try:
+                    functions = extract_functions(file_path)
+                except PermissionError:
+                    raise
+                except Exception:
+                    # Skip files that cause other errors
+                    functions = []
+
+                for func_name, docstring in functions:
+                    new_rows.append({
+                        "file_path": file_path,
+                        "func_name": func_name,
+                        "docstring": docstring,
+                        "hash": _hash_docstring(docstring),
+                    })
+
+            if not changed and files.keys() == self._files.keys():
+                return 0
+
+            # Reuse existing vectors for any docstring we have already embedded.
+            known = {row["hash"]: idx for idx, row in enumerate(self.rows)}
+            to_embed = list({
+                row["hash"]: row["docstring"] for row in new_rows
+                if "_src" not in row and row["hash"] not in known
+            }.items())
+
+            # New rows are normalised and quantised once, here, rather than on every query.
+            embedded, embedded_scales = None, None
+            if to_embed:
+                embedded, embedded_scales = _quantize(
+                    self._np, embed([docstring for _, docstring in to_embed]), self.dtype
+                )
+            embedded_rows = {hash_: i for i, (hash_, _) in enumerate(to_embed)}
+
+            if self._matrix is not None and len(self._matrix):
+                dim = self._matrix.shape[1]
+            elif embedded is not None:
+                dim = embedded.shape[1]
+            else:
+                dim = 0
+
+            matrix = self._np.empty((len(new_rows), dim), dtype=self.dtype)
+            scales = self._np.empty(len(new_rows), dtype=self._np.float32) if self.dtype == "int8" else None
+            for i, row in enumerate(new_rows):
+                src = row.pop("_src", known.get(row["hash"]))
+                source, source_scales, j = (
+                    (self._matrix, self._scales, src) if src is not None
+                    else (embedded, embedded_scales, embedded_rows[row["hash"]])
+                )
+                matrix[i] = source[j]
+                if scales is not None:
+                    scales[i] = source_scales[j]
+
+            self.rows = new_rows
+            self._files = files
+            self._save(matrix, scales)
+            return len(to_embed)
+
+    def search(self, query_vector: Any, top_k: int, similarity_threshold: float = -1.0) -> list[tuple[dict[str, Any], float]]:
+        """Find the rows most similar to a query vector with the configured search backend.
+
+        Args:
+            query_vector (np.ndarray): A 1D NumPy array representing the query.
+            top_k (int): Maximum number of results to return.
+            similarity_threshold (float): Minimum cosine similarity to include a result.
+
+        Returns:
+            list[tuple[dict, float]]: Row metadata and similarity pairs, highest similarity first.
+        """
+        query_vector = self._np.asarray(query_vector, dtype=self._np.float32).reshape(-1)
+        query_vector = query_vector / self._np.linalg.norm(query_vector)
+
+        with self._lock:
+            rows = self.rows
+            indices, scores = self._search.search(query_vector, top_k)
+
+        return [
+            (rows[idx], float(score)) for idx, score in zip(indices, scores)
+            if score >= similarity_threshold
+        ]
@@ -0,0 +1,170 @@
+"""
+Nearest-neighbour search backends for the docstring embedding index.
+
+Backends are pure NumPy. Each one is built from the index's L2-normalised embedding matrix
+and its per-row dequantisation scales (None unless the matrix is int8),
+and answers top-k cosine similarity queries for an L2-normalised query vector.
+"""
+from typing import Any
+from types import ModuleType
+
+
+def _top_k(np: ModuleType, scores: Any, k: int) -> Any:
+    """Indices of the k highest scores, highest first, without sorting the whole array.
+
+    Args:
+        np (ModuleType): The NumPy module.
+        scores (np.ndarray): A 1D array of scores.
+        k (int): The number of indices to return.
+
+    Returns:
+        np.ndarray: Up to k indices into scores, ordered by descending score.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class _ExactSearch:
+    """Brute-force search: one matrix-vector product against every row."""
+
+    def __init__(self, np: ModuleType, **options: Any) -> None:
+        self._np = np
+        self._matrix = None
+        self._scales = None
+
+    def build(self, matrix: Any, scales: Any = None) -> None:
+        self._matrix = matrix
+        self._scales = scales
+
+    def search(self, query_vector: Any, k: int) -> tuple[Any, Any]:
+        """Return the indices and cosine similarities of the k nearest rows, best first."""
+        if self._matrix is None or not len(self._matrix):
+            return self._np.zeros(0, dtype=self._np.intp), self._np.zeros(0, dtype=self._np.float32)
+        scores = self._matrix @ query_vector
+        if self._scales is not None:
+            scores *= self._scales
+        top = _top_k(self._np, scores, k)
+        return top, scores[top]
+
+
+class _IvfSearch:
+    """Inverted-file search over spherical k-means clusters.
+
+    Rows are partitioned into `lists` clusters at build time. A query is scored against the
+    cluster centroids first, and then only against the rows of the `probes` closest clusters.
+    Indexes smaller than `min_rows` are searched exactly, since clustering them would not pay off.
+
+    Args:
+        np (ModuleType): The NumPy module.
+        lists (int): Number of clusters. 0 picks roughly sqrt(rows).
+        probes (int): Number of clusters to scan per query.
+        min_rows (int): Below this many rows, fall back to exact search.
+        iterations (int): Number of k-means iterations at build time.
+        train_rows_per_list (int): Centroids are trained on at most this many rows per cluster.
+        seed (int): Seed for choosing the initial centroids and training sample.
+    """
+
+    def __init__(self,
+                 np: ModuleType,
+                 lists: int = 0,
+                 probes: int = 8,
+                 min_rows: int = 1000,
+                 iterations: int = 10,
+                 train_rows_per_list: int = 64,
+                 seed: int = 0,
+                 **options: Any
+                ) -> None:
+        self._np = np
+        self._lists = lists
+        self._probes = probes
+        self._min_rows = min_rows
+        self._iterations = iterations
+        self._train_rows_per_list = train_rows_per_list
+        self._seed = seed
+
+        self._exact = _ExactSearch(np)
+        self._matrix = None
+        self._scales = None
+        self._centroids = None
+        self._order = None
+        self._offsets = None
+
+    def _kmeans(self, data: Any, n_clusters: int) -> tuple[Any, Any]:
+        np = self._np
+        rng = np.random.default_rng(self._seed)
+        n_train = min(len(data), n_clusters * self._train_rows_per_list)
+        train = data[rng.choice(len(data), n_train, replace=False)] if n_train < len(data) else data
+        centroids = train[rng.choice(len(train), n_clusters, replace=False)].copy()
+
+        for _ in range(self._iterations):
+            assignments = np.argmax(train @ centroids.T, axis=1)
+            order = np.argsort(assignments, kind="stable")
+            counts = np.bincount(assignments, minlength=n_clusters)
+            # Keep the old centroid for empty clusters.
+            nonempty = counts > 0
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+            sums = np.add.reduceat(train[order], starts, axis=0)
+            centroids[nonempty] = sums / counts[nonempty, None]
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        assignments = np.argmax(data @ centroids.T, axis=1)
+        return centroids, assignments
+
+    def build(self, matrix: Any, scales: Any = None) -> None:
+        np = self._np
+        self._exact.build(matrix, scales)
+        self._matrix = matrix
+        self._scales = scales
+        self._centroids = None
+
+        n_rows = len(matrix)
+        if n_rows < self._min_rows:
+            return
+
+        n_clusters = self._lists or int(np.sqrt(n_rows))
+        n_clusters = max(1, min(n_clusters, n_rows))
+        data = np.asarray(matrix, dtype=np.float32)
+        if scales is not None:
+            data = data * np.asarray(scales, dtype=np.float32)[:, None]
+        centroids, assignments = self._kmeans(data, n_clusters)
+
+        self._order = np.argsort(assignments, kind="stable")
+        self._offsets = np.searchsorted(assignments[self._order], np.arange(n_clusters + 1))
+        self._centroids = centroids
+
+    def search(self, query_vector: Any, k: int) -> tuple[Any, Any]:
+        """Return the indices and cosine similarities of the k nearest rows, best first."""
+        if self._centroids is None:
+            return self._exact.search(query_vector, k)
+
+        np = self._np
+        probes = _top_k(np, self._centroids @ query_vector, self._probes)
+        candidates = np.concatenate([
+            self._order[self._offsets[p]:self._offsets[p + 1]] for p in probes
+        ])
+        scores = self._matrix[candidates] @ query_vector
+        if self._scales is not None:
+            scores *= self._scales[candidates]
+        top = _top_k(np, scores, k)
+        return candidates[top], scores[top]
+
+
+_SEARCH_BACKENDS = {
+    "exact": _ExactSearch,
+    "ivf": _IvfSearch,
+}
+
+
+def _make_search_backend(np: ModuleType, backend: str = "exact", **options: Any) -> _ExactSearch | _IvfSearch:
+    """Instantiate a search backend by name.
+
+    Raises:
+        ValueError: If the backend name is not recognised.
+    """
+    try:
+        return _SEARCH_BACKENDS[backend](np, **options)
+    except KeyError:
+        raise ValueError(f"Unknown tool search backend '{backend}'. Expected one of {list(_SEARCH_BACKENDS)}.")
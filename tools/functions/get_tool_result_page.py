@@ -0,0 +1,43 @@
+from typing import Any
+
+
+from server_utils._run_tool._result_store import result_store
+
+
+def get_tool_result_page(result_id: str, offset: int = 0, limit: int = 10_000) -> dict[str, Any]:
+    """
+    Read part of the full output of an earlier tool call whose response was truncated.
+
+    When a tool's output is too long, its response is cut short and ends with a note giving a result ID.
+    Use this tool with that ID to page through the rest of the output, instead of running the tool again.
+    Results expire after a while; if one has, run the tool again.
+
+    Args:
+        result_id (str): The result ID from the truncated response.
+        offset (int, optional): The character of the full output to start from. Defaults to 0.
+        limit (int, optional): The most characters to return. Defaults to 10,000.
+
+    Returns:
+        dict[str, Any]: A dictionary with:
+            - 'text': The page of output.
+            - 'offset': The character the page starts at.
+            - 'total_chars': The length of the full output.
+            - 'next_offset': The offset of the next page, or None if this is the last page.
+
+    Raises:
+        ValueError: If there is no result with this ID, or offset or limit is negative.
+
+    Example:
+        >>> get_tool_result_page("3f2a9c1e8b7d4a60", offset=19000, limit=5000)
+        {'text': '...', 'offset': 19000, 'total_chars': 250000, 'next_offset': 24000}
+    """
+    try:
+        page = result_store.get_page(result_id, offset=offset, limit=limit)
+    except KeyError:
+        raise ValueError(f"No stored tool result with ID '{result_id}'. It may have expired; run the tool again.")
+    return {
+        "text": page.text,
+        "offset": page.offset,
+        "total_chars": page.total_chars,
+        "next_offset": page.next_offset,
+    }
@@ -1,17 +1,25 @@
 from typing import Any, Callable, TypeVar, TypeAlias
 from types import ModuleType
+from concurrent.futures import Future
 import os
 import ast
 import csv
 from datetime import datetime
+import hashlib
+import threading
+from configs import configs
 from tools.functions._dependencies import dependencies
+from tools.functions._embedding_index import _EmbeddingIndex
 
 _THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+_INDEX_ROOT_DIR = os.path.join(os.path.dirname(_THIS_DIR), '..', '.cache', 'embedding_index')
 
 Array: TypeAlias = list[list[float]] | list[float]
 
 class _Cache:
     """A simple cache to store big libraries and the model."""
+    _ready: Future | None = None
+    _ready_lock = threading.Lock()
 
     def __new__(cls):
         # Enforce singleton pattern to prevent multiple loads of the same model.
@@ -28,11 +36,62 @@ class _Cache:
         self._np: ModuleType = dependencies.numpy
         self._model: Callable = None
         self._model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+        self._indexes: dict[str, _EmbeddingIndex] = {}
+        self._indexes_lock = threading.Lock()
 
         # Load the model on initialization
         self.get_model()
         self._initialized: bool = True
 
+    @classmethod
+    def warm_up(cls) -> Future:
+        """Start loading the model and pre-embedding the tool corpus on a background thread.
+
+        Repeated calls share the same future, so the model is only ever loaded once.
+        If the warm-up fails, the next call starts a new one.
+
+        Returns:
+            Future: Resolves to the ready _Cache instance.
+        """
+        with cls._ready_lock:
+            if cls._ready is None:
+                cls._ready = Future()
+                threading.Thread(
+                    target=cls._warm_up, args=(cls._ready,), name="list_tools_warm_up", daemon=True
+                ).start()
+            return cls._ready
+
+    @classmethod
+    def reset_after_fork(cls) -> None:
+        """Drop a warm-up left unfinished by the parent of a forked process.
+
+        The warm-up thread doesn't survive the fork, so its future would never resolve.
+        A finished warm-up is kept, along with the model and indexes it loaded.
+        """
+        cls._ready_lock = threading.Lock()
+        if hasattr(cls, 'instance') and cls.instance._initialized:
+            cls.instance._indexes_lock = threading.Lock()
+        if cls._ready is not None and not cls._ready.done():
+            cls._ready = None
+            if hasattr(cls, 'instance') and not cls.instance._initialized:
+                # Forked in the middle of loading the model.
+                del cls.instance
+
+    @classmethod
+    def _warm_up(cls, ready: Future) -> None:
+        try:
+            cache = cls()
+            search_dir = _get_search_dir()
+            cache.get_index(search_dir, False).refresh(
+                _get_python_files(search_dir, False), _extract_functions_from_file, cache.get_embedding
+            )
+        except BaseException as e:
+            with cls._ready_lock:
+                cls._ready = None
+            ready.set_exception(e)
+        else:
+            ready.set_result(cache)
+
     def get_model(self):
         if self._model is None:
             self._model = self._st.SentenceTransformer(self._model_name)
@@ -40,6 +99,26 @@ class _Cache:
     def get_embedding(self, text):
         return self._model.encode(text, show_progress_bar = False)
 
+    def get_index(self, search_dir: str, recursive: bool) -> _EmbeddingIndex:
+        """Get the persistent embedding index for a search directory.
+
+        Each combination of search directory and recursion gets its own index on disk,
+        so that the rows of one never have to be filtered out of the other.
+        """
+        key = f"{os.path.abspath(search_dir)}|{recursive}"
+        # Searches and the warm-up thread may ask for the same index at once; only one may create it.
+        with self._indexes_lock:
+            if key not in self._indexes:
+                index_dir = os.path.join(_INDEX_ROOT_DIR, hashlib.sha256(key.encode("utf-8")).hexdigest()[:16])
+                self._indexes[key] = _EmbeddingIndex(
+                    index_dir, self._model_name, self._np,
+                    backend=configs.tool_search_backend,
+                    dtype=configs.tool_search_embedding_dtype,
+                    lists=configs.tool_search_ivf_lists,
+                    probes=configs.tool_search_ivf_probes,
+                )
+            return self._indexes[key]
+
     def vstack(self, embeddings):
         """Stack a list of embeddings into a 2D NumPy array.
         
@@ -93,6 +172,62 @@ class _Cache:
 
 
 
+def _extract_functions_from_file(file_path: str) -> list[tuple[str, str]]:
+    """Extract public functions and their docstrings from a Python file."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except PermissionError:
+        raise PermissionError(f"Cannot read file: {file_path}")
+
+    try:
+        tree = ast.parse(content)
+    except SyntaxError:
+        # Skip files with syntax errors
+        return []
+
+    functions = []
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            # Skip private methods
+            if node.name.startswith('_'):
+                continue
+
+            # Get docstring
+            docstring = ast.get_docstring(node)
+            if docstring:
+                functions.append((node.name, docstring))
+
+    return functions
+
+
+def _get_search_dir() -> str:
+    """Get the directory to search for tools."""
+    # For testing, use current working directory; for production, use tools/functions directory
+    if os.getcwd().endswith('tmp') or 'tmp' in os.getcwd():
+        # We're in a test environment (temporary directory)
+        return os.getcwd()
+    else:
+        # Production environment - search in tools/functions directory only
+        return _THIS_DIR  # This is the functions directory
+
+
+def _get_python_files(search_dir: str, recursive: bool) -> list[str]:
+    """Collect all Python files in the search directory."""
+    python_files = []
+    if recursive:
+        for root, dirs, files in os.walk(search_dir):
+            for file in files:
+                if file.endswith('.py'):
+                    python_files.append(os.path.join(root, file))
+    else:
+        for file in os.listdir(search_dir):
+            if file.endswith('.py') and os.path.isfile(os.path.join(search_dir, file)):
+                python_files.append(os.path.join(search_dir, file))
+    return python_files
+
+
 def _save_results_to_csv(query, top_k, similarity_threshold, recursive, results, search_dir):
     """Save function call results to CSV for statistical analysis."""
     # Create logs directory if it doesn't exist
@@ -203,7 +338,8 @@ def list_tools_in_functions_dir(
     if not 0.0 <= similarity_threshold <= 1.0:
         raise ValueError("similarity_threshold must be between 0.0 and 1.0")
 
-    _cache = _Cache()
+    # Wait on the background warm-up (starting one if the server didn't) instead of loading the model again.
+    _cache = _Cache.warm_up().result()
 
     if _cache is None:
         raise ValueError("Cache is not initialized. Please ensure dependencies are loaded correctly.")
@@ -211,117 +347,24 @@ def list_tools_in_functions_dir(
     # Get query embedding
     query_embedding = _cache.get_embedding(query)
 
-    # Function to extract functions and their docstrings from a Python file
-    def extract_functions_from_file(file_path: str) -> list[tuple[str, str]]:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except PermissionError:
-            raise PermissionError(f"Cannot read file: {file_path}")
-        
-        try:
-            tree = ast.parse(content)
-        except SyntaxError:
-            # Skip files with syntax errors
-            return []
-        
-        functions = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                # Skip private methods
-                if node.name.startswith('_'):
-                    continue
-                
-                # Get docstring
-                docstring = ast.get_docstring(node)
-                if docstring:
-                    functions.append((node.name, docstring))
-        
-        return functions
-    
-    # Collect all Python files
-    python_files = []
-    # For testing, use current working directory; for production, use tools/functions directory
-    if os.getcwd().endswith('tmp') or 'tmp' in os.getcwd():
-        # We're in a test environment (temporary directory)
-        search_dir = os.getcwd()
-    else:
-        # Production environment - search in tools/functions directory only
-        search_dir = _THIS_DIR  # This is the functions directory
-    
-    if recursive:
-        for root, dirs, files in os.walk(search_dir):
-            for file in files:
-                if file.endswith('.py'):
-                    python_files.append(os.path.join(root, file))
-    else:
-        for file in os.listdir(search_dir):
-            if file.endswith('.py') and os.path.isfile(os.path.join(search_dir, file)):
-                python_files.append(os.path.join(search_dir, file))
-    
-    # Extract functions and collect all docstrings for batch processing
-    all_functions = []
-    all_docstrings = []
-    
-    for file_path in python_files:
-        try:
-            functions = extract_functions_from_file(file_path)
-            
-            for func_name, docstring in functions:
-                all_functions.append({
-                    'file_path': file_path,
-                    'func_name': func_name,
-                    'docstring': docstring
-                })
-                all_docstrings.append(docstring)
-        except PermissionError:
-            # Re-raise permission errors as required by tests
-            raise
-        except Exception:
-            # Skip files that cause other errors
-            continue
-    
-    # Batch process all docstrings at once for efficiency
-    results = []
-    if all_docstrings:
-        # Get embeddings for all docstrings in one batch
-        doc_embeddings: Array = _cache.get_embedding(all_docstrings)
-
-        doc_matrix: Array = _cache.vstack(doc_embeddings) if isinstance(doc_embeddings, list) else doc_embeddings
-
-        similarities = _cache.batch_cosine_similarity(query_embedding, doc_matrix)
-
-        # Compare similarities against the threshold
-        for i, similarity in enumerate(similarities):
-            if similarity >= similarity_threshold:
-                results.append({
-                    'file_path': all_functions[i]['file_path'],
-                    'func_name': all_functions[i]['func_name'],
-                    'docstring': all_functions[i]['docstring'],
-                    'similarity': float(similarity)  # Convert to native Python float
-                })
-
-        # # Compute similarities
-        # for i, func_data in enumerate(all_functions):
-        #     doc_embedding = doc_embeddings[i]
-
-        #     similarity = _cache.cosine_similarity(query_embedding, doc_embedding)
-            
-        #     if similarity >= similarity_threshold:
-        #         results.append({
-        #             'file_path': func_data['file_path'],
-        #             'func_name': func_data['func_name'],
-        #             'docstring': func_data['docstring'],
-        #             'similarity': similarity
-        #         })
-    
-    # Sort by similarity (highest first)
-    results.sort(key=lambda x: x['similarity'], reverse=True)
-    
-    # Apply top_k limit
-    results = results[:top_k]
-    
+    search_dir = _get_search_dir()
+    python_files = _get_python_files(search_dir, recursive)
+
+    # Only new or changed docstrings are embedded; everything else comes from the on-disk index.
+    index = _cache.get_index(search_dir, recursive)
+    index.refresh(python_files, _extract_functions_from_file, _cache.get_embedding)
+
+    # Top-k selection and thresholding happen inside the index, so only k results are ever sorted.
+    results = [
+        {
+            'file_path': row['file_path'],
+            'func_name': row['func_name'],
+            'docstring': row['docstring'],
+            'similarity': similarity,
+        }
+        for row, similarity in index.search(query_embedding, top_k, similarity_threshold)
+    ]
+
     # Check if we have any results
     if not results:
         output = {1: {"message": "No Python files found with functions matching the similarity threshold"}}
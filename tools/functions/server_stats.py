@@ -0,0 +1,40 @@
+from typing import Any
+
+
+from server_utils.server_.tool_cache import tool_cache
+from server_utils.server_.tool_metrics import tool_metrics
+from server_utils.server_.tool_registry import tool_registry
+from server_utils.server_.tool_scheduler import tool_scheduler
+from server_utils.server_.tool_single_flight import tool_single_flight
+from server_utils.server_.tool_thread_pool import tool_thread_pool
+
+
+def server_stats() -> dict[str, Any]:
+    """
+    Report how the server's tools have been performing since it started.
+
+    Use this to find slow, failing or verbose tools, or to see how busy the server is.
+
+    Returns:
+        dict[str, Any]: A dictionary with:
+            - 'tools': For each tool called so far, its number of calls, errors and truncated outputs,
+              and the count, sum, mean, p50, p95, p99 and max of its wall time in seconds,
+              CPU time in seconds (synchronous tools only) and output size in bytes.
+            - 'thread_pool': Threads for synchronous tools, and the calls running and waiting on them.
+            - 'scheduler': Tool calls in flight, calls waiting for a slot by client, and how long calls waited.
+            - 'cache': Hits and misses of tools whose results are memoized.
+            - 'coalesced_calls': Identical concurrent calls that shared one execution.
+            - 'reloads': How often each tool module was reloaded after its source changed.
+
+    Example:
+        >>> server_stats()["tools"]["count_lines"]["wall_seconds"]["p95"]
+        0.012
+    """
+    return {
+        "tools": tool_metrics.snapshot(),
+        "thread_pool": tool_thread_pool.stats(),
+        "scheduler": tool_scheduler.stats(),
+        "cache": tool_cache.stats(),
+        "coalesced_calls": tool_single_flight.stats(),
+        "reloads": tool_registry.stats(),
+    }